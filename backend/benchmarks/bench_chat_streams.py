@@ -0,0 +1,136 @@
+"""
+Concurrent chat stream load test.
+
+Simulates N chat requests arriving at once on one event loop, as in a
+single uvicorn worker. Each request retrieves context for its question
+(query embedding against a local stub of the HuggingFace endpoint, then a
+local vector + BM25 search) and streams a fake LLM answer token by token.
+
+It runs twice:
+- blocking: `VectorStore.search` called directly inside the coroutine,
+  as the chat route used to do
+- async: `await VectorStore.asearch`, the route's current path
+
+Reported per run: wall time, streams/sec, time-to-first-token p50/p95,
+and the worst event-loop stall seen by a 5 ms ticker.
+
+Run from the backend directory:
+
+    python -m benchmarks.bench_chat_streams --streams 64 --latency-ms 80
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import tempfile
+import threading
+import time
+from http.server import ThreadingHTTPServer
+
+from benchmarks.bench_embeddings import DIMENSION, make_handler, synthetic_chunks
+
+NAMESPACE = "bench"
+
+
+async def loop_lag_monitor(stop: asyncio.Event, interval: float = 0.005) -> float:
+    """Largest delay beyond `interval` between ticks, i.e. the longest loop stall."""
+
+    worst = 0.0
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(interval)
+        worst = max(worst, time.perf_counter() - start - interval)
+    return worst
+
+
+async def run(streams: int, tokens: int, token_interval: float, use_async: bool):
+    from src.services.vector_store import VectorStore
+
+    async def one_stream(i: int) -> float:
+        started = time.perf_counter()
+        question = f"question {i} about attention and ablation baselines"
+
+        store = VectorStore(NAMESPACE)
+        if use_async:
+            await store.asearch(question)
+        else:
+            store.search(question)
+
+        first_token = None
+        for _ in range(tokens):
+            await asyncio.sleep(token_interval)  # stands in for the LLM producing a token
+            if first_token is None:
+                first_token = time.perf_counter() - started
+        return first_token
+
+    stop = asyncio.Event()
+    monitor = asyncio.create_task(loop_lag_monitor(stop))
+
+    start = time.perf_counter()
+    ttft = await asyncio.gather(*(one_stream(i) for i in range(streams)))
+    elapsed = time.perf_counter() - start
+
+    stop.set()
+    worst_stall = await monitor
+
+    ttft.sort()
+    label = "async   " if use_async else "blocking"
+    print(
+        f"{label}: {elapsed:6.2f}s  {streams / elapsed:7.1f} streams/sec  "
+        f"TTFT p50 {statistics.median(ttft) * 1000:7.0f} ms  p95 {ttft[int(len(ttft) * 0.95) - 1] * 1000:7.0f} ms  "
+        f"max loop stall {worst_stall * 1000:6.0f} ms"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--streams", type=int, default=64, help="concurrent chat requests")
+    parser.add_argument("--latency-ms", type=float, default=80.0, help="simulated embedding request latency")
+    parser.add_argument("--tokens", type=int, default=50, help="tokens streamed per answer")
+    parser.add_argument("--token-ms", type=float, default=5.0, help="simulated time between LLM tokens")
+    parser.add_argument("--chunks", type=int, default=2000, help="chunks indexed in the benchmark namespace")
+    args = parser.parse_args()
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), make_handler(args.latency_ms / 1000, 0.0))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    data_dir = tempfile.mkdtemp(prefix="bench_chat_")
+
+    # Point every service at the stub and a throwaway local store before importing them
+    os.environ["EMBEDDING_MODEL"] = f"http://127.0.0.1:{server.server_port}"
+    os.environ["EMBEDDING_BACKEND"] = "huggingface"
+    os.environ["EMBEDDING_DIMENSION"] = str(DIMENSION)
+    os.environ.setdefault("HUGGINGFACE_API_KEY", "stub")
+    os.environ["VECTOR_BACKEND"] = "local"
+    os.environ["LOCAL_VECTOR_DIR"] = os.path.join(data_dir, "vectordb")
+    os.environ["SPARSE_INDEX_DIR"] = os.path.join(data_dir, "sparse")
+    # Every request must pay for its own retrieval
+    os.environ["EMBEDDING_CACHE_ENABLED"] = "false"
+    os.environ["RETRIEVAL_CACHE_ENABLED"] = "false"
+
+    from src.services.vector_backends import get_vector_backend
+
+    chunks = synthetic_chunks(args.chunks)
+    get_vector_backend().upsert(NAMESPACE, [
+        {"id": str(i), "values": [random.random() for _ in range(DIMENSION)], "metadata": {"text": text}}
+        for i, text in enumerate(chunks)
+    ])
+
+    from src.services.sparse_index import get_sparse_store
+    store = get_sparse_store()
+    builder = store.builder(NAMESPACE)
+    for i, text in enumerate(chunks):
+        builder.add(str(i), text)
+    store.save(NAMESPACE, builder)
+
+    print(f"{args.streams} concurrent streams, {args.latency_ms:.0f} ms embedding latency, {args.tokens} tokens each")
+    asyncio.run(run(args.streams, args.tokens, args.token_ms / 1000, use_async=False))
+    asyncio.run(run(args.streams, args.tokens, args.token_ms / 1000, use_async=True))
+
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""
+Embedding throughput benchmark.
+
+Starts a local stub of the HuggingFace feature-extraction endpoint and
+embeds a synthetic 500-chunk document, once with per-chunk `embed_text`
+calls and once with the batched `embed_texts` API.
+
+Run from the backend directory:
+
+    python -m benchmarks.bench_embeddings --chunks 500 --latency-ms 40
+"""
+
+import argparse
+import json
+import os
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+DIMENSION = 384
+
+
+def make_handler(latency_s: float, per_text_s: float):
+    class StubEmbeddingHandler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+            inputs = json.loads(body or b"{}").get("inputs", [])
+            if isinstance(inputs, str):
+                inputs = [inputs]
+
+            # Simulated network round trip + model time
+            time.sleep(latency_s + per_text_s * len(inputs))
+
+            payload = json.dumps([[random.random() for _ in range(DIMENSION)] for _ in inputs]).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def log_message(self, *args):
+            pass
+
+    return StubEmbeddingHandler
+
+
+def synthetic_chunks(count: int, size: int = 1000):
+    words = ["attention", "transformer", "gradient", "dataset", "baseline", "ablation", "encoder", "loss"]
+    return [" ".join(random.choice(words) for _ in range(size // 8))[:size] for _ in range(count)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--chunks", type=int, default=500)
+    parser.add_argument("--latency-ms", type=float, default=40.0, help="simulated per-request latency")
+    parser.add_argument("--per-text-ms", type=float, default=0.5, help="simulated per-text model time")
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--skip-serial", action="store_true", help="only measure the batched path")
+    args = parser.parse_args()
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), make_handler(args.latency_ms / 1000, args.per_text_ms / 1000))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    # Point the embedding client at the stub before importing it
+    os.environ["EMBEDDING_MODEL"] = f"http://127.0.0.1:{server.server_port}"
+    os.environ["EMBEDDING_BACKEND"] = "huggingface"
+    os.environ["EMBED_MAX_CONCURRENCY"] = str(args.concurrency)
+    # Measure the network path, not cache hits from the serial pass
+    os.environ["EMBEDDING_CACHE_ENABLED"] = "false"
+    os.environ.setdefault("HUGGINGFACE_API_KEY", "stub")
+    from src.services.embeddings import embed_text, embed_texts
+
+    chunks = synthetic_chunks(args.chunks)
+
+    if not args.skip_serial:
+        start = time.perf_counter()
+        for chunk in chunks:
+            embed_text(chunk)
+        elapsed = time.perf_counter() - start
+        print(f"serial   embed_text : {len(chunks) / elapsed:8.1f} chunks/sec ({elapsed:.2f}s)")
+
+    start = time.perf_counter()
+    vectors = embed_texts(chunks, batch_size=args.batch_size)
+    elapsed = time.perf_counter() - start
+    assert len(vectors) == len(chunks)
+    print(
+        f"batched  embed_texts: {len(chunks) / elapsed:8.1f} chunks/sec ({elapsed:.2f}s, "
+        f"batch_size={args.batch_size}, concurrency={args.concurrency})"
+    )
+
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
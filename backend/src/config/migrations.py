@@ -0,0 +1,77 @@
+from typing import List, Tuple
+
+from sqlalchemy import inspect, text
+from sqlalchemy.engine import Engine
+
+from src.config.db import Base
+
+# Columns added to tables after they were first created: (table, column, DDL).
+# create_all never alters an existing table, so each missing column is added
+# here, in order, before any index that may cover it.
+ADDED_COLUMNS: List[Tuple[str, str, str]] = [
+    # sha256 of the file bytes, for reusing the namespace of duplicate uploads
+    ("pdfs", "content_hash", "VARCHAR(64)"),
+    # Rows indexed before background ingestion are already usable
+    ("pdfs", "ingest_status", "VARCHAR NOT NULL DEFAULT 'ready'"),
+    # Rolling conversation summary; NULL means nothing summarized yet
+    ("research_sessions", "summary", "TEXT"),
+    ("research_sessions", "summarized_until", "INTEGER"),
+]
+
+# Columns that were NOT NULL when first created and now accept NULL
+NULLABLE_COLUMNS: List[Tuple[str, str]] = [
+    # file_url is only known once the background upload finishes
+    ("pdfs", "file_url"),
+]
+
+
+def _columns(engine: Engine, table: str) -> dict:
+    return {column["name"]: column for column in inspect(engine).get_columns(table)}
+
+
+def _add_columns(engine: Engine):
+    for table, column, ddl in ADDED_COLUMNS:
+        if column in _columns(engine, table):
+            continue
+
+        try:
+            with engine.begin() as conn:
+                conn.execute(text(f"ALTER TABLE {table} ADD COLUMN {column} {ddl}"))
+            print(f"[Migrations] Added {table}.{column}")
+        except Exception:
+            # Another worker starting at the same time may have added it first
+            if column not in _columns(engine, table):
+                raise
+
+
+def _relax_columns(engine: Engine):
+    for table, column in NULLABLE_COLUMNS:
+        if _columns(engine, table)[column]["nullable"]:
+            continue
+
+        if engine.dialect.name == "sqlite":
+            # SQLite can't alter a column in place; recreate the table to pick this up
+            print(f"[Migrations] {table}.{column} is still NOT NULL (unsupported on SQLite)")
+            continue
+
+        with engine.begin() as conn:
+            conn.execute(text(f"ALTER TABLE {table} ALTER COLUMN {column} DROP NOT NULL"))
+        print(f"[Migrations] {table}.{column} now accepts NULL")
+
+
+def migrate(engine: Engine):
+    """
+    Bring the database up to the current models on startup: create missing
+    tables, add columns introduced since a table was created, relax columns
+    that became optional, then create any indexes that don't exist yet.
+    """
+
+    Base.metadata.create_all(bind=engine)
+
+    _add_columns(engine)
+    _relax_columns(engine)
+
+    # create_all skips tables that already exist, so add any newer indexes to them
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(bind=engine, checkfirst=True)
@@ -1,16 +1,76 @@
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
-from src.config.db import Base, engine
+from src.config.db import async_engine, engine
+from src.config.migrations import migrate
 from src.routes.user_routes import router as user_router
 from src.routes.chat_routes import router as chat_router
 from src.routes.research_routes import router as research_router
+from src.services.embeddings import init_embedding_provider
+from src.services.llm_clients import init_llm_clients, llm_client_stats
+from src.services.embedding_cache import get_embedding_cache
+from src.services.retrieval_cache import get_retrieval_cache
+from src.services.arxiv_client import arxiv_client_api
+from src.services.arxiv_downloader import close_arxiv_downloader
+from src.services.blob_store import get_blob_store, shutdown_blob_store
+from src.services.embedding_batcher import get_embedding_batcher, shutdown_embedding_batcher
+from src.services.job_queue import shutdown_job_queue
+from src.services.loader import shutdown_extraction_pool
+from src.services.executors import shutdown_blocking_pool
+from src.services.tool_agent import shutdown_tool_pool
+from src.services.vector_backends import close_vector_backend
+from src.services.vector_store import init_vector_backend
 
 
 from fastapi.middleware.cors import CORSMiddleware
-app = FastAPI(title="Research Paper Assistant")
 
 
-# Create all tables in Neon
-Base.metadata.create_all(bind=engine)
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Build the shared embedding client once and warm it before serving traffic
+    try:
+        init_embedding_provider(warm_up=True)
+    except Exception as e:
+        print(f"[Startup] Embedding provider warm-up failed: {str(e)}")
+
+    # Create the shared LLM clients once; requests only hold conversation state
+    try:
+        init_llm_clients()
+    except Exception as e:
+        print(f"[Startup] LLM client initialization failed: {str(e)}")
+
+    # Connect to the vector backend once; VectorStore instances reuse it.
+    # A ValueError is misconfiguration (unknown backend, missing key, index
+    # dimension mismatch) and stops startup; anything else is retried on first use.
+    try:
+        init_vector_backend()
+    except ValueError:
+        raise
+    except Exception as e:
+        print(f"[Startup] Vector backend initialization failed: {str(e)}")
+
+    # Open the PDF blob store so uploads left pending by the last run resume
+    try:
+        get_blob_store()
+    except Exception as e:
+        print(f"[Startup] PDF blob store initialization failed: {str(e)}")
+    yield
+    shutdown_job_queue()
+    shutdown_embedding_batcher()
+    shutdown_blob_store()
+    shutdown_extraction_pool()
+    shutdown_tool_pool()
+    await close_arxiv_downloader()
+    await close_vector_backend()
+    await async_engine.dispose()
+    shutdown_blocking_pool()
+
+
+app = FastAPI(title="Research Paper Assistant", lifespan=lifespan)
+
+
+# Create all tables in Neon and apply schema changes to existing ones
+migrate(engine)
 
 app.add_middleware(
     CORSMiddleware,
@@ -25,4 +85,44 @@ app.include_router(research_router)
 
 @app.get("/")
 def root():
-    return {"message": "Backend server is running successfully!"}
\ No newline at end of file
+    return {"message": "Backend server is running successfully!"}
+
+@app.get("/stats/embedding-cache")
+def embedding_cache_stats():
+    """Hit/miss counters and tier sizes for the embedding cache."""
+    cache = get_embedding_cache()
+    if cache is None:
+        return {"enabled": False}
+    return {"enabled": True, **cache.stats()}
+
+@app.get("/stats/retrieval-cache")
+def retrieval_cache_stats():
+    """Hit/miss counters for the RAG retrieval cache."""
+    cache = get_retrieval_cache()
+    if cache is None:
+        return {"enabled": False}
+    return {"enabled": True, **cache.stats()}
+
+
+@app.get("/stats/arxiv-cache")
+def arxiv_cache_stats():
+    """Hit/miss counters for the arXiv search cache, coalesced requests and the local mirror."""
+    return arxiv_client_api.cache_stats()
+
+
+@app.get("/stats/embedding-batcher")
+def embedding_batcher_stats():
+    """Rounds sent and texts per round for ingestion embeddings shared across documents."""
+    return get_embedding_batcher().stats()
+
+
+@app.get("/stats/blob-store")
+def blob_store_stats():
+    """Local PDF blob usage, pending remote uploads and evictions."""
+    return get_blob_store().stats()
+
+
+@app.get("/stats/llm")
+def llm_stats():
+    """Shared LLM clients and per-model in-flight / queued requests."""
+    return llm_client_stats()
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Text, ForeignKey, DateTime
+from sqlalchemy import Column, Integer, String, Text, ForeignKey, DateTime, Index
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 from src.config.db import Base
@@ -18,3 +18,8 @@ class Chat(Base):
     # Relationships
     user = relationship("User", back_populates="chats")
     pdf = relationship("PDF", back_populates="chats")
+
+    # Keyset pagination: a user's newest-first history for one PDF
+    __table_args__ = (
+        Index("ix_chats_pdf_user_created_id", "pdf_id", "user_id", "created_at", "id"),
+    )
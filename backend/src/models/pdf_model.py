@@ -11,8 +11,11 @@ class PDF(Base):
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"))
     file_name = Column(String, nullable=False)
-    file_url = Column(String, nullable=False)
-    vector_namespace = Column(UUID(as_uuid=True), nullable=False)
+    file_url = Column(String, nullable=True)  # set once the background upload finishes
+    vector_namespace = Column(UUID(as_uuid=True), nullable=False, index=True)
+    content_hash = Column(String(64), nullable=True, index=True)  # sha256 of the file bytes
+    # pending | processing | ready | failed (rows created before background ingestion are ready)
+    ingest_status = Column(String, nullable=False, default="pending", server_default="ready")
     uploaded_at = Column(DateTime(timezone=True), server_default=func.now())
 
     # Relationships
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, Text
+from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, Text, Index
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 from src.config.db import Base
@@ -13,3 +13,8 @@ class ResearchMessage(Base):
     content = Column(Text, nullable=False)
     timestamp = Column(DateTime(timezone=True), server_default=func.now())
     session = relationship("ResearchSession", back_populates="messages")
+
+    # Keyset pagination: newest-first pages within a session
+    __table_args__ = (
+        Index("ix_research_messages_session_timestamp_id", "session_id", "timestamp", "id"),
+    )
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Text
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 from src.config.db import Base
@@ -12,6 +12,11 @@ class ResearchSession(Base):
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
 
+    # Rolling summary of messages that fell out of the prompt window,
+    # covering every message with id <= summarized_until
+    summary = Column(Text, nullable=True)
+    summarized_until = Column(Integer, nullable=True)
+
     # Relationships
     user = relationship("User", back_populates="research_sessions")
     messages = relationship("ResearchMessage",back_populates="session",cascade="all, delete-orphan")
@@ -1,8 +1,7 @@
 import os
 import uuid
 import traceback
-import asyncio
-import tempfile
+from typing import List, Optional
 
 from fastapi import (
     APIRouter,
@@ -11,98 +10,302 @@ from fastapi import (
     HTTPException,
     Depends
 )
-from fastapi.responses import StreamingResponse
+from fastapi.responses import FileResponse, RedirectResponse
+from sqlalchemy import select, literal, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from pydantic import BaseModel
 
 from src.routes.user_routes import get_current_user
-from src.config.db import get_db
+from src.config.db import AsyncSessionLocal, get_async_db, get_db
 
-from src.services.file_storage import upload_pdf_to_cloudinary
-from src.services.vector_store import VectorStore
-from src.services.loader import DocumentLoader
-from src.services.splitter import DocumentSplitter
+from src.services.vector_store import VectorStore, search_namespaces
 from src.services.llm_model import LLMModel
+from src.services.pdf_service import PDFService
+from src.services.streaming import sse_response
+from src.services.executors import run_blocking
+from src.services.ingestion import enqueue_ingestion
+from src.services.arxiv_downloader import get_arxiv_downloader
+from src.services.blob_store import get_blob_store
+from src.services.job_queue import get_job_queue, new_job
+from src.services.pagination import DEFAULT_PAGE_SIZE, clamp_page_size, decode_cursor, encode_cursor
 
 from src.models.pdf_model import PDF
 from src.models.user_model import User
 from src.models.chat_model import Chat
+from src.schemas.chat_schema import ChatHistoryResponse
+from src.schemas.arxiv_schema import ArxivIngestInput, ArxivIngestOutput, ArxivIngestResult
 
 
 router = APIRouter(prefix="/chat", tags=["Chat"])
 
+# Upper bound on PDFs in one cross-document question
+MULTI_PDF_MAX = int(os.getenv("MULTI_PDF_MAX", "20"))
+# Upper bound on arXiv papers in one bulk ingestion
+ARXIV_INGEST_MAX = int(os.getenv("ARXIV_INGEST_MAX", "25"))
+
+
 class Query(BaseModel):
     question: str
 
 
+class MultiQuery(BaseModel):
+    question: str
+    pdf_ids: List[str]
+    top_k: int = 8
+
+
 # -------------------------------------------------------
 #                UPLOAD & INDEX PDF
 # -------------------------------------------------------
 
+def _register_pdf(db: Session, user: User, file_name: str, file_bytes: bytes) -> dict:
+    """
+    Save a PDF record for `user` and queue its ingestion. Identical bytes
+    already indexed or in progress (by any user) share that namespace
+    instead of being processed again.
+    """
+
+    pdf_id = str(uuid.uuid4())
+    content_hash = PDFService.compute_hash(file_bytes)
+
+    # 1️⃣ Same bytes already indexed or in progress → share its namespace
+    existing = PDFService.find_by_hash(db, content_hash)
+
+    if existing:
+        new_pdf = PDF(
+            id=pdf_id,
+            user_id=user.id,
+            file_name=file_name,
+            file_url=existing.file_url,
+            vector_namespace=existing.vector_namespace,
+            content_hash=content_hash,
+            ingest_status=existing.ingest_status
+        )
+
+        db.add(new_pdf)
+        db.commit()
+
+        active_job = get_job_queue().find_active(str(existing.vector_namespace))
+
+        return {
+            "message": "PDF already indexed, reusing existing embeddings",
+            "pdf_id": pdf_id,
+            "job_id": active_job.id if active_job else None,
+            "ingest_status": new_pdf.ingest_status,
+            "file_url": existing.file_url,
+            "already_existed": True,
+        }
+
+    # 2️⃣ Save metadata in PostgreSQL (pdf_id doubles as the namespace)
+    new_pdf = PDF(
+        id=pdf_id,
+        user_id=user.id,
+        file_name=file_name,
+        vector_namespace=pdf_id,
+        content_hash=content_hash,
+        ingest_status="pending"
+    )
+
+    db.add(new_pdf)
+    db.commit()
+
+    # 3️⃣ Queue upload + indexing on the worker pool
+    job = enqueue_ingestion(new_job(pdf_id, pdf_id, file_name), file_bytes)
+
+    return {
+        "message": "PDF queued for indexing",
+        "pdf_id": pdf_id,
+        "job_id": job.id,
+        "ingest_status": "pending",
+        "already_existed": False,
+    }
+
+
 @router.post("/upload")
 async def upload_pdf(
     file: UploadFile = File(...),
     db: Session = Depends(get_db),
     user: User = Depends(get_current_user),
 ):
-    """Uploads a PDF → Cloudinary → Splits → Embeds in Pinecone → Saves metadata"""
+    """Saves PDF metadata and queues Cloudinary upload → split → embed as a background job.
+    Re-uploads of identical bytes reuse the existing vector namespace."""
 
     if not file.filename.lower().endswith(".pdf"):
         raise HTTPException(400, "Only PDF files allowed")
 
-    pdf_id = str(uuid.uuid4())  # also Pinecone namespace
-
     try:
-        # 1️⃣ Read file bytes
         file_bytes = await file.read()
+        # Hashing, the row-locking lookup and the blob write stay off the event loop
+        result = await run_blocking(_register_pdf, db, user, file.filename, file_bytes)
+        result.pop("already_existed")
+        return result
+
+    except Exception as e:
+        traceback.print_exc()
+        raise HTTPException(
+            500,
+            detail=f"PDF upload error: {str(e)}"
+        )
 
-        # 2️⃣ Upload to Cloudinary
-        cloud_url = upload_pdf_to_cloudinary(file_bytes, file.filename)
 
+def _register_downloads(db: Session, user: User, downloads: list) -> List[ArxivIngestResult]:
+    """Register each successfully downloaded arXiv PDF; runs on the blocking pool."""
+
+    results = []
+    for download, file_bytes in downloads:
+        if not download.success:
+            results.append(ArxivIngestResult(download=download))
+            continue
+
+        try:
+            file_name = f"{download.arxiv_id.replace('/', '_')}.pdf"
+            registered = _register_pdf(db, user, file_name, file_bytes)
+        except Exception as e:
+            traceback.print_exc()
+            db.rollback()
+            download.success = False
+            download.error = f"Ingestion error: {str(e)}"
+            results.append(ArxivIngestResult(download=download))
+            continue
+
+        download.already_existed = registered["already_existed"]
+        results.append(ArxivIngestResult(
+            download=download,
+            pdf_id=registered["pdf_id"],
+            job_id=registered["job_id"],
+            ingest_status=registered["ingest_status"],
+        ))
+
+    return results
+
+
+# Declared before /{pdf_id} so "arxiv" is not taken for a PDF id
+@router.post("/arxiv/ingest", response_model=ArxivIngestOutput)
+async def ingest_arxiv_papers(
+    body: ArxivIngestInput,
+    db: Session = Depends(get_db),
+    user: User = Depends(get_current_user),
+):
+    """
+    Add arXiv papers to the user's PDF library by id: PDFs are downloaded
+    concurrently (politely rate-limited per host), then each one is
+    registered and queued for ingestion like an upload. Embedding requests
+    from the queued documents are batched together.
+    """
 
-        # 3️⃣ Save temp file (loader expects local path)
-        tmp_dir = tempfile.gettempdir()
-        temp_path = os.path.join(tmp_dir, f"{pdf_id}.pdf")
+    arxiv_ids = list(dict.fromkeys(body.arxiv_ids))
 
-        with open(temp_path, "wb") as f:
-            f.write(file_bytes)
+    if len(arxiv_ids) > ARXIV_INGEST_MAX:
+        raise HTTPException(400, f"At most {ARXIV_INGEST_MAX} papers per request")
 
-        # 4️⃣ Load + split PDF
-        loader = DocumentLoader(temp_path)
-        docs = loader.load()
+    downloads = await get_arxiv_downloader().download_many(arxiv_ids)
 
-        splitter = DocumentSplitter()
-        chunks = splitter.split_documents(docs)
+    # Registration hashes, locks, commits and stores every PDF; keep it off the event loop
+    results = await run_blocking(_register_downloads, db, user, downloads)
 
-        # 5️⃣ Add embeddings to Pinecone
-        vector_store = VectorStore(pdf_id)
-        vector_store.add_embeddings(chunks)
+    queued = sum(1 for result in results if result.pdf_id)
+    print(f"[ArxivIngest] Registered {queued}/{len(arxiv_ids)} papers for user {user.id}")
 
-        # 6️⃣ Save metadata in PostgreSQL
-        new_pdf = PDF(
-            id=pdf_id,
-            user_id=user.id,
-            file_name=file.filename,
-            file_url=cloud_url,
-            vector_namespace=pdf_id
-        )
+    return ArxivIngestOutput(success=queued > 0, queued=queued, results=results)
 
-        db.add(new_pdf)
-        db.commit()
-        db.refresh(new_pdf)
 
-        return {
-            "message": "PDF uploaded and indexed successfully",
-            "pdf_id": pdf_id,
-            "file_url": cloud_url,
-        }
+@router.get("/upload/{job_id}")
+def get_upload_status(
+    job_id: str,
+    db: Session = Depends(get_db),
+    user: User = Depends(get_current_user),
+):
+    """Stage-by-stage progress of a background ingestion job."""
+
+    job = get_job_queue().get(job_id)
+
+    if not job:
+        raise HTTPException(404, "Upload job not found")
+
+    # Visible to every user whose PDF shares the namespace being indexed
+    owns_namespace = (
+        db.query(PDF)
+        .filter(PDF.vector_namespace == job.namespace, PDF.user_id == user.id)
+        .first()
+    )
+
+    if not owns_namespace:
+        raise HTTPException(404, "Upload job not found")
+
+    return job.to_dict()
+
+
+# -------------------------------------------------------
+#               CHAT ACROSS SEVERAL PDFs (RAG)
+# -------------------------------------------------------
+
+# Declared before /{pdf_id} so "multi" is not taken for a PDF id
+@router.post("/multi")
+async def chat_with_pdfs(
+    query: MultiQuery,
+    db: AsyncSession = Depends(get_async_db),
+    user: User = Depends(get_current_user),
+):
+    """Answer one question from several of the user's PDFs, retrieving from all of them concurrently."""
+
+    pdf_ids = list(dict.fromkeys(query.pdf_ids))
+
+    if not pdf_ids:
+        raise HTTPException(400, "Select at least one PDF")
+    if len(pdf_ids) > MULTI_PDF_MAX:
+        raise HTTPException(400, f"At most {MULTI_PDF_MAX} PDFs per question")
+    if not 1 <= query.top_k <= 50:
+        raise HTTPException(400, "top_k must be between 1 and 50")
+
+    # 1️⃣ Ensure every PDF belongs to user and is indexed
+    result = await db.execute(
+        select(PDF).where(PDF.id.in_(pdf_ids), PDF.user_id == user.id)
+    )
+    pdfs = result.scalars().all()
+
+    if len(pdfs) != len(pdf_ids):
+        raise HTTPException(404, "PDF not found or unauthorized")
+
+    not_ready = [pdf.file_name for pdf in pdfs if pdf.ingest_status != "ready"]
+    if not_ready:
+        raise HTTPException(409, f"PDFs not ready for chat yet: {', '.join(not_ready)}")
+
+    # Duplicate uploads share a namespace; search each namespace once
+    file_names = {}
+    for pdf in pdfs:
+        file_names.setdefault(str(pdf.vector_namespace), pdf.file_name)
+
+    try:
+        # 2️⃣ Fan retrieval out across namespaces, merge top-k by score
+        context_chunks = await search_namespaces(query.question, list(file_names), top_k=query.top_k)
+
+        for chunk in context_chunks:
+            chunk.metadata["file_name"] = file_names.get(chunk.metadata.get("source"), "unknown")
+
+        # 3️⃣ One prompt with per-document citations
+        llm = LLMModel()
+        messages = llm.build_rag_prompt(query.question, context_chunks)
+        model = llm.model
+
+        # Record the exchange in each PDF's history once the answer is complete
+        async def save_chat(ai_response: str):
+            async with AsyncSessionLocal() as session:
+                for pdf in pdfs:
+                    session.add(Chat(
+                        user_id=user.id,
+                        pdf_id=pdf.id,
+                        role="user",
+                        message=query.question,
+                        response=ai_response,
+                    ))
+                await session.commit()
+
+        return sse_response(model.astream(messages), on_complete=save_chat)
 
     except Exception as e:
         traceback.print_exc()
-        raise HTTPException(
-            500,
-            detail=f"PDF upload error: {str(e)}"
-        )
+        raise HTTPException(500, f"Chat error: {str(e)}")
 
 
 # -------------------------------------------------------
@@ -113,40 +316,35 @@ async def upload_pdf(
 async def chat_with_pdf(
     pdf_id: str,
     query: Query,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     user: User = Depends(get_current_user),
 ):
-    """Chat with a specific PDF using RAG (Pinecone + LLMModel)."""
+    """Chat with a specific PDF using RAG (Pinecone + LLMModel).
+    DB, embedding and vector calls are all awaited; nothing blocks the event loop."""
 
     # 1️⃣ Ensure PDF belongs to user
-    pdf = (
-        db.query(PDF)
-        .filter(PDF.id == pdf_id, PDF.user_id == user.id)
-        .first()
+    result = await db.execute(
+        select(PDF).where(PDF.id == pdf_id, PDF.user_id == user.id)
     )
+    pdf = result.scalars().first()
 
     if not pdf:
         raise HTTPException(404, "PDF not found or unauthorized")
 
-    # 2️⃣ Initialize LLM with PDF namespace
-    llm = LLMModel(pdf_id=pdf_id)
+    if pdf.ingest_status != "ready":
+        raise HTTPException(409, f"PDF is not ready for chat yet (status: {pdf.ingest_status})")
+
+    # 2️⃣ Initialize LLM with PDF namespace (shared between duplicate uploads)
+    namespace = str(pdf.vector_namespace)
+    llm = LLMModel(pdf_id=namespace)
 
     try:
         # 3️⃣ Create prompt (RAG done internally)
-        messages = llm.prompt(query.question, pdf_id=pdf_id)
+        messages = await llm.aprompt(query.question, pdf_id=namespace)
         model = llm.model
 
-        # 4️⃣ Streaming generator for deepseek
-        async def stream_response():
-            ai_response = ""
-
-            async for chunk in model.astream(messages):
-                if hasattr(chunk, "content") and chunk.content:
-                    ai_response += chunk.content
-                    yield chunk.content
-                await asyncio.sleep(0.01)
-
-            # Save chat in DB after model finishes
+        # 4️⃣ Save chat in DB after model finishes streaming
+        async def save_chat(ai_response: str):
             chat_entry = Chat(
                 user_id=user.id,
                 pdf_id=pdf_id,
@@ -154,11 +352,12 @@ async def chat_with_pdf(
                 message=query.question,
                 response=ai_response,
             )
-            
-            db.add(chat_entry)
-            db.commit()
 
-        return StreamingResponse(stream_response(), media_type="text/event-stream")
+            async with AsyncSessionLocal() as session:
+                session.add(chat_entry)
+                await session.commit()
+
+        return sse_response(model.astream(messages), on_complete=save_chat)
 
     except Exception as e:
         traceback.print_exc()
@@ -169,13 +368,16 @@ async def chat_with_pdf(
 #                   CHAT HISTORY
 # -------------------------------------------------------
 
-@router.get("/{pdf_id}/history")
+@router.get("/{pdf_id}/history", response_model=ChatHistoryResponse)
 def get_chat_history(
     pdf_id: str,
+    limit: int = DEFAULT_PAGE_SIZE,
+    before: Optional[str] = None,
     db: Session = Depends(get_db),
     user: User = Depends(get_current_user),
 ):
-    """Get all chat history for a given PDF."""
+    """Get one page of chat history for a given PDF, newest page first.
+    Pass the returned `next_cursor` as `before` to load older messages."""
 
     pdf = (
         db.query(PDF)
@@ -186,14 +388,76 @@ def get_chat_history(
     if not pdf:
         raise HTTPException(404, "PDF not found or unauthorized")
 
-    history = (
-        db.query(Chat)
-        .filter(Chat.pdf_id == pdf_id, Chat.user_id == user.id)
-        .order_by(Chat.created_at.asc())
+    try:
+        cursor = decode_cursor(before)
+    except ValueError as e:
+        raise HTTPException(400, str(e))
+
+    limit = clamp_page_size(limit)
+
+    query = db.query(Chat).filter(Chat.pdf_id == pdf_id, Chat.user_id == user.id)
+    if cursor is not None:
+        query = query.filter(
+            tuple_(Chat.created_at, Chat.id)
+            < tuple_(literal(cursor[0], Chat.created_at.type), literal(cursor[1]))
+        )
+
+    # Keyset page on (created_at, id): one extra row tells whether older ones exist
+    rows = (
+        query.order_by(Chat.created_at.desc(), Chat.id.desc())
+        .limit(limit + 1)
         .all()
     )
 
-    return history
+    next_cursor = encode_cursor(rows[limit - 1].created_at, rows[limit - 1].id) if len(rows) > limit else None
+
+    return {
+        "messages": list(reversed(rows[:limit])),
+        "next_cursor": next_cursor,
+        "has_more": next_cursor is not None,
+    }
+
+
+# -------------------------------------------------------
+#                   PDF FILE
+# -------------------------------------------------------
+
+@router.get("/{pdf_id}/file")
+def get_pdf_file(
+    pdf_id: str,
+    db: Session = Depends(get_db),
+    user: User = Depends(get_current_user),
+):
+    """Serve the PDF from the local blob store, falling back to its remote copy."""
+
+    pdf = (
+        db.query(PDF)
+        .filter(PDF.id == pdf_id, PDF.user_id == user.id)
+        .first()
+    )
+
+    if not pdf:
+        raise HTTPException(404, "PDF not found or unauthorized")
+
+    if pdf.content_hash:
+        store = get_blob_store()
+        path = store.path(pdf.content_hash)
+
+        # Evicted blobs are fetched back from the remote copy and cached again
+        if path is None:
+            try:
+                if store.get(pdf.content_hash) is not None:
+                    path = store.path(pdf.content_hash)
+            except Exception as e:
+                print(f"[BlobStore] Re-fetch failed for {pdf.content_hash}: {str(e)}")
+
+        if path is not None:
+            return FileResponse(path, media_type="application/pdf", filename=pdf.file_name)
+
+    if pdf.file_url:
+        return RedirectResponse(pdf.file_url)
+
+    raise HTTPException(404, "PDF file not available")
 
 
 # -------------------------------------------------------
@@ -206,7 +470,7 @@ def delete_pdf(
     db: Session = Depends(get_db),
     user: User = Depends(get_current_user),
 ):
-    """Remove PDF metadata + Pinecone embeddings."""
+    """Remove PDF metadata + Pinecone embeddings (once no other upload shares them)."""
 
     pdf = (
         db.query(PDF)
@@ -217,13 +481,19 @@ def delete_pdf(
     if not pdf:
         raise HTTPException(404, "PDF not found")
 
-    # Delete embeddings
-    vector_store = VectorStore(pdf_id)
-    vector_store.delete_pdf_vectors()
+    namespace = str(pdf.vector_namespace)
+    content_hash = pdf.content_hash
 
-    # Delete PDF DB record
-    db.delete(pdf)
-    db.commit()
+    # Delete PDF DB record; embeddings go only with the last owner
+    last_owner = PDFService.delete_pdf(db, pdf)
+
+    if last_owner:
+        vector_store = VectorStore(namespace)
+        vector_store.delete_pdf_vectors()
+
+    # The local blob goes once no record (in any namespace) has these bytes
+    if content_hash and not db.query(PDF).filter(PDF.content_hash == content_hash).first():
+        get_blob_store().discard(content_hash)
 
     return {"message": "PDF and its embeddings deleted successfully"}
 
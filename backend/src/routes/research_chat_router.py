@@ -1,8 +1,7 @@
 from fastapi import APIRouter, HTTPException
-from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 from src.services.tool_agent import ToolAgent
-import asyncio
+from src.services.streaming import sse_response
 
 router = APIRouter()
 
@@ -14,21 +13,8 @@ async def research_chat(req: Query):
     """Endpoint that will avail tools for the agent"""
     try:
         agent = ToolAgent()
-        prompt = agent.invoke(req.query)
-        model = agent.chat_model
-        async def generate():
-            ai_response = ""
-            async for chunk in model.astream(prompt):
-                if chunk.content:
-                    ai_response += chunk.content
-                    yield chunk.content
-                await asyncio.sleep(0.01)
-
-            agent.add_AIMessage(ai_response)
-        # response = agent.chat_model.invoke(prompt)
-        # agent.add_AIMessage(response.content)
-        # return {"response": response}  
-        return StreamingResponse(generate(), media_type="text/event-stream")
+        # Tool progress events stream first, then the answer tokens
+        return sse_response(agent.astream(req.query), on_complete=agent.add_AIMessage)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
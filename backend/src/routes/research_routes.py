@@ -1,8 +1,7 @@
 # src/routes/research_chat.py
 
-import json
-from fastapi import APIRouter, Depends, HTTPException, status
-from fastapi.responses import StreamingResponse
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, status
 
 from src.schemas.research_chat_schema import (
     ResearchChatRequest,
@@ -15,8 +14,12 @@ from src.schemas.research_chat_schema import (
 from src.services.research_session import ResearchSessionService
 from src.services.research_message import ResearchMessageService
 from src.services.tool_agent import ToolAgent
+from src.services.executors import run_blocking
+from src.services.conversation_memory import HISTORY_TAIL_MESSAGES, schedule_summary_refresh
+from src.services.pagination import DEFAULT_PAGE_SIZE, clamp_page_size, decode_cursor
+from src.services.streaming import sse_response
 
-from src.config.db import get_db
+from src.config.db import SessionLocal, get_db
 from src.routes.user_routes import get_current_user
 from src.models.user_model import User
 
@@ -65,10 +68,12 @@ def list_user_sessions(
     return {"sessions": sessions}
 
 
-# Get messages inside a session
+# Get messages inside a session, newest page first; `before` pages further back
 @router.get("/sessions/{session_id}/messages", response_model=ResearchMessageListResponse)
 def list_messages(
     session_id: int,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1),
+    before: Optional[str] = None,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
@@ -76,8 +81,15 @@ def list_messages(
     if not session or session.user_id != current_user.id:
         raise HTTPException(status_code=404, detail="Session not found")
 
-    messages = ResearchMessageService.get_messages(db, session_id)
-    return {"messages": messages}
+    try:
+        cursor = decode_cursor(before)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    messages, next_cursor = ResearchMessageService.get_page(
+        db, session_id, clamp_page_size(limit), before=cursor
+    )
+    return {"messages": messages, "next_cursor": next_cursor, "has_more": next_cursor is not None}
 
 
 # Delete session
@@ -95,69 +107,82 @@ def delete_session(
     return None
 
 
-# MAIN CHAT ENDPOINT (SYNC)
+def _save_message(session_id: int, role: str, content: str):
+    """
+    Store a message from a streaming callback. These run after the response
+    has started, when the request's session is already closed, so each
+    call uses its own session.
+    """
+
+    db = SessionLocal()
+    try:
+        ResearchMessageService.add_message(db, session_id, role, content)
+    finally:
+        db.close()
+
+
+# MAIN CHAT ENDPOINT (STREAMING)
 @router.post("/chat")
-def research_chat(
+async def research_chat(
     req: ResearchChatRequest,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
+    """
+    Streams the agent turn as SSE: tool_started / tool_result /
+    tool_finished events while tools run, then the answer tokens and a
+    final done event. DB calls run on the blocking pool.
+    """
     user_id = current_user.id
 
     # Create new session if not provided
     session_id = req.session_id
     if not session_id:
-        new_session = ResearchSessionService.create_session(
-            db=db, user_id=user_id, title=None
+        new_session = await run_blocking(
+            ResearchSessionService.create_session, db=db, user_id=user_id, title=None
         )
         session_id = new_session.id
 
     # Check ownership
-    session = ResearchSessionService.get_session(db, session_id)
+    session = await run_blocking(ResearchSessionService.get_session, db, session_id)
     if not session or session.user_id != user_id:
         raise HTTPException(status_code=404, detail="Session not found")
 
-    # Save user message
-    ResearchMessageService.add_message(db, session_id, "user", req.query)
-
-    # Load history for agent
-    history_rows = ResearchMessageService.get_messages(db, session_id)
+    # Load the newest history the session summary doesn't cover yet (before adding this turn)
+    summary = session.summary
+    summarized_until = session.summarized_until or 0
+    history_rows = await run_blocking(
+        ResearchMessageService.get_recent, db, session_id, HISTORY_TAIL_MESSAGES, after_id=summarized_until
+    )
     history_for_agent = convert_history_for_agent(history_rows)
 
-    agent = ToolAgent()
-    if hasattr(agent, "load_history"):
-        agent.load_history(history_for_agent)
+    # Plain ids: the rows expire on the next commit and detach when the request session closes
+    history_ids = [row.id for row in history_rows]
 
-    # Tool calling step (sync)
-    context_result = agent.get_research_context(req.query)
+    # Unsummarized messages older than a full tail are summary material even if the window keeps them all
+    tail_until = history_ids[0] - 1 if len(history_ids) == HISTORY_TAIL_MESSAGES else None
 
-    # Save tool output
-    if isinstance(context_result, dict) and context_result.get("tool_result"):
-        ResearchMessageService.add_message(
-            db, session_id, "tool", json.dumps(context_result["tool_result"])
-        )
+    # Save user message
+    await run_blocking(ResearchMessageService.add_message, db, session_id, "user", req.query)
 
-    # Build final prompt
-    agent.chat_history.append(
-        HumanMessage(f"Context: {context_result}\nQuestion: {req.query}")
-    )
-    prompt = agent.chat_template.invoke({"chat_history": agent.chat_history})
+    agent = ToolAgent()
 
-    model = agent.chat_model
+    # Save the compacted tool output (not the raw paper dump) as soon as the tool step finishes
+    async def save_context(compact: str):
+        await run_blocking(_save_message, session_id, "tool", compact)
 
-    # StreamingResponse (sync generator)
-    def stream():
-        ai_output = ""
+    # Save assistant output once streaming finishes, then refresh the summary in the background
+    async def save_answer(ai_output: str):
+        if ai_output:
+            await run_blocking(_save_message, session_id, "assistant", ai_output)
 
-        for chunk in model.stream(prompt):
-            if chunk.content:
-                ai_output += chunk.content
-                yield chunk.content
+        # Everything before the kept window is summary material, including
+        # unsummarized messages older than the loaded tail
+        summarize_until = history_ids[len(agent.older) - 1] if agent.older else tail_until
 
-        # Save assistant output
-        if ai_output:
-            ResearchMessageService.add_message(
-                db, session_id, "assistant", ai_output
-            )
+        schedule_summary_refresh(session_id, summary, summarized_until, summarize_until)
 
-    return StreamingResponse(stream(), media_type="text/event-stream")
+    return sse_response(
+        agent.astream(req.query, history_for_agent, summary, on_context=save_context),
+        on_complete=save_answer,
+    )
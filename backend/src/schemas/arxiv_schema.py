@@ -76,3 +76,20 @@ class DownloadOutput(BaseModel):
     file_size_mb: Optional[float] = None
     already_existed: bool = False
     error: Optional[str] = None
+
+class ArxivIngestInput(BaseModel):
+    """Input for bulk ingestion of arXiv papers into the user's PDF library"""
+    arxiv_ids: List[str] = Field(..., min_length=1, description="arXiv ids, e.g. from PaperMetadata.arxiv_id")
+
+class ArxivIngestResult(BaseModel):
+    """Per-paper outcome of a bulk ingestion: download result plus the queued PDF"""
+    download: DownloadOutput
+    pdf_id: Optional[str] = None
+    job_id: Optional[str] = None
+    ingest_status: Optional[str] = None
+
+class ArxivIngestOutput(BaseModel):
+    """Output for bulk ingestion"""
+    success: bool
+    queued: int
+    results: List[ArxivIngestResult]
@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import Optional
+from typing import List, Optional
 from datetime import datetime
 from uuid import UUID
 
@@ -22,3 +22,9 @@ class ChatBase(BaseModel):
     model_config = {
         "from_attributes": True
     }
+
+
+class ChatHistoryResponse(BaseModel):
+    messages: List[ChatBase]
+    next_cursor: Optional[str] = None
+    has_more: bool = False
@@ -12,8 +12,10 @@ class PDFCreate(BaseModel):
 class PDFBase(BaseModel):
     id: UUID
     file_name: str
-    file_url: str
+    file_url: Optional[str]
     vector_namespace: Optional[str]
+    content_hash: Optional[str] = None
+    ingest_status: str = "ready"
     uploaded_at: datetime
     user_id: int
 
@@ -55,3 +55,5 @@ class ResearchSessionListResponse(BaseModel):
 
 class ResearchMessageListResponse(BaseModel):
     messages: List[ResearchMessageResponse]
+    next_cursor: Optional[str] = None
+    has_more: bool = False
@@ -1,17 +1,243 @@
+import os
+import json
+import time
+import sqlite3
+import threading
 import arxiv
-from typing import List
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Callable, Dict, List, Optional, Tuple
+from dotenv import load_dotenv
 from src.schemas.arxiv_schema import PaperMetadata
+from src.services.embedding_cache import normalize_text
+from src.services.arxiv_mirror import ArxivMirror, ARXIV_MIRROR_PATH
 import logging
 
+load_dotenv()
+
 logger = logging.getLogger(__name__)
+
+ARXIV_CACHE_ENABLED = os.getenv("ARXIV_CACHE_ENABLED", "true").lower() == "true"
+ARXIV_CACHE_MAX_ENTRIES = int(os.getenv("ARXIV_CACHE_MAX_ENTRIES", "1024"))
+ARXIV_CACHE_TTL_SECONDS = float(os.getenv("ARXIV_CACHE_TTL_SECONDS", "21600"))
+# SQLite file for the persistent tier; unset keeps the cache in memory only
+ARXIV_CACHE_PATH = os.getenv("ARXIV_CACHE_PATH")
+ARXIV_CACHE_MAX_DISK_ENTRIES = int(os.getenv("ARXIV_CACHE_MAX_DISK_ENTRIES", "50000"))
+# "api" queries arXiv directly; "mirror" answers from the local metadata mirror first
+ARXIV_SEARCH_MODE = os.getenv("ARXIV_SEARCH_MODE", "api").lower()
+# Minimum gap between API page request starts, shared by every thread (arXiv asks for 3s)
+ARXIV_API_MIN_INTERVAL_SECONDS = float(os.getenv("ARXIV_API_MIN_INTERVAL_SECONDS", "3"))
+
+SearchKey = Tuple[str, int, str, str]
+OnPaper = Callable[[PaperMetadata], None]
+
+
+class ArxivSearchCache:
+    """
+    Cache of arXiv search results keyed by (normalized query, max_results,
+    sort_by, sort_order).
+
+    Entries expire after `ttl_seconds` and the in-memory tier is evicted
+    least-recently-used past `max_entries`. With `path` set, results are
+    also written to a SQLite table so they survive restarts; memory
+    misses fall through to it.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = ARXIV_CACHE_MAX_ENTRIES,
+        ttl_seconds: float = ARXIV_CACHE_TTL_SECONDS,
+        path: Optional[str] = ARXIV_CACHE_PATH,
+        max_disk_entries: int = ARXIV_CACHE_MAX_DISK_ENTRIES,
+    ):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.path = path
+        self.max_disk_entries = max_disk_entries
+
+        self._entries: "OrderedDict[SearchKey, Tuple[float, List[PaperMetadata]]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+        self._conn = None
+        if path:
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+
+            self._conn = sqlite3.connect(path, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS arxiv_searches (
+                    key TEXT PRIMARY KEY,
+                    papers TEXT NOT NULL,
+                    expires_at REAL NOT NULL
+                )
+                """
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_arxiv_searches_expires ON arxiv_searches(expires_at)")
+            self._conn.execute("DELETE FROM arxiv_searches WHERE expires_at < ?", (time.time(),))
+            self._conn.commit()
+
+    @staticmethod
+    def make_key(query: str, max_results: int, sort_by: arxiv.SortCriterion, sort_order: arxiv.SortOrder) -> SearchKey:
+        return (normalize_text(query), max_results, sort_by.value, sort_order.value)
+
+    # ----------------------------------------------------------------------
+    #                           LOOKUP / STORE
+    # ----------------------------------------------------------------------
+
+    def get(self, key: SearchKey) -> Optional[List[PaperMetadata]]:
+        now = time.time()
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry[0] >= now:
+                    self._entries.move_to_end(key)
+                    self.memory_hits += 1
+                    return entry[1]
+                del self._entries[key]
+
+            papers = self._read_disk(key, now)
+            if papers is None:
+                self.misses += 1
+                return None
+
+            self.disk_hits += 1
+            return papers
+
+    def put(self, key: SearchKey, papers: List[PaperMetadata]):
+        expires_at = time.time() + self.ttl_seconds
+
+        with self._lock:
+            self._remember(key, expires_at, papers)
+
+            if self._conn is not None:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO arxiv_searches (key, papers, expires_at) VALUES (?, ?, ?)",
+                    (json.dumps(key), json.dumps([p.model_dump() for p in papers]), expires_at),
+                )
+                self._prune_disk()
+                self._conn.commit()
+
+    # ----------------------------------------------------------------------
+    #                           INTERNALS (lock held)
+    # ----------------------------------------------------------------------
+
+    def _remember(self, key: SearchKey, expires_at: float, papers: List[PaperMetadata]):
+        self._entries[key] = (expires_at, papers)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def _read_disk(self, key: SearchKey, now: float) -> Optional[List[PaperMetadata]]:
+        if self._conn is None:
+            return None
+
+        row = self._conn.execute(
+            "SELECT papers, expires_at FROM arxiv_searches WHERE key = ? AND expires_at >= ?",
+            (json.dumps(key), now),
+        ).fetchone()
+        if row is None:
+            return None
+
+        papers = [PaperMetadata(**paper) for paper in json.loads(row[0])]
+        self._remember(key, row[1], papers)
+        return papers
+
+    def _prune_disk(self):
+        """Drop expired rows, then the soonest-to-expire ones past `max_disk_entries`."""
+
+        self._conn.execute("DELETE FROM arxiv_searches WHERE expires_at < ?", (time.time(),))
+        self._conn.execute(
+            """
+            DELETE FROM arxiv_searches WHERE key IN (
+                SELECT key FROM arxiv_searches ORDER BY expires_at DESC LIMIT -1 OFFSET ?
+            )
+            """,
+            (self.max_disk_entries,),
+        )
+
+    # ----------------------------------------------------------------------
+    #                           STATS
+    # ----------------------------------------------------------------------
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.memory_hits + self.disk_hits + self.misses
+            hits = self.memory_hits + self.disk_hits
+            return {
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+                "entries": len(self._entries),
+                "capacity": self.max_entries,
+                "persistent": self._conn is not None,
+            }
+
+
+class RequestSpacer:
+    """Thread-safe limiter that spaces request start times `min_interval` apart."""
+
+    def __init__(self, min_interval: float):
+        self.min_interval = min_interval
+        self._lock = threading.Lock()
+        self._next_start = 0.0
+
+    def wait_turn(self):
+        """Reserve the next start slot and sleep until it arrives."""
+
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next_start)
+            self._next_start = start + self.min_interval
+
+        if start > now:
+            time.sleep(start - now)
+
+
+class SpacedArxivClient(arxiv.Client):
+    """
+    arxiv.Client whose page requests take start slots from a shared
+    RequestSpacer instead of its own last-request timestamp, which isn't
+    safe across threads. Only request starts are spaced; responses from
+    concurrent searches download and parse in parallel.
+    """
+
+    def __init__(self, spacer: RequestSpacer, **kwargs):
+        super().__init__(delay_seconds=0, **kwargs)
+        self.spacer = spacer
+
+    def _parse_feed(self, url: str, first_page: bool = True, _try_index: int = 0):
+        # Retries recurse through here, so each attempt waits for its own slot
+        self.spacer.wait_turn()
+        return super()._parse_feed(url, first_page=first_page, _try_index=_try_index)
+
+
 class ArxivAPIClient:
     """
     Low-level client for arXiv API
     Wraps the arxiv Python library with error handling and rate limiting
     """
-    def __init__(self):
-        self.client = arxiv.Client()
+    def __init__(self, cache: Optional[ArxivSearchCache] = None, mirror: Optional[ArxivMirror] = None):
+        # Tool threads share this client; page requests are spaced, not serialized
+        self.client = SpacedArxivClient(RequestSpacer(ARXIV_API_MIN_INTERVAL_SECONDS))
         self.max_results = 50
+        self.cache = cache
+        self.mirror = mirror
+
+        # Searches in flight, so identical concurrent requests share one upstream call
+        self._inflight: Dict[SearchKey, Future] = {}
+        self._inflight_lock = threading.Lock()
+        self.coalesced = 0
+
         logger.info("ArxivAPIClient initialized")
     
     def _parse_result(self, result: arxiv.Result) -> PaperMetadata:
@@ -46,16 +272,23 @@ class ArxivAPIClient:
         query: str,
         max_results: int = 10,
         sort_by: arxiv.SortCriterion = arxiv.SortCriterion.Relevance,
-        sort_order: arxiv.SortOrder = arxiv.SortOrder.Descending
+        sort_order: arxiv.SortOrder = arxiv.SortOrder.Descending,
+        on_paper: Optional[OnPaper] = None
     ) -> List[PaperMetadata]:
         """
         Search arXiv for papers
         
+        In mirror mode the local mirror answers first. Otherwise results
+        are served from the search cache when fresh; concurrent identical
+        searches wait on a single upstream call.
+        
         Args:
             query: Search query string
             max_results: Maximum number of results (capped at ARXIV_MAX_RESULTS)
             sort_by: Sort criterion enum
             sort_order: Sort order enum
+            on_paper: Called with each paper as soon as it is available
+                (as parsed from the API response, or at once when cached)
             
         Returns:
             List of PaperMetadata objects
@@ -63,17 +296,102 @@ class ArxivAPIClient:
         Raises:
             Exception: If API call fails
         """
+        # Cap max_results
+        max_results = min(max_results, self.max_results)
+
+        # Convert string sort options to enums
+        if isinstance(sort_by, str):
+            sort_by = self.get_sort_criterion(sort_by)
+        if isinstance(sort_order, str):
+            sort_order = self.get_sort_order(sort_order)
+
+        if self.mirror is not None:
+            papers = self._search_mirror(query, max_results, sort_by, sort_order)
+            if papers is not None:
+                return self._emit(papers, on_paper)
+
+        key = ArxivSearchCache.make_key(query, max_results, sort_by, sort_order)
+
+        if self.cache is not None:
+            papers = self.cache.get(key)
+            if papers is not None:
+                logger.info(f"arXiv cache hit: query='{query}', max_results={max_results}")
+                return self._emit(papers, on_paper)
+
+        with self._inflight_lock:
+            future = self._inflight.get(key)
+            leader = future is None
+            if leader:
+                future = Future()
+                self._inflight[key] = future
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            logger.info(f"Joining in-flight arXiv search: query='{query}'")
+            return self._emit(future.result(), on_paper)
+
+        try:
+            papers = self._fetch(query, max_results, sort_by, sort_order, on_paper)
+            if self.cache is not None:
+                self.cache.put(key, papers)
+            future.set_result(papers)
+            return list(papers)
+        except Exception as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._inflight_lock:
+                self._inflight.pop(key, None)
+
+    @staticmethod
+    def _emit(papers: List[PaperMetadata], on_paper: Optional[OnPaper]) -> List[PaperMetadata]:
+        if on_paper is not None:
+            for paper in papers:
+                on_paper(paper)
+        return list(papers)
+
+    def _search_mirror(
+        self,
+        query: str,
+        max_results: int,
+        sort_by: arxiv.SortCriterion,
+        sort_order: arxiv.SortOrder
+    ) -> Optional[List[PaperMetadata]]:
+        """
+        Mirror results, or None when the API should answer instead: a
+        newest-first search while the mirror is stale, no mirror hits
+        (the paper may postdate the dump), or an unusable query.
+        """
+        newest_first = sort_by != arxiv.SortCriterion.Relevance and sort_order == arxiv.SortOrder.Descending
+        if newest_first and self.mirror.is_stale():
+            logger.info(f"arXiv mirror is stale for newest-first search, using API: query='{query}'")
+            return None
+
         try:
-            # Cap max_results
-            max_results = min(max_results, self.max_results)
-            
-            logger.info(f"Searching arXiv: query='{query}', max_results={max_results}")
+            papers = self.mirror.search(query, max_results, sort_by.value, sort_order.value)
+        except Exception as e:
+            logger.warning(f"arXiv mirror search failed, using API: {e}")
+            return None
+
+        if not papers:
+            logger.info(f"No mirror hits, using API: query='{query}'")
+            return None
 
-            # Convert string sort options to enums
-            if isinstance(sort_by, str):
-                sort_by = self.get_sort_criterion(sort_by)
-            if isinstance(sort_order, str):
-                sort_order = self.get_sort_order(sort_order)
+        logger.info(f"arXiv mirror returned {len(papers)} papers: query='{query}'")
+        return papers
+
+    def _fetch(
+        self,
+        query: str,
+        max_results: int,
+        sort_by: arxiv.SortCriterion,
+        sort_order: arxiv.SortOrder,
+        on_paper: Optional[OnPaper] = None
+    ) -> List[PaperMetadata]:
+        """One upstream arXiv API call (no caching); `on_paper` sees each paper as it is parsed."""
+        try:
+            logger.info(f"Searching arXiv: query='{query}', max_results={max_results}")
             
             # Create search object
             search = arxiv.Search(
@@ -93,6 +411,8 @@ class ArxivAPIClient:
                     print(result)
                     paper = self._parse_result(result)
                     papers.append(paper)
+                    if on_paper is not None:
+                        on_paper(paper)
                 except Exception as e:
                     logger.warning(f"Failed to parse result: {e}")
                     continue
@@ -137,4 +457,16 @@ class ArxivAPIClient:
         }
         return mapping.get(sort_order, arxiv.SortOrder.Descending)
     
-arxiv_client_api = ArxivAPIClient()
\ No newline at end of file
+    def cache_stats(self) -> dict:
+        stats = {"enabled": self.cache is not None, "coalesced": self.coalesced}
+        if self.cache is not None:
+            stats.update(self.cache.stats())
+        if self.mirror is not None:
+            stats["mirror"] = self.mirror.stats()
+        return stats
+
+
+arxiv_client_api = ArxivAPIClient(
+    cache=ArxivSearchCache() if ARXIV_CACHE_ENABLED else None,
+    mirror=ArxivMirror(ARXIV_MIRROR_PATH) if ARXIV_SEARCH_MODE == "mirror" else None,
+)
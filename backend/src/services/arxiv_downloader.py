@@ -0,0 +1,190 @@
+import os
+import re
+import time
+import asyncio
+from email.utils import parsedate_to_datetime
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+import httpx
+from dotenv import load_dotenv
+
+from src.schemas.arxiv_schema import DownloadOutput
+
+load_dotenv()
+
+# export.arxiv.org is the host arXiv asks automated clients to use
+ARXIV_PDF_BASE_URL = os.getenv("ARXIV_PDF_BASE_URL", "https://export.arxiv.org/pdf").rstrip("/")
+ARXIV_USER_AGENT = os.getenv("ARXIV_USER_AGENT", "ResearchPaperAssistant/1.0 (PDF ingestion)")
+
+# Politeness: open connections and minimum gap between request starts, per host
+ARXIV_DOWNLOAD_MAX_PER_HOST = int(os.getenv("ARXIV_DOWNLOAD_MAX_PER_HOST", "2"))
+ARXIV_DOWNLOAD_MIN_INTERVAL_SECONDS = float(os.getenv("ARXIV_DOWNLOAD_MIN_INTERVAL_SECONDS", "1"))
+
+ARXIV_DOWNLOAD_TIMEOUT_SECONDS = float(os.getenv("ARXIV_DOWNLOAD_TIMEOUT_SECONDS", "60"))
+ARXIV_DOWNLOAD_MAX_RETRIES = int(os.getenv("ARXIV_DOWNLOAD_MAX_RETRIES", "3"))
+ARXIV_DOWNLOAD_MAX_MB = float(os.getenv("ARXIV_DOWNLOAD_MAX_MB", "50"))
+
+# New-style (2301.01234v2) and old-style (hep-th/9901001v1) identifiers
+ARXIV_ID_PATTERN = re.compile(r"^(\d{4}\.\d{4,5}|[a-z\-]+(\.[A-Z]{2})?/\d{7})(v\d+)?$")
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+def normalize_arxiv_id(value: str) -> Optional[str]:
+    """Bare arXiv id from an id, `arXiv:` reference or abs/pdf URL; None if unrecognised."""
+
+    value = (value or "").strip()
+    value = re.sub(r"^arxiv:", "", value, flags=re.IGNORECASE)
+    value = re.sub(r"^https?://[^/]*arxiv\.org/(abs|pdf)/", "", value)
+    value = re.sub(r"\.pdf$", "", value)
+
+    return value if ARXIV_ID_PATTERN.match(value) else None
+
+
+class HostThrottle:
+    """Caps concurrent requests to one host and spaces their start times."""
+
+    def __init__(self, max_connections: int, min_interval: float):
+        self.semaphore = asyncio.Semaphore(max_connections)
+        self.min_interval = min_interval
+        self._lock = asyncio.Lock()
+        self._next_start = 0.0
+
+    async def wait_turn(self):
+        """Reserve the next start slot; call while holding `semaphore`."""
+
+        async with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next_start)
+            self._next_start = start + self.min_interval
+
+        if start > now:
+            await asyncio.sleep(start - now)
+
+    def back_off(self, seconds: float):
+        """Push every later request on this host back, e.g. after a 429/503."""
+        self._next_start = max(self._next_start, time.monotonic() + seconds)
+
+
+class ArxivDownloader:
+    """
+    Concurrent, arXiv-polite PDF downloader.
+
+    Downloads for many ids run concurrently, but each host gets at most
+    ARXIV_DOWNLOAD_MAX_PER_HOST open requests, started no closer together
+    than ARXIV_DOWNLOAD_MIN_INTERVAL_SECONDS. Throttled or failing
+    responses are retried with backoff, honouring Retry-After.
+    """
+
+    def __init__(self, client: Optional[httpx.AsyncClient] = None):
+        self.client = client or httpx.AsyncClient(
+            follow_redirects=True,
+            timeout=ARXIV_DOWNLOAD_TIMEOUT_SECONDS,
+            headers={"User-Agent": ARXIV_USER_AGENT},
+            limits=httpx.Limits(max_keepalive_connections=ARXIV_DOWNLOAD_MAX_PER_HOST),
+        )
+        self._throttles: Dict[str, HostThrottle] = {}
+
+    def _throttle(self, url: str) -> HostThrottle:
+        host = urlsplit(url).netloc
+        if host not in self._throttles:
+            self._throttles[host] = HostThrottle(ARXIV_DOWNLOAD_MAX_PER_HOST, ARXIV_DOWNLOAD_MIN_INTERVAL_SECONDS)
+        return self._throttles[host]
+
+    @staticmethod
+    def _retry_after(response: httpx.Response, attempt: int) -> float:
+        header = response.headers.get("Retry-After")
+        if header:
+            try:
+                return max(0.0, float(header))
+            except ValueError:
+                try:
+                    return max(0.0, parsedate_to_datetime(header).timestamp() - time.time())
+                except (TypeError, ValueError):
+                    pass
+        return ARXIV_DOWNLOAD_MIN_INTERVAL_SECONDS * 2 ** attempt
+
+    async def _get(self, url: str) -> bytes:
+        throttle = self._throttle(url)
+        max_bytes = int(ARXIV_DOWNLOAD_MAX_MB * 1024 * 1024)
+
+        for attempt in range(ARXIV_DOWNLOAD_MAX_RETRIES + 1):
+            async with throttle.semaphore:
+                await throttle.wait_turn()
+
+                try:
+                    async with self.client.stream("GET", url) as response:
+                        if response.status_code in RETRY_STATUSES and attempt < ARXIV_DOWNLOAD_MAX_RETRIES:
+                            delay = self._retry_after(response, attempt)
+                            throttle.back_off(delay)
+                            print(f"[ArxivDownloader] {response.status_code} for {url}, retrying in {delay:.1f}s")
+                            continue
+
+                        response.raise_for_status()
+
+                        body = bytearray()
+                        async for piece in response.aiter_bytes():
+                            body.extend(piece)
+                            if len(body) > max_bytes:
+                                raise ValueError(f"PDF larger than {ARXIV_DOWNLOAD_MAX_MB:g} MB")
+                        return bytes(body)
+
+                except httpx.TransportError as e:
+                    if attempt >= ARXIV_DOWNLOAD_MAX_RETRIES:
+                        raise
+                    print(f"[ArxivDownloader] {type(e).__name__} for {url}, retrying")
+                    throttle.back_off(ARXIV_DOWNLOAD_MIN_INTERVAL_SECONDS * 2 ** attempt)
+
+        raise RuntimeError(f"Gave up on {url}")
+
+    async def download(self, arxiv_id: str) -> Tuple[DownloadOutput, Optional[bytes]]:
+        """Fetch one paper's PDF; the bytes are None whenever `success` is False."""
+
+        paper_id = normalize_arxiv_id(arxiv_id)
+        if not paper_id:
+            return DownloadOutput(success=False, arxiv_id=arxiv_id, error="Invalid arXiv id"), None
+
+        try:
+            data = await self._get(f"{ARXIV_PDF_BASE_URL}/{paper_id}")
+
+            if not data.startswith(b"%PDF"):
+                raise ValueError("Response is not a PDF")
+
+            return DownloadOutput(
+                success=True,
+                arxiv_id=paper_id,
+                file_size_mb=round(len(data) / (1024 * 1024), 3),
+            ), data
+
+        except Exception as e:
+            print(f"[ArxivDownloader] Download failed for {paper_id}: {str(e)}")
+            return DownloadOutput(success=False, arxiv_id=paper_id, error=str(e)), None
+
+    async def download_many(self, arxiv_ids: List[str]) -> List[Tuple[DownloadOutput, Optional[bytes]]]:
+        """Download every id concurrently (within the per-host limits), in input order."""
+        return await asyncio.gather(*(self.download(arxiv_id) for arxiv_id in arxiv_ids))
+
+    async def aclose(self):
+        await self.client.aclose()
+
+
+_downloader: Optional[ArxivDownloader] = None
+
+
+def get_arxiv_downloader() -> ArxivDownloader:
+    """Process-wide downloader; created on the event loop that first uses it."""
+
+    global _downloader
+
+    if _downloader is None:
+        _downloader = ArxivDownloader()
+    return _downloader
+
+
+async def close_arxiv_downloader():
+    global _downloader
+
+    if _downloader is not None:
+        await _downloader.aclose()
+        _downloader = None
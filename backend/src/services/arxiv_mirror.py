@@ -0,0 +1,392 @@
+import os
+import re
+import sys
+import gzip
+import json
+import time
+import sqlite3
+import argparse
+import threading
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Dict, Iterable, Iterator, List, Optional
+from dotenv import load_dotenv
+from src.schemas.arxiv_schema import PaperMetadata
+import logging
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+ARXIV_MIRROR_PATH = os.getenv("ARXIV_MIRROR_PATH", "./data/arxiv_mirror.sqlite3")
+# A mirror whose newest paper is older than this can't answer newest-first searches
+ARXIV_MIRROR_FRESH_HOURS = float(os.getenv("ARXIV_MIRROR_FRESH_HOURS", "72"))
+
+# arXiv query field prefixes -> FTS columns
+FIELD_COLUMNS = {
+    "ti": "title",
+    "abs": "abstract",
+    "au": "authors",
+    "cat": "categories",
+}
+
+# Relevance weights for bm25(): title, abstract, authors, categories
+BM25_WEIGHTS = (10.0, 1.0, 5.0, 2.0)
+
+SORT_COLUMNS = {
+    "lastUpdatedDate": "p.updated",
+    "submittedDate": "p.published",
+}
+
+_TOKEN_RE = re.compile(r'\(|\)|(?:(\w+):)?"([^"]*)"|(?:(\w+):)?([^\s()"]+)')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS papers (
+    rowid INTEGER PRIMARY KEY,
+    arxiv_id TEXT NOT NULL UNIQUE,
+    title TEXT NOT NULL,
+    abstract TEXT NOT NULL,
+    authors TEXT NOT NULL,
+    categories TEXT NOT NULL,
+    published TEXT NOT NULL,
+    updated TEXT,
+    data TEXT NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS idx_papers_published ON papers(published);
+CREATE INDEX IF NOT EXISTS idx_papers_updated ON papers(updated);
+
+CREATE VIRTUAL TABLE IF NOT EXISTS papers_fts USING fts5(
+    title, abstract, authors, categories,
+    content='papers', content_rowid='rowid'
+);
+
+CREATE TRIGGER IF NOT EXISTS papers_ai AFTER INSERT ON papers BEGIN
+    INSERT INTO papers_fts(rowid, title, abstract, authors, categories)
+    VALUES (new.rowid, new.title, new.abstract, new.authors, new.categories);
+END;
+
+CREATE TRIGGER IF NOT EXISTS papers_ad AFTER DELETE ON papers BEGIN
+    INSERT INTO papers_fts(papers_fts, rowid, title, abstract, authors, categories)
+    VALUES ('delete', old.rowid, old.title, old.abstract, old.authors, old.categories);
+END;
+
+CREATE TRIGGER IF NOT EXISTS papers_au AFTER UPDATE ON papers BEGIN
+    INSERT INTO papers_fts(papers_fts, rowid, title, abstract, authors, categories)
+    VALUES ('delete', old.rowid, old.title, old.abstract, old.authors, old.categories);
+    INSERT INTO papers_fts(rowid, title, abstract, authors, categories)
+    VALUES (new.rowid, new.title, new.abstract, new.authors, new.categories);
+END;
+
+CREATE TABLE IF NOT EXISTS mirror_meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+
+# ----------------------------------------------------------------------
+#                           DUMP RECORDS
+# ----------------------------------------------------------------------
+
+def _clean(text: Optional[str]) -> str:
+    return " ".join((text or "").split())
+
+
+def _version_date(version: dict) -> Optional[str]:
+    try:
+        return parsedate_to_datetime(version["created"]).isoformat()
+    except Exception:
+        return None
+
+
+def paper_from_record(record: dict) -> PaperMetadata:
+    """
+    Convert one metadata dump line to PaperMetadata. Accepts the arXiv
+    OAI-derived JSON-lines snapshot (id, authors_parsed, versions, ...)
+    and lines already in PaperMetadata shape.
+    """
+
+    if "arxiv_id" in record:
+        return PaperMetadata(**record)
+
+    arxiv_id = record["id"]
+    versions = record.get("versions") or []
+    latest = versions[-1]["version"] if versions else ""
+
+    if record.get("authors_parsed"):
+        authors = [" ".join(filter(None, (first, last, *rest))).strip() for last, first, *rest in record["authors_parsed"]]
+    else:
+        authors = [a.strip() for a in re.split(r",| and ", _clean(record.get("authors"))) if a.strip()]
+
+    published = (_version_date(versions[0]) if versions else None) or record.get("update_date") or ""
+    updated = (_version_date(versions[-1]) if versions else None) or record.get("update_date")
+    categories = (record.get("categories") or "").split()
+
+    return PaperMetadata(
+        arxiv_id=arxiv_id,
+        title=_clean(record.get("title")),
+        authors=authors,
+        abstract=_clean(record.get("abstract")),
+        published_date=published,
+        updated_date=updated,
+        pdf_url=f"http://arxiv.org/pdf/{arxiv_id}{latest}",
+        arxiv_url=f"http://arxiv.org/abs/{arxiv_id}{latest}",
+        categories=categories,
+        primary_category=categories[0] if categories else "",
+        comment=record.get("comments"),
+        journal_ref=record.get("journal-ref"),
+        doi=record.get("doi"),
+    )
+
+
+def read_dump(path: str) -> Iterator[dict]:
+    """Yield records from a JSON-lines dump (optionally gzipped)."""
+
+    opener = gzip.open if path.endswith(".gz") else open
+    with opener(path, "rt", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                yield json.loads(line)
+
+
+# ----------------------------------------------------------------------
+#                           QUERY TRANSLATION
+# ----------------------------------------------------------------------
+
+def _phrase(text: str) -> str:
+    return '"' + text.replace('"', '""') + '"'
+
+
+def to_fts_query(query: str) -> str:
+    """
+    Translate arXiv search syntax (ti:/abs:/au:/cat:/all: prefixes,
+    quoted phrases, AND/OR/ANDNOT, parentheses) into an FTS5 MATCH
+    expression. Every term is quoted, so user text can't inject FTS
+    operators.
+    """
+
+    parts: List[str] = []
+    for match in _TOKEN_RE.finditer(query):
+        token = match.group(0)
+        if token in ("(", ")"):
+            parts.append(token)
+            continue
+
+        field = match.group(1) or match.group(3)
+        text = match.group(2) if match.group(2) is not None else match.group(4)
+
+        if field is None and text in ("AND", "OR"):
+            parts.append(text)
+            continue
+        if field is None and text == "ANDNOT":
+            parts.append("NOT")
+            continue
+
+        text = text.strip()
+        if not text:
+            continue
+
+        column = FIELD_COLUMNS.get((field or "").lower())
+        parts.append(f"{column} : {_phrase(text)}" if column else _phrase(text))
+
+    return " ".join(parts)
+
+
+# ----------------------------------------------------------------------
+#                               MIRROR
+# ----------------------------------------------------------------------
+
+class ArxivMirror:
+    """
+    Local SQLite copy of arXiv metadata with an FTS5 index over title,
+    abstract, authors and categories. Loaded in bulk from metadata dumps;
+    answers searches in milliseconds without touching the arXiv API.
+    """
+
+    def __init__(self, path: str = ARXIV_MIRROR_PATH):
+        self.path = path
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+        self._conn.commit()
+        self._lock = threading.Lock()
+
+        self._latest_updated = self._read_meta("latest_updated")
+
+    # ----------------------------------------------------------------------
+    #                           LOADING
+    # ----------------------------------------------------------------------
+
+    def load(self, records: Iterable[dict], batch_size: int = 5000) -> int:
+        """Upsert dump records (newer versions replace older rows); returns rows written."""
+
+        written = 0
+        batch = []
+
+        with self._lock:
+            for record in records:
+                try:
+                    batch.append(self._row(paper_from_record(record)))
+                except Exception as e:
+                    logger.warning(f"Skipping malformed mirror record: {e}")
+                    continue
+
+                if len(batch) >= batch_size:
+                    written += self._write(batch)
+                    batch = []
+                    logger.info(f"arXiv mirror: {written} papers loaded")
+
+            if batch:
+                written += self._write(batch)
+
+            latest = self._conn.execute("SELECT MAX(COALESCE(updated, published)) FROM papers").fetchone()[0]
+            if latest:
+                self._write_meta("latest_updated", latest)
+                self._latest_updated = latest
+            self._write_meta("loaded_at", datetime.now(timezone.utc).isoformat())
+            self._conn.execute("INSERT INTO papers_fts(papers_fts) VALUES ('optimize')")
+            self._conn.commit()
+
+        return written
+
+    @staticmethod
+    def _row(paper: PaperMetadata) -> tuple:
+        return (
+            paper.arxiv_id,
+            paper.title,
+            paper.abstract,
+            ", ".join(paper.authors),
+            " ".join(paper.categories),
+            paper.published_date,
+            paper.updated_date,
+            paper.model_dump_json(),
+        )
+
+    def _write(self, rows: List[tuple]) -> int:
+        self._conn.executemany(
+            """
+            INSERT INTO papers (arxiv_id, title, abstract, authors, categories, published, updated, data)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT(arxiv_id) DO UPDATE SET
+                title = excluded.title,
+                abstract = excluded.abstract,
+                authors = excluded.authors,
+                categories = excluded.categories,
+                published = excluded.published,
+                updated = excluded.updated,
+                data = excluded.data
+            WHERE COALESCE(excluded.updated, '') >= COALESCE(papers.updated, '')
+            """,
+            rows,
+        )
+        self._conn.commit()
+        return len(rows)
+
+    def _read_meta(self, key: str) -> Optional[str]:
+        row = self._conn.execute("SELECT value FROM mirror_meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def _write_meta(self, key: str, value: str):
+        self._conn.execute("INSERT OR REPLACE INTO mirror_meta (key, value) VALUES (?, ?)", (key, value))
+
+    # ----------------------------------------------------------------------
+    #                           SEARCH
+    # ----------------------------------------------------------------------
+
+    def search(
+        self,
+        query: str,
+        max_results: int = 10,
+        sort_by: str = "relevance",
+        sort_order: str = "descending"
+    ) -> List[PaperMetadata]:
+        """Full-text search in arXiv query syntax; raises sqlite3.Error on an unparsable query."""
+
+        expression = to_fts_query(query)
+        if not expression:
+            return []
+
+        direction = "ASC" if sort_order == "ascending" else "DESC"
+        column = SORT_COLUMNS.get(sort_by)
+        if column:
+            order = f"{column} {direction}"
+        else:
+            # bm25() is lower-is-better
+            order = f"bm25(papers_fts, {', '.join(map(str, BM25_WEIGHTS))}) {'DESC' if direction == 'ASC' else 'ASC'}"
+
+        with self._lock:
+            rows = self._conn.execute(
+                f"""
+                SELECT p.data FROM papers_fts
+                JOIN papers p ON p.rowid = papers_fts.rowid
+                WHERE papers_fts MATCH ?
+                ORDER BY {order}
+                LIMIT ?
+                """,
+                (expression, max_results),
+            ).fetchall()
+
+        return [PaperMetadata.model_validate_json(row[0]) for row in rows]
+
+    def is_stale(self, fresh_hours: float = ARXIV_MIRROR_FRESH_HOURS) -> bool:
+        """True when the newest mirrored paper is older than `fresh_hours` (or the mirror is empty)."""
+
+        if not self._latest_updated:
+            return True
+        try:
+            latest = datetime.fromisoformat(self._latest_updated)
+        except ValueError:
+            return True
+        if latest.tzinfo is None:
+            latest = latest.replace(tzinfo=timezone.utc)
+        return (datetime.now(timezone.utc) - latest).total_seconds() > fresh_hours * 3600
+
+    def stats(self) -> Dict[str, Optional[str]]:
+        with self._lock:
+            count = self._conn.execute("SELECT COUNT(*) FROM papers").fetchone()[0]
+            return {
+                "papers": count,
+                "latest_updated": self._latest_updated,
+                "loaded_at": self._read_meta("loaded_at"),
+                "stale": self.is_stale(),
+            }
+
+
+# ----------------------------------------------------------------------
+#                               CLI
+# ----------------------------------------------------------------------
+
+def main(argv: Optional[List[str]] = None):
+    """
+    Bulk-load metadata dumps into the mirror:
+
+        python -m src.services.arxiv_mirror arxiv-metadata-oai-snapshot.json [more.jsonl.gz ...]
+    """
+
+    parser = argparse.ArgumentParser(description="Load arXiv metadata dumps into the local mirror")
+    parser.add_argument("dumps", nargs="+", help="JSON-lines metadata dumps (.json/.jsonl, optionally .gz)")
+    parser.add_argument("--path", default=ARXIV_MIRROR_PATH, help="Mirror SQLite file")
+    parser.add_argument("--batch-size", type=int, default=5000)
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO)
+    mirror = ArxivMirror(args.path)
+
+    for dump in args.dumps:
+        start = time.perf_counter()
+        written = mirror.load(read_dump(dump), batch_size=args.batch_size)
+        print(f"[ArxivMirror] {dump}: {written} papers in {time.perf_counter() - start:.1f}s")
+
+    print(f"[ArxivMirror] {mirror.stats()}")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -1,12 +1,16 @@
+from contextvars import ContextVar
 from langchain.tools import tool
-from src.services.arxiv_client import arxiv_client_api
-from typing import List
+from src.services.arxiv_client import OnPaper, arxiv_client_api
+from typing import List, Optional
 from src.schemas.arxiv_schema import PaperMetadata
 
+# Receives each paper as it is parsed; set by the agent around a streamed tool call
+paper_listener: ContextVar[Optional[OnPaper]] = ContextVar("paper_listener", default=None)
+
 @tool
 def arxiv_search(query: str, max_results: int, sort_by: str = "", sort_order: str = "")->List[PaperMetadata]:
     """Search research papers from arXiv using a query string"""
-    return arxiv_client_api.search(query, max_results, sort_by, sort_order)
+    return arxiv_client_api.search(query, max_results, sort_by, sort_order, on_paper=paper_listener.get())
 
 def get_research_tools():
-    return [arxiv_search]
\ No newline at end of file
+    return [arxiv_search]
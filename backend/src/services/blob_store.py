@@ -0,0 +1,384 @@
+import os
+import time
+import queue
+import sqlite3
+import hashlib
+import threading
+from typing import Callable, Optional
+
+import httpx
+from dotenv import load_dotenv
+
+load_dotenv()
+
+PDF_BLOB_DIR = os.getenv("PDF_BLOB_DIR", "./data/pdfs")
+PDF_BLOB_MAX_MB = int(os.getenv("PDF_BLOB_MAX_MB", "2048"))
+# Set to false to keep PDFs local only (nothing is then evictable)
+PDF_REMOTE_UPLOAD_ENABLED = os.getenv("PDF_REMOTE_UPLOAD_ENABLED", "true").lower() == "true"
+PDF_UPLOAD_RETRY_SECONDS = float(os.getenv("PDF_UPLOAD_RETRY_SECONDS", "30"))
+
+
+class BlobStore:
+    """
+    Content-addressed PDF store on local disk with write-behind remote upload.
+
+    Blobs live at `<root>/<ab>/<cd>/<sha256>.pdf`, so identical files are
+    stored once whatever their names. A background thread uploads each new
+    blob to remote storage; blobs still waiting are picked up again after a
+    restart. Reads are served from disk first and fall back to the remote
+    copy, which is then cached again. Once the store exceeds `max_bytes`,
+    least-recently used blobs are deleted locally, but only those already
+    uploaded.
+    """
+
+    def __init__(
+        self,
+        root: str = PDF_BLOB_DIR,
+        max_bytes: int = PDF_BLOB_MAX_MB * 1024 * 1024,
+        upload: Optional[Callable[[str, str], str]] = None,
+        on_uploaded: Optional[Callable[[str, str], None]] = None,
+    ):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.upload = upload
+        self.on_uploaded = on_uploaded
+
+        self._lock = threading.Lock()
+        self._uploads: "queue.Queue[Optional[str]]" = queue.Queue()
+        self._uploader: Optional[threading.Thread] = None
+        self._closed = threading.Event()
+
+        self.hits = 0
+        self.remote_fetches = 0
+        self.uploaded = 0
+        self.upload_failures = 0
+        self.evictions = 0
+
+        os.makedirs(root, exist_ok=True)
+
+        self._conn = sqlite3.connect(os.path.join(root, "blobs.sqlite3"), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS blobs (
+                hash TEXT PRIMARY KEY,
+                size INTEGER NOT NULL,
+                local INTEGER NOT NULL,
+                remote_url TEXT,
+                last_access REAL NOT NULL
+            )
+            """
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_blobs_last_access ON blobs(last_access)")
+        self._conn.commit()
+
+        self._local_bytes = self._conn.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM blobs WHERE local = 1"
+        ).fetchone()[0]
+
+        if self.upload is not None:
+            pending = self._conn.execute(
+                "SELECT hash FROM blobs WHERE remote_url IS NULL AND local = 1 ORDER BY last_access"
+            ).fetchall()
+            for (content_hash,) in pending:
+                self._queue_upload(content_hash)
+
+    # ----------------------------------------------------------------------
+    #                           PATHS
+    # ----------------------------------------------------------------------
+
+    def _path(self, content_hash: str) -> str:
+        return os.path.join(self.root, content_hash[:2], content_hash[2:4], f"{content_hash}.pdf")
+
+    def path(self, content_hash: str) -> Optional[str]:
+        """Local file for a blob, or None when it is not on disk."""
+
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT local FROM blobs WHERE hash = ?", (content_hash,)
+            ).fetchone()
+            if not row or not row[0]:
+                return None
+            self._touch(content_hash)
+        return self._path(content_hash)
+
+    def remote_url(self, content_hash: str) -> Optional[str]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT remote_url FROM blobs WHERE hash = ?", (content_hash,)
+            ).fetchone()
+        return row[0] if row else None
+
+    # ----------------------------------------------------------------------
+    #                           WRITE / READ
+    # ----------------------------------------------------------------------
+
+    def put(self, file_bytes: bytes) -> str:
+        """Store `file_bytes` (once per content) and queue its upload; returns the content hash."""
+
+        content_hash = hashlib.sha256(file_bytes).hexdigest()
+        path = self._path(content_hash)
+
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT local, remote_url FROM blobs WHERE hash = ?", (content_hash,)
+            ).fetchone()
+            if row and row[0]:
+                self._touch(content_hash)
+                return content_hash
+
+        self._write(path, file_bytes)
+
+        with self._lock:
+            # Re-read: a concurrent put of the same bytes may have landed meanwhile
+            row = self._conn.execute(
+                "SELECT local, remote_url FROM blobs WHERE hash = ?", (content_hash,)
+            ).fetchone()
+            if not (row and row[0]):
+                self._local_bytes += len(file_bytes)
+
+            self._conn.execute(
+                """
+                INSERT INTO blobs (hash, size, local, remote_url, last_access) VALUES (?, ?, 1, NULL, ?)
+                ON CONFLICT(hash) DO UPDATE SET local = 1, last_access = excluded.last_access
+                """,
+                (content_hash, len(file_bytes), time.time()),
+            )
+            self._conn.commit()
+
+            uploaded = bool(row and row[1])
+            if self._local_bytes > self.max_bytes:
+                self._evict()
+
+        if not uploaded:
+            self._queue_upload(content_hash)
+
+        return content_hash
+
+    def get(self, content_hash: str) -> Optional[bytes]:
+        """Blob bytes from disk, else from the remote copy (re-cached locally); None if unknown."""
+
+        path = self.path(content_hash)
+        if path:
+            try:
+                with open(path, "rb") as f:
+                    data = f.read()
+                self.hits += 1
+                return data
+            except FileNotFoundError:
+                print(f"[BlobStore] Missing file for {content_hash}, trying remote copy")
+                with self._lock:
+                    size = self._conn.execute("SELECT size FROM blobs WHERE hash = ?", (content_hash,)).fetchone()[0]
+                    self._conn.execute("UPDATE blobs SET local = 0 WHERE hash = ?", (content_hash,))
+                    self._conn.commit()
+                    self._local_bytes -= size
+
+        url = self.remote_url(content_hash)
+        if not url:
+            return None
+
+        response = httpx.get(url, follow_redirects=True, timeout=60)
+        response.raise_for_status()
+        data = response.content
+
+        if hashlib.sha256(data).hexdigest() != content_hash:
+            raise ValueError(f"Remote copy of {content_hash} does not match its hash")
+
+        self.remote_fetches += 1
+        self._write(self._path(content_hash), data)
+
+        with self._lock:
+            self._conn.execute(
+                "UPDATE blobs SET local = 1, last_access = ? WHERE hash = ?", (time.time(), content_hash)
+            )
+            self._conn.commit()
+            self._local_bytes += len(data)
+            if self._local_bytes > self.max_bytes:
+                self._evict()
+
+        return data
+
+    def discard(self, content_hash: str):
+        """Forget a blob locally (e.g. its last PDF record was deleted); the remote copy is kept."""
+
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT size, local FROM blobs WHERE hash = ?", (content_hash,)
+            ).fetchone()
+            if not row:
+                return
+
+            self._conn.execute("DELETE FROM blobs WHERE hash = ?", (content_hash,))
+            self._conn.commit()
+            if row[1]:
+                self._local_bytes -= row[0]
+                self._remove_file(content_hash)
+
+    # ----------------------------------------------------------------------
+    #                           INTERNALS
+    # ----------------------------------------------------------------------
+
+    @staticmethod
+    def _write(path: str, data: bytes):
+        """Atomic write: concurrent writers of the same blob write identical bytes."""
+
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+
+    def _remove_file(self, content_hash: str):
+        try:
+            os.remove(self._path(content_hash))
+        except FileNotFoundError:
+            pass
+
+    def _touch(self, content_hash: str):
+        """Lock held."""
+        self._conn.execute("UPDATE blobs SET last_access = ? WHERE hash = ?", (time.time(), content_hash))
+        self._conn.commit()
+
+    def _evict(self):
+        """Lock held. Drop least-recently used uploaded blobs until at 90% of the cap."""
+
+        target = int(self.max_bytes * 0.9)
+        rows = self._conn.execute(
+            "SELECT hash, size FROM blobs WHERE local = 1 AND remote_url IS NOT NULL ORDER BY last_access ASC"
+        ).fetchall()
+
+        for content_hash, size in rows:
+            if self._local_bytes <= target:
+                break
+            self._conn.execute("UPDATE blobs SET local = 0 WHERE hash = ?", (content_hash,))
+            self._remove_file(content_hash)
+            self._local_bytes -= size
+            self.evictions += 1
+
+        self._conn.commit()
+
+        if self._local_bytes > self.max_bytes:
+            print(f"[BlobStore] Over capacity with {self._local_bytes} bytes; remaining blobs await upload")
+
+    # ----------------------------------------------------------------------
+    #                           WRITE-BEHIND UPLOAD
+    # ----------------------------------------------------------------------
+
+    def _queue_upload(self, content_hash: str):
+        if self.upload is None or self._closed.is_set():
+            return
+
+        if self._uploader is None:
+            with self._lock:
+                if self._uploader is None:
+                    self._uploader = threading.Thread(target=self._upload_loop, name="blob-uploader", daemon=True)
+                    self._uploader.start()
+
+        self._uploads.put(content_hash)
+
+    def _upload_loop(self):
+        while not self._closed.is_set():
+            content_hash = self._uploads.get()
+            if content_hash is None:
+                return
+
+            path = self.path(content_hash)
+            if path is None or self.remote_url(content_hash):
+                continue  # discarded meanwhile, or already uploaded
+
+            try:
+                url = self.upload(path, content_hash)
+            except Exception as e:
+                self.upload_failures += 1
+                print(f"[BlobStore] Upload of {content_hash} failed, retrying in {PDF_UPLOAD_RETRY_SECONDS:g}s: {str(e)}")
+                # Back off before anything else; failures are usually the remote being unavailable
+                if not self._closed.wait(PDF_UPLOAD_RETRY_SECONDS):
+                    self._uploads.put(content_hash)
+                continue
+
+            with self._lock:
+                self._conn.execute("UPDATE blobs SET remote_url = ? WHERE hash = ?", (url, content_hash))
+                self._conn.commit()
+            self.uploaded += 1
+
+            if self.on_uploaded is not None:
+                try:
+                    self.on_uploaded(content_hash, url)
+                except Exception as e:
+                    print(f"[BlobStore] Upload callback failed for {content_hash}: {str(e)}")
+
+    def close(self):
+        """Stop the uploader; blobs not yet uploaded are resumed on the next start."""
+
+        self._closed.set()
+        self._uploads.put(None)
+
+    # ----------------------------------------------------------------------
+    #                           STATS
+    # ----------------------------------------------------------------------
+
+    def stats(self) -> dict:
+        with self._lock:
+            blobs, pending = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(local = 1 AND remote_url IS NULL), 0) FROM blobs"
+            ).fetchone()
+            return {
+                "blobs": blobs,
+                "pending_uploads": pending,
+                "local_bytes": self._local_bytes,
+                "capacity_bytes": self.max_bytes,
+                "hits": self.hits,
+                "remote_fetches": self.remote_fetches,
+                "uploaded": self.uploaded,
+                "upload_failures": self.upload_failures,
+                "evictions": self.evictions,
+            }
+
+
+def _upload_to_cloudinary(path: str, content_hash: str) -> str:
+    from src.services.file_storage import upload_pdf_to_cloudinary
+    return upload_pdf_to_cloudinary(path, content_hash)
+
+
+def _set_file_url(content_hash: str, url: str):
+    """Point every PDF record with these bytes at the uploaded copy."""
+
+    from src.config.db import SessionLocal
+    from src.models.pdf_model import PDF
+
+    db = SessionLocal()
+    try:
+        db.query(PDF)\
+          .filter(PDF.content_hash == content_hash)\
+          .update({PDF.file_url: url}, synchronize_session=False)
+        db.commit()
+    finally:
+        db.close()
+
+
+_store: Optional[BlobStore] = None
+_store_lock = threading.Lock()
+
+
+def get_blob_store() -> BlobStore:
+    """Return the process-wide PDF blob store (starting pending uploads on first use)."""
+
+    global _store
+
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = BlobStore(
+                    upload=_upload_to_cloudinary if PDF_REMOTE_UPLOAD_ENABLED else None,
+                    on_uploaded=_set_file_url,
+                )
+    return _store
+
+
+def shutdown_blob_store():
+    global _store
+
+    if _store is not None:
+        _store.close()
+        _store = None
@@ -0,0 +1,164 @@
+import os
+import math
+from collections import Counter
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+from dotenv import load_dotenv
+
+from src.services.prompt_budget import PromptBudget, count_tokens, truncate_to_tokens
+from src.services.sparse_index import BM25_B, BM25_K1, tokenize
+
+load_dotenv()
+
+# Longest abstract excerpt per paper, even when the budget has room for more
+COMPACT_ABSTRACT_MAX_TOKENS = int(os.getenv("COMPACT_ABSTRACT_MAX_TOKENS", "120"))
+# Title matches count this many times more than abstract matches when ranking
+COMPACT_TITLE_WEIGHT = float(os.getenv("COMPACT_TITLE_WEIGHT", "3"))
+# Authors listed per paper before "et al."
+COMPACT_MAX_AUTHORS = int(os.getenv("COMPACT_MAX_AUTHORS", "3"))
+
+TABLE_HEADER = "# | arXiv | year | title | authors | pdf | abstract"
+
+
+# ----------------------------------------------------------------------
+#                           COLLECT / RANK
+# ----------------------------------------------------------------------
+
+def collect_papers(context: Any) -> Tuple[List[dict], List[str]]:
+    """Papers from every tool result (deduplicated by arXiv id) and any tool errors."""
+
+    papers: Dict[str, dict] = {}
+    errors: List[str] = []
+
+    for result in (context or {}).get("tool_results") or []:
+        if isinstance(result, dict):
+            if result.get("error"):
+                errors.append(result["error"])
+            continue
+
+        for paper in result or []:
+            if isinstance(paper, dict):
+                papers.setdefault(paper.get("arxiv_id") or paper.get("title", ""), paper)
+
+    return list(papers.values()), errors
+
+
+def rank_papers(query: str, papers: Sequence[dict]) -> List[dict]:
+    """
+    Order papers by BM25 relevance of their title and abstract to the
+    query, scored within the result set itself. Ties keep the tool's order.
+    """
+
+    terms = set(tokenize(query))
+    if not terms or not papers:
+        return list(papers)
+
+    docs = [
+        (Counter(tokenize(p.get("title", ""))), Counter(tokenize(p.get("abstract", ""))))
+        for p in papers
+    ]
+    lengths = [sum(title.values()) * COMPACT_TITLE_WEIGHT + sum(abstract.values()) for title, abstract in docs]
+    avg_length = sum(lengths) / len(lengths) or 1.0
+
+    scores = []
+    for (title, abstract), length in zip(docs, lengths):
+        norm = BM25_K1 * (1 - BM25_B + BM25_B * length / avg_length)
+        score = 0.0
+        for term in terms:
+            tf = title[term] * COMPACT_TITLE_WEIGHT + abstract[term]
+            if not tf:
+                continue
+            df = sum(1 for t, a in docs if term in t or term in a)
+            idf = math.log(1 + (len(docs) - df + 0.5) / (df + 0.5))
+            score += idf * tf * (BM25_K1 + 1) / (tf + norm)
+        scores.append(score)
+
+    order = sorted(range(len(papers)), key=lambda i: -scores[i])
+    return [papers[i] for i in order]
+
+
+# ----------------------------------------------------------------------
+#                               RENDER
+# ----------------------------------------------------------------------
+
+def _cell(text: Any) -> str:
+    return " ".join(str(text or "").split()).replace("|", "/")
+
+
+def _row_prefix(rank: int, paper: dict) -> str:
+    authors = paper.get("authors") or []
+    names = ", ".join(authors[:COMPACT_MAX_AUTHORS]) + (" et al." if len(authors) > COMPACT_MAX_AUTHORS else "")
+
+    return " | ".join([
+        str(rank),
+        _cell(paper.get("arxiv_id")),
+        _cell(paper.get("published_date", ""))[:4],
+        _cell(paper.get("title")),
+        _cell(names),
+        _cell(paper.get("pdf_url") or paper.get("download_link")),
+    ]) + " | "
+
+
+def _share_budget(available: int, needs: List[int]) -> List[int]:
+    """Split `available` tokens across abstracts: short ones take what they need, the rest share evenly."""
+
+    allot = [0] * len(needs)
+    pending = sorted(range(len(needs)), key=lambda i: needs[i])
+
+    while pending:
+        share = available // len(pending)
+        i = pending.pop(0)
+        allot[i] = max(0, min(needs[i], share))
+        available -= allot[i]
+
+    return allot
+
+
+def compact_context(query: str, context: Any, max_tokens: Optional[int] = None) -> str:
+    """
+    Dense text form of an agent context for the prompt and for storage:
+    tool papers are deduplicated, ranked against `query` and rendered one
+    row each in a pipe table, with abstracts trimmed so the whole block
+    fits `max_tokens` (the prompt's context share by default). Papers
+    that don't fit even without an abstract are dropped, lowest-ranked
+    first. A direct model response (no tool call) is passed through.
+    """
+
+    max_tokens = PromptBudget().context_tokens if max_tokens is None else max_tokens
+
+    if isinstance(context, str):
+        return truncate_to_tokens(context, max_tokens)
+
+    if not (context or {}).get("tool_results"):
+        return truncate_to_tokens(_cell((context or {}).get("response", "")), max_tokens)
+
+    papers, errors = collect_papers(context)
+    papers = rank_papers(query, papers)
+
+    footer = f"\nTool errors: {'; '.join(_cell(e) for e in errors)}" if errors else ""
+    header = f"Papers found ({len(papers)}, most relevant first):\n{TABLE_HEADER}"
+
+    available = max_tokens - count_tokens(header) - count_tokens(footer)
+    prefixes = [_row_prefix(i + 1, paper) for i, paper in enumerate(papers)]
+    prefix_costs = [count_tokens(prefix) + 1 for prefix in prefixes]
+
+    # Drop the lowest-ranked rows until every remaining row fits without its abstract
+    while prefixes and sum(prefix_costs) > available:
+        prefixes.pop()
+        prefix_costs.pop()
+
+    kept = papers[:len(prefixes)]
+    abstracts = [_cell(paper.get("abstract")) for paper in kept]
+    needs = [min(count_tokens(text), COMPACT_ABSTRACT_MAX_TOKENS) for text in abstracts]
+    allot = _share_budget(available - sum(prefix_costs), needs)
+
+    rows = [
+        prefix + truncate_to_tokens(text, tokens)
+        for prefix, text, tokens in zip(prefixes, abstracts, allot)
+    ]
+
+    if len(kept) < len(papers):
+        header = f"Papers found ({len(papers)}, {len(kept)} most relevant shown):\n{TABLE_HEADER}"
+    if not papers:
+        header = "No papers found."
+
+    return "\n".join([header, *rows]) + footer
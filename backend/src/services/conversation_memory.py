@@ -0,0 +1,100 @@
+import os
+import threading
+from typing import Optional, Sequence, Tuple
+from langchain_core.messages import HumanMessage, SystemMessage
+from dotenv import load_dotenv
+
+from src.services.llm_clients import LLMConfig, get_llm_client
+from src.services.prompt_budget import truncate_to_tokens
+
+load_dotenv()
+
+# Length cap of the rolling summary, and of each message fed into it
+SUMMARY_MAX_TOKENS = int(os.getenv("SUMMARY_MAX_TOKENS", "400"))
+SUMMARY_INPUT_TOKENS_PER_MESSAGE = int(os.getenv("SUMMARY_INPUT_TOKENS_PER_MESSAGE", "800"))
+# Most messages folded in by one refresh; a longer backlog is caught up over later turns
+SUMMARY_MAX_MESSAGES = int(os.getenv("SUMMARY_MAX_MESSAGES", "100"))
+# Unsummarized messages loaded for the agent's prompt window (newest first)
+HISTORY_TAIL_MESSAGES = int(os.getenv("HISTORY_TAIL_MESSAGES", "40"))
+
+SUMMARY_LLM_CONFIG = LLMConfig(task="conversational", max_new_tokens=SUMMARY_MAX_TOKENS, temperature=0.2)
+
+# Sessions with a summary refresh in flight (one at a time per session)
+_refreshing = set()
+_refreshing_lock = threading.Lock()
+
+
+def summarize_turns(previous_summary: Optional[str], turns: Sequence[Tuple[str, str]]) -> str:
+    """Fold (role, content) turns into the running summary with one LLM call."""
+
+    transcript = "\n\n".join(
+        f"{role.upper()}: {truncate_to_tokens(content, SUMMARY_INPUT_TOKENS_PER_MESSAGE)}"
+        for role, content in turns
+    )
+
+    messages = [
+        SystemMessage(
+            "You maintain a running summary of a research conversation. "
+            "Merge the new messages into the existing summary. Keep the user's goals, "
+            "papers discussed (titles, arXiv ids, links), findings and open questions. "
+            f"Reply with the updated summary only, under {SUMMARY_MAX_TOKENS} tokens."
+        ),
+        HumanMessage(
+            f"Existing summary:\n{previous_summary or '(none)'}\n\nNew messages:\n{transcript}"
+        ),
+    ]
+
+    return get_llm_client(SUMMARY_LLM_CONFIG).invoke(messages).content.strip()
+
+
+def refresh_session_summary(session_id: int, previous_summary: Optional[str], after_id: int, until_id: int):
+    """
+    Fold the messages with after_id < id <= until_id (those that fell out
+    of the prompt window) into the session's stored summary, at most
+    SUMMARY_MAX_MESSAGES at a time. Runs off the request path; a refresh
+    already running for the session makes this a no-op (the messages are
+    picked up again next time).
+    """
+
+    if until_id <= after_id:
+        return
+
+    with _refreshing_lock:
+        if session_id in _refreshing:
+            return
+        _refreshing.add(session_id)
+
+    from src.config.db import SessionLocal
+    from src.services.research_message import ResearchMessageService
+    from src.services.research_session import ResearchSessionService
+
+    try:
+        db = SessionLocal()
+        try:
+            rows = ResearchMessageService.get_range(db, session_id, after_id, until_id, SUMMARY_MAX_MESSAGES)
+            if not rows:
+                return
+
+            summary = summarize_turns(previous_summary, [(m.role, m.content) for m in rows])
+            ResearchSessionService.update_summary(db, session_id, summary, summarized_until=rows[-1].id)
+        finally:
+            db.close()
+
+        print(f"[ConversationMemory] Session {session_id}: folded {len(rows)} messages into summary")
+
+    except Exception as e:
+        print(f"[ConversationMemory] Summary refresh failed for session {session_id}: {str(e)}")
+
+    finally:
+        with _refreshing_lock:
+            _refreshing.discard(session_id)
+
+
+def schedule_summary_refresh(session_id: int, previous_summary: Optional[str], after_id: int, until_id: Optional[int]):
+    """Run `refresh_session_summary` on the blocking pool without waiting for it."""
+
+    if until_id is None or until_id <= after_id:
+        return
+
+    from src.services.executors import get_blocking_pool
+    get_blocking_pool().submit(refresh_session_summary, session_id, previous_summary, after_id, until_id)
@@ -0,0 +1,148 @@
+import os
+import time
+import threading
+from collections import deque
+from concurrent.futures import Future
+from typing import Deque, List, Optional, Tuple
+from dotenv import load_dotenv
+
+from src.services.embeddings import EMBED_BATCH_SIZE, EMBED_MAX_CONCURRENCY, embed_texts
+
+load_dotenv()
+
+# How long a partial batch waits for texts from other documents before it is sent
+EMBED_BATCHER_MAX_WAIT_MS = float(os.getenv("EMBED_BATCHER_MAX_WAIT_MS", "50"))
+
+
+class EmbeddingBatcher:
+    """
+    Process-wide embedding queue shared by concurrent ingestions.
+
+    Each document's chunks are queued as individual texts; one dispatcher
+    thread drains the queue in rounds of up to `batch_size * max_concurrency`
+    texts (full batches for every in-flight request slot), so the tail of
+    one document fills a batch with the head of the next instead of each
+    document sending its own half-empty batches. Each round goes through
+    `embed_texts`, so the embedding cache still applies.
+    """
+
+    def __init__(
+        self,
+        batch_size: int = EMBED_BATCH_SIZE,
+        max_concurrency: int = EMBED_MAX_CONCURRENCY,
+        max_wait_ms: float = EMBED_BATCHER_MAX_WAIT_MS,
+    ):
+        self.batch_size = batch_size
+        self.round_size = batch_size * max(1, max_concurrency)
+        self.max_wait = max_wait_ms / 1000
+
+        self._pending: Deque[Tuple[str, Future]] = deque()
+        self._cond = threading.Condition()
+        self._closed = False
+        self._thread: Optional[threading.Thread] = None
+
+        self.rounds = 0
+        self.texts = 0
+
+    def submit(self, texts: List[str]) -> List[Future]:
+        """Queue texts; each future resolves to that text's vector."""
+
+        futures = [Future() for _ in texts]
+
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("Embedding batcher is shut down")
+
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="embed-batcher", daemon=True)
+                self._thread.start()
+
+            self._pending.extend(zip(texts, futures))
+            self._cond.notify()
+
+        return futures
+
+    def embed(self, texts: List[str]) -> List[List[float]]:
+        """Blocking drop-in for `embed_texts`: vectors in the order of `texts`."""
+        return [future.result() for future in self.submit(texts)]
+
+    def _take_round(self) -> List[Tuple[str, Future]]:
+        """Wait for work, then up to max_wait for a full batch; caller holds the lock."""
+
+        while not self._pending and not self._closed:
+            self._cond.wait()
+
+        deadline = time.monotonic() + self.max_wait
+        while len(self._pending) < self.batch_size and not self._closed:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            self._cond.wait(remaining)
+
+        count = min(len(self._pending), self.round_size)
+        return [self._pending.popleft() for _ in range(count)]
+
+    def _run(self):
+        while True:
+            with self._cond:
+                work = self._take_round()
+                if not work and self._closed:
+                    return
+
+            # Skip texts whose caller gave up (e.g. a cancelled job)
+            work = [(text, future) for text, future in work if future.set_running_or_notify_cancel()]
+            if not work:
+                continue
+
+            try:
+                vectors = embed_texts([text for text, _ in work], batch_size=self.batch_size)
+                for (_, future), vector in zip(work, vectors):
+                    future.set_result(vector)
+            except Exception as e:
+                print(f"[EmbeddingBatcher] Round of {len(work)} texts failed: {str(e)}")
+                for _, future in work:
+                    future.set_exception(e)
+
+            self.rounds += 1
+            self.texts += len(work)
+
+    def shutdown(self):
+        """Finish queued texts, then stop the dispatcher."""
+
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+    def stats(self) -> dict:
+        with self._cond:
+            queued = len(self._pending)
+        return {
+            "rounds": self.rounds,
+            "texts": self.texts,
+            "avg_round_size": round(self.texts / self.rounds, 1) if self.rounds else 0.0,
+            "queued": queued,
+        }
+
+
+_batcher: Optional[EmbeddingBatcher] = None
+_batcher_lock = threading.Lock()
+
+
+def get_embedding_batcher() -> EmbeddingBatcher:
+    """Return the process-wide embedding batcher."""
+
+    global _batcher
+
+    if _batcher is None:
+        with _batcher_lock:
+            if _batcher is None:
+                _batcher = EmbeddingBatcher()
+    return _batcher
+
+
+def shutdown_embedding_batcher():
+    global _batcher
+
+    if _batcher is not None:
+        _batcher.shutdown()
+        _batcher = None
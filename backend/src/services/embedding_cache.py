@@ -0,0 +1,252 @@
+import os
+import time
+import sqlite3
+import hashlib
+import threading
+import unicodedata
+from array import array
+from collections import OrderedDict
+from typing import Dict, List, Optional
+from dotenv import load_dotenv
+
+load_dotenv()
+
+EMBEDDING_CACHE_ENABLED = os.getenv("EMBEDDING_CACHE_ENABLED", "true").lower() == "true"
+EMBEDDING_CACHE_PATH = os.getenv("EMBEDDING_CACHE_PATH", "./data/embedding_cache.sqlite3")
+EMBEDDING_CACHE_MEMORY_ITEMS = int(os.getenv("EMBEDDING_CACHE_MEMORY_ITEMS", "20000"))
+EMBEDDING_CACHE_MAX_DISK_MB = int(os.getenv("EMBEDDING_CACHE_MAX_DISK_MB", "512"))
+
+
+def normalize_text(text: str) -> str:
+    """Canonical form used for cache keys: NFKC + collapsed whitespace."""
+    return " ".join(unicodedata.normalize("NFKC", text).split())
+
+
+class EmbeddingCache:
+    """
+    Content-addressed embedding cache keyed by (model name, normalized text hash).
+
+    Two tiers:
+    - an in-memory LRU of the most recently used vectors
+    - a SQLite table on disk, evicted by least-recent access once it
+      exceeds `max_disk_bytes`
+    """
+
+    def __init__(
+        self,
+        path: str = EMBEDDING_CACHE_PATH,
+        memory_items: int = EMBEDDING_CACHE_MEMORY_ITEMS,
+        max_disk_bytes: int = EMBEDDING_CACHE_MAX_DISK_MB * 1024 * 1024,
+    ):
+        self.path = path
+        self.memory_items = memory_items
+        self.max_disk_bytes = max_disk_bytes
+
+        self._memory: "OrderedDict[str, List[float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS embeddings (
+                key TEXT PRIMARY KEY,
+                vector BLOB NOT NULL,
+                size INTEGER NOT NULL,
+                last_access REAL NOT NULL
+            )
+            """
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_embeddings_last_access ON embeddings(last_access)")
+        self._conn.commit()
+
+        self._disk_bytes = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM embeddings").fetchone()[0]
+
+    # ----------------------------------------------------------------------
+    #                           KEYS
+    # ----------------------------------------------------------------------
+
+    @staticmethod
+    def make_key(model_name: str, text: str) -> str:
+        digest = hashlib.sha256(normalize_text(text).encode("utf-8")).hexdigest()
+        return f"{model_name}:{digest}"
+
+    # ----------------------------------------------------------------------
+    #                           LOOKUP
+    # ----------------------------------------------------------------------
+
+    def get_many(self, model_name: str, texts: List[str]) -> List[Optional[List[float]]]:
+        """Return cached vectors in the order of `texts` (None for misses)."""
+
+        keys = [self.make_key(model_name, t) for t in texts]
+        results: List[Optional[List[float]]] = [None] * len(keys)
+        disk_lookup: Dict[str, List[int]] = {}
+
+        with self._lock:
+            for i, key in enumerate(keys):
+                vector = self._memory.get(key)
+                if vector is not None:
+                    self._memory.move_to_end(key)
+                    results[i] = vector
+                    self.memory_hits += 1
+                else:
+                    disk_lookup.setdefault(key, []).append(i)
+
+            if disk_lookup:
+                found = self._read_disk(list(disk_lookup))
+                for key, positions in disk_lookup.items():
+                    vector = found.get(key)
+                    if vector is None:
+                        self.misses += len(positions)
+                        continue
+                    self.disk_hits += len(positions)
+                    self._remember(key, vector)
+                    for i in positions:
+                        results[i] = vector
+
+        return results
+
+    def get(self, model_name: str, text: str) -> Optional[List[float]]:
+        return self.get_many(model_name, [text])[0]
+
+    # ----------------------------------------------------------------------
+    #                           STORE
+    # ----------------------------------------------------------------------
+
+    def put_many(self, model_name: str, texts: List[str], vectors: List[List[float]]):
+        now = time.time()
+        rows = []
+
+        with self._lock:
+            for text, vector in zip(texts, vectors):
+                key = self.make_key(model_name, text)
+                self._remember(key, vector)
+                blob = array("f", vector).tobytes()
+                rows.append((key, blob, len(blob), now))
+
+            if not rows:
+                return
+
+            # INSERT OR IGNORE: only count bytes for rows that were actually added
+            for row in rows:
+                cursor = self._conn.execute(
+                    "INSERT OR IGNORE INTO embeddings (key, vector, size, last_access) VALUES (?, ?, ?, ?)",
+                    row,
+                )
+                if cursor.rowcount > 0:
+                    self._disk_bytes += row[2]
+            self._conn.commit()
+
+            if self._disk_bytes > self.max_disk_bytes:
+                self._evict_disk()
+
+    def put(self, model_name: str, text: str, vector: List[float]):
+        self.put_many(model_name, [text], [vector])
+
+    # ----------------------------------------------------------------------
+    #                           INTERNALS (lock held)
+    # ----------------------------------------------------------------------
+
+    def _remember(self, key: str, vector: List[float]):
+        self._memory[key] = vector
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_items:
+            self._memory.popitem(last=False)
+
+    def _read_disk(self, keys: List[str]) -> Dict[str, List[float]]:
+        found: Dict[str, List[float]] = {}
+
+        # Stay under SQLite's bound-parameter limit
+        for start in range(0, len(keys), 500):
+            batch = keys[start:start + 500]
+            placeholders = ",".join("?" * len(batch))
+            rows = self._conn.execute(
+                f"SELECT key, vector FROM embeddings WHERE key IN ({placeholders})", batch
+            ).fetchall()
+            for key, blob in rows:
+                vector = array("f")
+                vector.frombytes(blob)
+                found[key] = vector.tolist()
+
+        if found:
+            now = time.time()
+            self._conn.executemany(
+                "UPDATE embeddings SET last_access = ? WHERE key = ?",
+                [(now, key) for key in found],
+            )
+            self._conn.commit()
+
+        return found
+
+    def _evict_disk(self):
+        """Drop least-recently used rows until the table is at 90% of its cap."""
+
+        target = int(self.max_disk_bytes * 0.9)
+        while self._disk_bytes > target:
+            rows = self._conn.execute(
+                "SELECT key, size FROM embeddings ORDER BY last_access ASC LIMIT 500"
+            ).fetchall()
+            if not rows:
+                break
+
+            removed = []
+            for key, size in rows:
+                removed.append((key,))
+                self._disk_bytes -= size
+                if self._disk_bytes <= target:
+                    break
+
+            self._conn.executemany("DELETE FROM embeddings WHERE key = ?", removed)
+            self.evictions += len(removed)
+
+        self._conn.commit()
+
+    # ----------------------------------------------------------------------
+    #                           STATS
+    # ----------------------------------------------------------------------
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.memory_hits + self.disk_hits + self.misses
+            hits = self.memory_hits + self.disk_hits
+            return {
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+                "memory_items": len(self._memory),
+                "memory_capacity": self.memory_items,
+                "disk_bytes": self._disk_bytes,
+                "disk_capacity_bytes": self.max_disk_bytes,
+            }
+
+
+_cache: Optional[EmbeddingCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_embedding_cache() -> Optional[EmbeddingCache]:
+    """Return the process-wide embedding cache, or None when disabled."""
+
+    global _cache
+
+    if not EMBEDDING_CACHE_ENABLED:
+        return None
+
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = EmbeddingCache()
+
+    return _cache
@@ -1,26 +1,270 @@
 import os
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional
 from dotenv import load_dotenv
-from langchain_huggingface import HuggingFaceEndpointEmbeddings
+
+from src.services.embedding_cache import get_embedding_cache
+from src.services.executors import run_blocking
 
 load_dotenv()
 
 HF_API_KEY = os.getenv("HUGGINGFACE_API_KEY")
+EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL", "sentence-transformers/all-MiniLM-L6-v2")
+
+# "huggingface" (Inference API) or "local" (in-process sentence-transformers on CPU)
+EMBEDDING_BACKEND = os.getenv("EMBEDDING_BACKEND", "huggingface")
+
+# Texts sent per inference request, and how many requests may be in flight
+EMBED_BATCH_SIZE = int(os.getenv("EMBED_BATCH_SIZE", "32"))
+EMBED_MAX_CONCURRENCY = int(os.getenv("EMBED_MAX_CONCURRENCY", "4"))
+
+# Keep-alive connections held open to the Inference API
+EMBED_HTTP_POOL_SIZE = int(os.getenv("EMBED_HTTP_POOL_SIZE", "16"))
+
+# Output dimension of well-known models; others are declared via
+# EMBEDDING_DIMENSION or probed with one embed call
+KNOWN_DIMENSIONS = {
+    "sentence-transformers/all-MiniLM-L6-v2": 384,
+    "sentence-transformers/all-MiniLM-L12-v2": 384,
+    "sentence-transformers/all-mpnet-base-v2": 768,
+    "BAAI/bge-small-en-v1.5": 384,
+    "BAAI/bge-base-en-v1.5": 768,
+    "BAAI/bge-large-en-v1.5": 1024,
+}
+
+
+class EmbeddingProvider:
+    """
+    Long-lived embedding backend shared by the whole process.
+    Subclasses implement `embed_query` and `_embed_batch`.
+    """
+
+    def __init__(self, model_name: str, max_concurrency: int = EMBED_MAX_CONCURRENCY):
+        self.model_name = model_name
+        self.max_concurrency = max(1, max_concurrency)
+        self._dimension: Optional[int] = None
+        # Long-lived workers so per-thread HTTP sessions stay warm between calls
+        self._pool = ThreadPoolExecutor(max_workers=self.max_concurrency, thread_name_prefix="embed")
+
+    @property
+    def dimension(self) -> int:
+        """Length of the vectors this provider produces."""
+
+        if self._dimension is None:
+            declared = os.getenv("EMBEDDING_DIMENSION") or KNOWN_DIMENSIONS.get(self.model_name)
+            self._dimension = int(declared) if declared else len(self.embed_query("dimension probe"))
+        return self._dimension
+
+    def embed_query(self, text: str) -> List[float]:
+        raise NotImplementedError
+
+    async def aembed_query(self, text: str) -> List[float]:
+        """Async `embed_query`; without a native async client it runs on the provider's workers."""
+        return await asyncio.get_running_loop().run_in_executor(self._pool, self.embed_query, text)
+
+    def _embed_batch(self, texts: List[str]) -> List[List[float]]:
+        raise NotImplementedError
+
+    def embed_documents(self, texts: List[str], batch_size: int = EMBED_BATCH_SIZE) -> List[List[float]]:
+        """Embed texts in batches, with at most `max_concurrency` batches in flight."""
+
+        if not texts:
+            return []
+
+        batches = [texts[i:i + batch_size] for i in range(0, len(texts), batch_size)]
+
+        if len(batches) == 1 or self.max_concurrency == 1:
+            results = [self._embed_batch(batch) for batch in batches]
+        else:
+            results = list(self._pool.map(self._embed_batch, batches))
+
+        return [vector for batch in results for vector in batch]
+
+    def warm_up(self):
+        """Run a dummy embed so the first real request doesn't pay connection/model setup."""
+        vector = self.embed_query("warm-up")
+
+        if len(vector) != self.dimension:
+            raise ValueError(
+                f"Embedding model '{self.model_name}' returned {len(vector)}-dim vectors, "
+                f"expected {self.dimension}"
+            )
+
+    def close(self):
+        self._pool.shutdown(wait=False)
+
+
+class HuggingFaceEmbeddingProvider(EmbeddingProvider):
+    """Embeddings from the HuggingFace Inference API over pooled keep-alive connections."""
+
+    def __init__(self, model_name: str = EMBEDDING_MODEL, api_key: Optional[str] = HF_API_KEY, **kwargs):
+        super().__init__(model_name, **kwargs)
+
+        if not api_key:
+            raise ValueError("HUGGINGFACE_API_KEY not found in environment variables")
+
+        self._configure_http_pool()
+
+        from langchain_huggingface import HuggingFaceEndpointEmbeddings
+        self.client = HuggingFaceEndpointEmbeddings(model=model_name, task="feature-extraction", huggingfacehub_api_token=api_key)
+
+    @staticmethod
+    def _configure_http_pool():
+        import requests
+        from requests.adapters import HTTPAdapter
+        from huggingface_hub import configure_http_backend
+
+        def backend_factory() -> requests.Session:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=EMBED_HTTP_POOL_SIZE, pool_maxsize=EMBED_HTTP_POOL_SIZE)
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            return session
+
+        configure_http_backend(backend_factory=backend_factory)
+
+    @staticmethod
+    def _single(result) -> List[float]:
+        if isinstance(result, list) and isinstance(result[0], list):
+            return result[0]
+
+        return result
+
+    def embed_query(self, text: str) -> List[float]:
+        return self._single(self.client.embed_query(text))
+
+    async def aembed_query(self, text: str) -> List[float]:
+        return self._single(await self.client.aembed_query(text))
+
+    def _embed_batch(self, texts: List[str]) -> List[List[float]]:
+        return self.client.embed_documents(texts)
+
+
+class LocalEmbeddingProvider(EmbeddingProvider):
+    """In-process sentence-transformers model on CPU (no network round trip)."""
+
+    def __init__(self, model_name: str = EMBEDDING_MODEL, **kwargs):
+        # The model runs its own batching; a single worker avoids oversubscribing the CPU
+        kwargs.setdefault("max_concurrency", 1)
+        super().__init__(model_name, **kwargs)
+
+        from sentence_transformers import SentenceTransformer
+        self.model = SentenceTransformer(model_name, device="cpu")
+        self._dimension = self.model.get_sentence_embedding_dimension()
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.model.encode(text, convert_to_numpy=True).tolist()
+
+    def _embed_batch(self, texts: List[str]) -> List[List[float]]:
+        return self.model.encode(texts, batch_size=len(texts), convert_to_numpy=True).tolist()
+
+
+_provider: Optional[EmbeddingProvider] = None
+_provider_lock = threading.Lock()
+
+
+def _create_provider(backend: str) -> EmbeddingProvider:
+    if backend == "huggingface":
+        return HuggingFaceEmbeddingProvider()
+    if backend == "local":
+        return LocalEmbeddingProvider()
+    raise ValueError(f"Unknown EMBEDDING_BACKEND '{backend}' (expected 'huggingface' or 'local')")
+
+
+def get_embedding_provider() -> EmbeddingProvider:
+    """Return the process-wide embedding provider, creating it on first use."""
+
+    global _provider
+
+    if _provider is None:
+        with _provider_lock:
+            if _provider is None:
+                _provider = _create_provider(EMBEDDING_BACKEND)
+                print(f"[Embeddings] Using {EMBEDDING_BACKEND} backend with model '{EMBEDDING_MODEL}'")
+
+    return _provider
+
+
+def init_embedding_provider(warm_up: bool = True) -> EmbeddingProvider:
+    """Create the shared provider at app startup and optionally warm it."""
+
+    provider = get_embedding_provider()
+    if warm_up:
+        provider.warm_up()
+        print("[Embeddings] Provider warmed up")
+    return provider
+
 
 def embed_text(text: str):
     """
     Generate embeddings for a query or document chunk
-    using HuggingFace Inference API.
+    using the shared embedding provider.
     Returns a vector (list of floats).
     """
 
-    
-    if not HF_API_KEY:
-        raise ValueError("HUGGINGFACE_API_KEY not found in environment variables")
+    provider = get_embedding_provider()
+    cache = get_embedding_cache()
+
+    if cache is not None:
+        cached = cache.get(provider.model_name, text)
+        if cached is not None:
+            return cached
+
+    vector = provider.embed_query(text)
+
+    if cache is not None:
+        cache.put(provider.model_name, text, vector)
+
+    return vector
+
+
+async def aembed_text(text: str):
+    """
+    Async `embed_text` for request handlers: cache lookups run on the
+    blocking pool and the model call is awaited, so a slow embedding
+    request never stalls the event loop.
+    """
+
+    provider = get_embedding_provider()
+    cache = get_embedding_cache()
+
+    if cache is not None:
+        cached = await run_blocking(cache.get, provider.model_name, text)
+        if cached is not None:
+            return cached
+
+    vector = await provider.aembed_query(text)
+
+    if cache is not None:
+        await run_blocking(cache.put, provider.model_name, text, vector)
+
+    return vector
+
+
+def embed_texts(texts: List[str], batch_size: int = EMBED_BATCH_SIZE) -> List[List[float]]:
+    """
+    Generate embeddings for many document chunks.
+
+    Cached vectors are reused; only the misses are sent in batches of
+    `batch_size`, with at most EMBED_MAX_CONCURRENCY batches in flight.
+    Vectors are returned in the same order as `texts`.
+    """
+
+    provider = get_embedding_provider()
+    cache = get_embedding_cache()
+
+    if cache is None:
+        return provider.embed_documents(texts, batch_size=batch_size)
 
-    embeddings = HuggingFaceEndpointEmbeddings(model="sentence-transformers/all-MiniLM-L6-v2", task="feature-extraction", huggingfacehub_api_token=HF_API_KEY)
-    result = embeddings.embed_query(text)
+    vectors = cache.get_many(provider.model_name, texts)
+    missing = [i for i, v in enumerate(vectors) if v is None]
 
-    if isinstance(result, list) and isinstance(result[0], list):
-        return result[0]
+    if missing:
+        computed = provider.embed_documents([texts[i] for i in missing], batch_size=batch_size)
+        for i, vector in zip(missing, computed):
+            vectors[i] = vector
+        cache.put_many(provider.model_name, [texts[i] for i in missing], computed)
 
-    return result
+    return vectors
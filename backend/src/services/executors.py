@@ -0,0 +1,44 @@
+import os
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Callable, Optional, TypeVar
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Threads available to sync work (DB, disk caches, SDKs without async APIs) called from async routes
+BLOCKING_POOL_SIZE = int(os.getenv("BLOCKING_POOL_SIZE", "32"))
+
+T = TypeVar("T")
+
+_pool: Optional[ThreadPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+
+def get_blocking_pool() -> ThreadPoolExecutor:
+    """Bounded pool shared by every `run_blocking` call in the process."""
+
+    global _pool
+
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ThreadPoolExecutor(max_workers=BLOCKING_POOL_SIZE, thread_name_prefix="blocking")
+    return _pool
+
+
+async def run_blocking(fn: Callable[..., T], *args, **kwargs) -> T:
+    """Run a sync call on the bounded pool so it never stalls the event loop."""
+
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_blocking_pool(), partial(fn, *args, **kwargs))
+
+
+def shutdown_blocking_pool():
+    global _pool
+
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
@@ -11,17 +11,19 @@ cloudinary.config(
     api_secret=os.getenv("CLOUDINARY_API_SECRET")
 )
 
-def upload_pdf_to_cloudinary(file_bytes, filename: str):
+def upload_pdf_to_cloudinary(file, name: str):
     """
     Upload a PDF to Cloudinary.
+    `file` is the PDF's bytes or a local path; `name` becomes the public id,
+    so it must be unique per content (the blob store passes the sha256).
     Returns a secure URL to store in PostgreSQL.
     """
 
     result = cloudinary.uploader.upload(
-        file_bytes,
+        file,
         resource_type="raw",  # required for PDFs
-        public_id=f"research_assistant/pdfs/{filename}",
-        overwrite=True
+        public_id=f"research_assistant/pdfs/{name}.pdf",
+        overwrite=False  # same name means same bytes, so an existing copy is kept
     )
 
-    return result.get("secure_url")
\ No newline at end of file
+    return result.get("secure_url")
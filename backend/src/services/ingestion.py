@@ -0,0 +1,95 @@
+from src.config.db import SessionLocal
+from src.models.pdf_model import PDF
+from src.services.embedding_batcher import get_embedding_batcher
+from src.services.blob_store import get_blob_store
+from src.services.job_queue import IngestionJob, JobReporter, get_job_queue
+from src.services.loader import DocumentLoader
+from src.services.splitter import DocumentSplitter
+from src.services.vector_store import VectorStore
+
+
+def _set_namespace_status(namespace: str, status: str, **fields):
+    """
+    Update every PDF record sharing `namespace` (duplicate uploads follow the original).
+
+    The namespace's rows are locked before the UPDATE. A duplicate upload
+    copies the status while holding a lock on one of them (see
+    `PDFService.find_by_hash`), so either its row is committed before the
+    UPDATE runs and gets updated too, or it waits and copies the new
+    status. Without the lock, a duplicate committed mid-UPDATE could stay
+    "pending" forever.
+    """
+
+    db = SessionLocal()
+    try:
+        db.query(PDF.id)\
+          .filter(PDF.vector_namespace == namespace)\
+          .with_for_update()\
+          .all()
+
+        db.query(PDF)\
+          .filter(PDF.vector_namespace == namespace)\
+          .update({PDF.ingest_status: status, **fields}, synchronize_session=False)
+        db.commit()
+    finally:
+        db.close()
+
+
+def ingest_pdf(report: JobReporter, namespace: str, file_name: str, content_hash: str):
+    """
+    Full ingestion pipeline for one PDF, run on a queue worker:
+    local blob read → lazy page load → incremental split → batched
+    embed + upsert → mark ready. Pages stream through the pipeline, so
+    memory stays bounded regardless of page count. Embeddings go through
+    the shared batcher, so documents ingested side by side fill each
+    other's batches. The remote copy is uploaded separately by the blob
+    store, which sets `file_url` once it lands.
+    """
+
+    _set_namespace_status(namespace, "processing")
+
+    try:
+        # 1️⃣ Bytes come from the local blob store (re-fetched if evicted)
+        report.stage("loading")
+        file_bytes = get_blob_store().get(content_hash)
+        if file_bytes is None:
+            raise FileNotFoundError(f"PDF blob {content_hash} is not stored")
+
+        # 2️⃣ Parse → split → embed → upsert, page by page, straight from the bytes
+        report.stage("indexing")
+        loader = DocumentLoader(file_bytes=file_bytes, source=file_name)
+
+        def pages():
+            for page in loader.lazy_load():
+                report.progress(pages_parsed=page.metadata["page"] + 1, pages_total=page.metadata["total_pages"])
+                yield page
+
+        chunks = DocumentSplitter().iter_split(pages())
+
+        vector_store = VectorStore(namespace)
+        vector_store.add_embeddings(
+            chunks,
+            on_progress=lambda done: report.progress(chunks_indexed=done),
+            embed=get_embedding_batcher().embed,
+        )
+
+        _set_namespace_status(namespace, "ready")
+
+    except Exception:
+        _set_namespace_status(namespace, "failed")
+        raise
+
+
+def enqueue_ingestion(job: IngestionJob, file_bytes: bytes) -> IngestionJob:
+    """
+    Store the PDF in the local blob store (which queues its remote upload)
+    and queue it for background ingestion; returns the job record. Queued
+    jobs hold only the content hash, not the bytes.
+    """
+
+    content_hash = get_blob_store().put(file_bytes)
+
+    return get_job_queue().enqueue(
+        job,
+        lambda report: ingest_pdf(report, job.namespace, job.file_name, content_hash),
+    )
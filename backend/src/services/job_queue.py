@@ -0,0 +1,192 @@
+import os
+import time
+import uuid
+import threading
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field, asdict
+from typing import Callable, Dict, List, Optional
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# "inprocess" is the only bundled backend; others register via register_job_backend
+INGEST_QUEUE_BACKEND = os.getenv("INGEST_QUEUE_BACKEND", "inprocess")
+INGEST_WORKERS = int(os.getenv("INGEST_WORKERS", "2"))
+
+# Finished jobs are kept this long so clients can read the final status
+JOB_RETENTION_SECONDS = int(os.getenv("INGEST_JOB_RETENTION_SECONDS", "3600"))
+
+
+@dataclass
+class IngestionJob:
+    """Progress record for one PDF ingestion."""
+
+    id: str
+    pdf_id: str
+    namespace: str
+    file_name: str
+    status: str = "queued"          # queued | running | done | failed
+    stage: str = "queued"           # current pipeline stage
+    stages: List[dict] = field(default_factory=list)
+    progress: Dict[str, int] = field(default_factory=dict)
+    error: Optional[str] = None
+    created_at: float = field(default_factory=time.time)
+    updated_at: float = field(default_factory=time.time)
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+
+class JobReporter:
+    """Handle passed to job functions for reporting stage and progress."""
+
+    def __init__(self, backend: "JobBackend", job_id: str):
+        self.backend = backend
+        self.job_id = job_id
+
+    def stage(self, name: str):
+        self.backend.update(self.job_id, stage=name)
+
+    def progress(self, **counters: int):
+        self.backend.update(self.job_id, progress=counters)
+
+
+class JobBackend:
+    """
+    Queue + status store for ingestion jobs.
+    Swap in a shared implementation (e.g. Redis-backed) to scale workers out.
+    """
+
+    def enqueue(self, job: IngestionJob, fn: Callable[[JobReporter], None]) -> IngestionJob:
+        raise NotImplementedError
+
+    def get(self, job_id: str) -> Optional[IngestionJob]:
+        raise NotImplementedError
+
+    def update(self, job_id: str, stage: Optional[str] = None, progress: Optional[dict] = None):
+        raise NotImplementedError
+
+    def find_active(self, namespace: str) -> Optional[IngestionJob]:
+        raise NotImplementedError
+
+    def shutdown(self):
+        pass
+
+
+class InProcessJobBackend(JobBackend):
+    """Runs jobs on a local thread pool and keeps their status in memory."""
+
+    def __init__(self, workers: int = INGEST_WORKERS):
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="ingest")
+        self._jobs: Dict[str, IngestionJob] = {}
+        self._lock = threading.Lock()
+
+    def enqueue(self, job: IngestionJob, fn: Callable[[JobReporter], None]) -> IngestionJob:
+        with self._lock:
+            self._prune()
+            job.stages.append({"stage": job.stage, "started_at": job.created_at})
+            self._jobs[job.id] = job
+
+        self._pool.submit(self._run, job.id, fn)
+        return job
+
+    def get(self, job_id: str) -> Optional[IngestionJob]:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return IngestionJob(**job.to_dict()) if job else None
+
+    def update(self, job_id: str, stage: Optional[str] = None, progress: Optional[dict] = None):
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if not job:
+                return
+
+            now = time.time()
+            if stage and stage != job.stage:
+                if job.stages:
+                    job.stages[-1]["finished_at"] = now
+                job.stages.append({"stage": stage, "started_at": now})
+                job.stage = stage
+            if progress:
+                job.progress.update(progress)
+            job.updated_at = now
+
+    def find_active(self, namespace: str) -> Optional[IngestionJob]:
+        with self._lock:
+            for job in self._jobs.values():
+                if job.namespace == namespace and job.status in ("queued", "running"):
+                    return IngestionJob(**job.to_dict())
+        return None
+
+    def shutdown(self):
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+    def _run(self, job_id: str, fn: Callable[[JobReporter], None]):
+        self._set_status(job_id, "running")
+
+        try:
+            fn(JobReporter(self, job_id))
+            self.update(job_id, stage="done")
+            self._set_status(job_id, "done")
+        except Exception as e:
+            traceback.print_exc()
+            self.update(job_id, stage="failed")
+            self._set_status(job_id, "failed", error=str(e))
+
+    def _set_status(self, job_id: str, status: str, error: Optional[str] = None):
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job:
+                job.status = status
+                job.error = error
+                job.updated_at = time.time()
+
+    def _prune(self):
+        cutoff = time.time() - JOB_RETENTION_SECONDS
+        expired = [
+            job_id for job_id, job in self._jobs.items()
+            if job.status in ("done", "failed") and job.updated_at < cutoff
+        ]
+        for job_id in expired:
+            del self._jobs[job_id]
+
+
+_backend_factories: Dict[str, Callable[[], JobBackend]] = {
+    "inprocess": InProcessJobBackend,
+}
+
+_queue: Optional[JobBackend] = None
+_queue_lock = threading.Lock()
+
+
+def register_job_backend(name: str, factory: Callable[[], JobBackend]):
+    """Make an additional queue backend selectable via INGEST_QUEUE_BACKEND."""
+    _backend_factories[name] = factory
+
+
+def get_job_queue() -> JobBackend:
+    """Return the process-wide ingestion job queue."""
+
+    global _queue
+
+    if _queue is None:
+        with _queue_lock:
+            if _queue is None:
+                if INGEST_QUEUE_BACKEND not in _backend_factories:
+                    raise ValueError(f"Unknown INGEST_QUEUE_BACKEND '{INGEST_QUEUE_BACKEND}'")
+                _queue = _backend_factories[INGEST_QUEUE_BACKEND]()
+
+    return _queue
+
+
+def new_job(pdf_id: str, namespace: str, file_name: str) -> IngestionJob:
+    return IngestionJob(id=str(uuid.uuid4()), pdf_id=pdf_id, namespace=namespace, file_name=file_name)
+
+
+def shutdown_job_queue():
+    global _queue
+
+    if _queue is not None:
+        _queue.shutdown()
+        _queue = None
@@ -0,0 +1,271 @@
+import os
+import asyncio
+import threading
+from collections import deque
+from contextlib import asynccontextmanager, contextmanager
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+from dotenv import load_dotenv
+
+load_dotenv()
+
+HUGGINGFACE_API_KEY = os.getenv("HUGGINGFACE_API_KEY")
+LLM_MODEL_ID = os.getenv("LLM_MODEL_ID", "deepseek-ai/DeepSeek-V3.2-Exp")
+
+# Requests allowed in flight per upstream model; a burst beyond this queues
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "8"))
+# Per-model overrides, e.g. "deepseek-ai/DeepSeek-V3.2-Exp=4,meta-llama/Llama-3.1-8B-Instruct=16"
+LLM_CONCURRENCY_LIMITS = os.getenv("LLM_CONCURRENCY_LIMITS", "")
+# How long a queued request waits for a slot before failing
+LLM_QUEUE_TIMEOUT_SECONDS = float(os.getenv("LLM_QUEUE_TIMEOUT_SECONDS", "120"))
+
+
+class LLMBusyError(TimeoutError):
+    """No concurrency slot for the upstream model freed up within the queue timeout."""
+
+
+@dataclass(frozen=True)
+class LLMConfig:
+    """One model configuration; each distinct config gets one shared client."""
+
+    repo_id: str = LLM_MODEL_ID
+    task: str = "conversational"
+    max_new_tokens: Optional[int] = None
+    temperature: Optional[float] = None
+    top_p: Optional[float] = None
+
+
+# PDF chat (RAG answers)
+RAG_LLM_CONFIG = LLMConfig(task="conversational", max_new_tokens=1500, temperature=0.7, top_p=0.9)
+# Research agent (tool calling + final answer)
+AGENT_LLM_CONFIG = LLMConfig(task="text-generation")
+
+
+# ----------------------------------------------------------------------
+#                           CONCURRENCY GATE
+# ----------------------------------------------------------------------
+
+class ConcurrencyGate:
+    """
+    FIFO concurrency limit shared by sync callers (worker threads) and
+    async callers (the event loop). Async waiters await a future instead
+    of parking a thread, so a queued burst costs no threads.
+    """
+
+    def __init__(self, name: str, limit: int):
+        self.name = name
+        self.limit = max(1, limit)
+        self._active = 0
+        self._waiters: deque = deque()
+        self._lock = threading.Lock()
+
+    def _try_acquire(self) -> bool:
+        """Take a slot if one is free and nobody is queued; caller holds the lock."""
+        if self._active < self.limit and not self._waiters:
+            self._active += 1
+            return True
+        return False
+
+    def _busy(self, timeout: float) -> LLMBusyError:
+        return LLMBusyError(f"LLM '{self.name}' is busy: no slot within {timeout:g}s ({self.limit} in flight)")
+
+    def acquire(self, timeout: float = LLM_QUEUE_TIMEOUT_SECONDS):
+        with self._lock:
+            if self._try_acquire():
+                return
+            granted = threading.Event()
+            waiter = ("sync", granted)
+            self._waiters.append(waiter)
+
+        if granted.wait(timeout):
+            return
+
+        with self._lock:
+            if waiter in self._waiters:
+                self._waiters.remove(waiter)
+                raise self._busy(timeout)
+        # Granted between the timeout and taking the lock: we hold the slot
+
+    async def aacquire(self, timeout: float = LLM_QUEUE_TIMEOUT_SECONDS):
+        loop = asyncio.get_running_loop()
+
+        with self._lock:
+            if self._try_acquire():
+                return
+            granted = loop.create_future()
+            waiter = ("async", (loop, granted))
+            self._waiters.append(waiter)
+
+        try:
+            await asyncio.wait_for(asyncio.shield(granted), timeout)
+        except (asyncio.TimeoutError, asyncio.CancelledError) as e:
+            with self._lock:
+                queued = waiter in self._waiters
+                if queued:
+                    self._waiters.remove(waiter)
+
+            if not queued:
+                # The slot was handed over as we gave up; pass it on
+                self.release()
+
+            if isinstance(e, asyncio.TimeoutError):
+                raise self._busy(timeout) from None
+            raise
+
+    def release(self):
+        with self._lock:
+            if self._waiters:
+                # Hand the slot straight to the next waiter; _active is unchanged
+                kind, waiter = self._waiters.popleft()
+                if kind == "sync":
+                    waiter.set()
+                else:
+                    loop, future = waiter
+                    loop.call_soon_threadsafe(lambda: future.done() or future.set_result(True))
+                return
+            self._active -= 1
+
+    @contextmanager
+    def hold(self, timeout: float = LLM_QUEUE_TIMEOUT_SECONDS):
+        self.acquire(timeout)
+        try:
+            yield
+        finally:
+            self.release()
+
+    @asynccontextmanager
+    async def ahold(self, timeout: float = LLM_QUEUE_TIMEOUT_SECONDS):
+        await self.aacquire(timeout)
+        try:
+            yield
+        finally:
+            self.release()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"limit": self.limit, "active": self._active, "queued": len(self._waiters)}
+
+
+# ----------------------------------------------------------------------
+#                           SHARED CLIENTS
+# ----------------------------------------------------------------------
+
+class GatedModel:
+    """A chat model (or tool-bound runnable) whose calls go through its upstream model's gate."""
+
+    def __init__(self, runnable, gate: ConcurrencyGate):
+        self.runnable = runnable
+        self.gate = gate
+
+    def invoke(self, input: Any, **kwargs):
+        with self.gate.hold():
+            return self.runnable.invoke(input, **kwargs)
+
+    async def ainvoke(self, input: Any, **kwargs):
+        async with self.gate.ahold():
+            return await self.runnable.ainvoke(input, **kwargs)
+
+    def stream(self, input: Any, **kwargs):
+        with self.gate.hold():
+            yield from self.runnable.stream(input, **kwargs)
+
+    async def astream(self, input: Any, **kwargs):
+        async with self.gate.ahold():
+            async for chunk in self.runnable.astream(input, **kwargs):
+                yield chunk
+
+
+class LLMClient(GatedModel):
+    """
+    Process-wide client for one LLMConfig. Holds no conversation state,
+    so every request can share it; tool-bound variants are cached too.
+    """
+
+    def __init__(self, config: LLMConfig, gate: ConcurrencyGate):
+        from langchain_huggingface import HuggingFaceEndpoint, ChatHuggingFace
+
+        params = {
+            key: value
+            for key, value in (
+                ("max_new_tokens", config.max_new_tokens),
+                ("temperature", config.temperature),
+                ("top_p", config.top_p),
+            )
+            if value is not None
+        }
+
+        llm = HuggingFaceEndpoint(
+            repo_id=config.repo_id,
+            task=config.task,
+            huggingfacehub_api_token=HUGGINGFACE_API_KEY,
+            **params,
+        )
+
+        super().__init__(ChatHuggingFace(llm=llm), gate)
+        self.config = config
+        self._bound: Dict[Tuple[str, ...], GatedModel] = {}
+        self._bound_lock = threading.Lock()
+
+    @property
+    def chat_model(self):
+        return self.runnable
+
+    def bind_tools(self, tools: List[Any]) -> GatedModel:
+        key = tuple(tool.name for tool in tools)
+
+        with self._bound_lock:
+            if key not in self._bound:
+                self._bound[key] = GatedModel(self.runnable.bind_tools(tools=tools), self.gate)
+            return self._bound[key]
+
+
+def _parse_limits(spec: str) -> Dict[str, int]:
+    limits = {}
+    for item in filter(None, (part.strip() for part in spec.split(","))):
+        repo_id, _, limit = item.rpartition("=")
+        limits[repo_id.strip()] = int(limit)
+    return limits
+
+
+_clients: Dict[LLMConfig, LLMClient] = {}
+_gates: Dict[str, ConcurrencyGate] = {}
+_registry_lock = threading.Lock()
+_limits = _parse_limits(LLM_CONCURRENCY_LIMITS)
+
+
+def get_model_gate(repo_id: str) -> ConcurrencyGate:
+    """One gate per upstream model, shared by every config that calls it."""
+
+    with _registry_lock:
+        if repo_id not in _gates:
+            _gates[repo_id] = ConcurrencyGate(repo_id, _limits.get(repo_id, LLM_MAX_CONCURRENCY))
+        return _gates[repo_id]
+
+
+def get_llm_client(config: LLMConfig = RAG_LLM_CONFIG) -> LLMClient:
+    """Return the shared client for `config`, creating it on first use."""
+
+    client = _clients.get(config)
+    if client is not None:
+        return client
+
+    gate = get_model_gate(config.repo_id)
+
+    with _registry_lock:
+        if config not in _clients:
+            _clients[config] = LLMClient(config, gate)
+            print(f"[LLMClients] Created client for {config.repo_id} ({config.task})")
+        return _clients[config]
+
+
+def init_llm_clients() -> List[LLMClient]:
+    """Build the app's model configurations at startup so requests never construct one."""
+    return [get_llm_client(RAG_LLM_CONFIG), get_llm_client(AGENT_LLM_CONFIG)]
+
+
+def llm_client_stats() -> dict:
+    with _registry_lock:
+        return {
+            "clients": [f"{config.repo_id} ({config.task})" for config in _clients],
+            "models": {repo_id: gate.stats() for repo_id, gate in _gates.items()},
+        }
@@ -1,8 +1,8 @@
-from langchain_huggingface import HuggingFaceEndpoint, ChatHuggingFace
 from langchain_core.messages import HumanMessage, AIMessage, SystemMessage
 from langchain_community.chat_message_histories import ChatMessageHistory
+from src.services.llm_clients import RAG_LLM_CONFIG, get_llm_client
+from src.services.prompt_budget import PromptBudget, summary_message
 from src.services.vector_store import VectorStore
-import os
 
 class LLMModel:
     """
@@ -11,6 +11,9 @@ class LLMModel:
     - Prompt assembly (context + history)
     - Streaming compatibility
     - Chat history storage
+
+    The model client is shared process-wide (see llm_clients); each
+    instance only carries its own conversation state.
     """
 
     def __init__(self, pdf_id: str = None):
@@ -20,48 +23,61 @@ class LLMModel:
         self.pdf_id = pdf_id
         print(f"[LLMModel] Loaded for PDF: {pdf_id}")
 
-        # Load HuggingFace LLM model
-        llm = HuggingFaceEndpoint(
-            repo_id="deepseek-ai/DeepSeek-V3.2-Exp",
-            huggingfacehub_api_token=os.getenv("HUGGINGFACE_API_KEY"),
-            task="conversational",
-            max_new_tokens=1500,
-            temperature=0.7,
-            top_p=0.9,
-        )
-
-        self.model = ChatHuggingFace(llm=llm)
+        # Shared HuggingFace chat client, gated per upstream model
+        self.model = get_llm_client(RAG_LLM_CONFIG)
         self.chat_history = ChatMessageHistory()
 
 
-    def build_rag_prompt(self, question: str, context_chunks: list):
+    def build_rag_prompt(self, question: str, context_chunks: list, summary: str = None):
         """
-        Build final message list: system + context + history + question
+        Build final message list: system + context + history + question,
+        within PROMPT_TOKEN_BUDGET. The best-ranked chunks that fit the
+        context share are kept; history keeps the most recent turns that
+        fit, with older turns represented by `summary` when given.
         """
 
+        budget = PromptBudget()
         messages = []
 
         # SYSTEM INSTRUCTIONS
         if context_chunks:
+            # Chunks tagged with a file_name come from a multi-PDF search
+            multi_document = any(chunk.metadata.get("file_name") for chunk in context_chunks)
+
             system = SystemMessage(
                 content=(
                     "You are a research assistant. Answer ONLY using the "
-                    "context provided from the PDF. Follow these rules:\n"
+                    f"context provided from the {'PDFs' if multi_document else 'PDF'}. Follow these rules:\n"
                     "1. Use ONLY the text chunks as your knowledge source.\n"
                     "2. If the answer is not in chunks, reply:\n"
-                    "\"This information is not available in the uploaded document.\"\n"
+                    f"\"This information is not available in the uploaded {'documents' if multi_document else 'document'}.\"\n"
                     "3. Do NOT use general knowledge.\n"
-                    "4. Cite chunk numbers.\n"
+                    + (
+                        "4. Cite chunk numbers and document names, e.g. [Chunk 2 | paper.pdf].\n"
+                        if multi_document else
+                        "4. Cite chunk numbers.\n"
+                    )
                 )
             )
 
             messages.append(system)
 
-            # Build combined context message
+            # Build combined context message from the chunks that fit the budget
+            texts = [chunk.page_content or chunk.metadata.get("text", "") for chunk in context_chunks]
+            kept = budget.fit_chunks(texts)
+            if kept < len(context_chunks):
+                print(f"[LLMModel] Context budget fits {kept}/{len(context_chunks)} chunks.")
+
             combined_context = ""
-            for i, chunk in enumerate(context_chunks):
-                if "text" in chunk.metadata:
-                    combined_context += f"\n\n[Chunk {i+1}]\n{chunk.metadata['text']}"
+            for i, (chunk, text) in enumerate(zip(context_chunks[:kept], texts)):
+                if not text:
+                    continue
+
+                label = f"Chunk {i+1}"
+                if chunk.metadata.get("file_name"):
+                    label += f" | {chunk.metadata['file_name']}"
+
+                combined_context += f"\n\n[{label}]\n{text}"
 
             messages.append(
                 HumanMessage(
@@ -79,12 +95,16 @@ class LLMModel:
                 )
             )
 
-        # Add past conversation
-        for msg in self.chat_history.messages:
-            messages.append(msg)
+        if summary:
+            messages.append(summary_message(summary))
+
+        # Add past conversation: the most recent turns that fit beside the rest
+        question_message = HumanMessage(content=question)
+        _, recent = budget.window_history(self.chat_history.messages, fixed=messages + [question_message])
+        messages.extend(recent)
 
         # Add new question
-        messages.append(HumanMessage(content=question))
+        messages.append(question_message)
         self.add_HumanMessage(question)
 
         print(f"[LLMModel] Prompt built with {len(messages)} messages.")
@@ -111,6 +131,27 @@ class LLMModel:
                 print(f"[LLMModel] Retrieval error: {str(e)}")
 
         return self.build_rag_prompt(question, context_chunks)
+
+    async def aprompt(self, question: str, pdf_id: str = None):
+        """
+        Async `prompt` for streaming routes: retrieval awaits the async
+        embedding and vector clients instead of blocking the event loop.
+        """
+
+        current_pdf_id = pdf_id or self.pdf_id
+        print(f"[LLMModel] RAG prompt for PDF: {current_pdf_id}")
+
+        context_chunks = []
+
+        if current_pdf_id:
+            try:
+                vector_store = VectorStore(pdf_id=current_pdf_id)
+                context_chunks = await vector_store.asearch(question)
+                print(f"[LLMModel] Retrieved {len(context_chunks)} context chunks.")
+            except Exception as e:
+                print(f"[LLMModel] Retrieval error: {str(e)}")
+
+        return self.build_rag_prompt(question, context_chunks)
     
     def add_HumanMessage(self, content: str):
         self.chat_history.add_message(HumanMessage(content=content))
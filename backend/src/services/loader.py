@@ -1,13 +1,153 @@
-from langchain_community.document_loaders import PyMuPDFLoader
+import os
+import threading
+import multiprocessing
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from typing import Iterator, List, Optional, Tuple
+import pymupdf
+from langchain_core.documents import Document
+
+# Documents with at least this many pages are extracted across worker processes
+PARALLEL_PAGE_THRESHOLD = int(os.getenv("PDF_PARALLEL_PAGE_THRESHOLD", "200"))
+PDF_EXTRACT_WORKERS = int(os.getenv("PDF_EXTRACT_WORKERS", str(os.cpu_count() or 1)))
+PAGES_PER_SHARD = int(os.getenv("PDF_PAGES_PER_SHARD", "25"))
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    """Process pool shared by all loaders (spawned: forking a threaded server is unsafe)."""
+    global _pool
+
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ProcessPoolExecutor(
+                    max_workers=PDF_EXTRACT_WORKERS,
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+    return _pool
+
+
+def shutdown_extraction_pool():
+    global _pool
+
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
+
+
+def _extract_page_range(file_path: Optional[str], shm_name: Optional[str], size: int, start: int, end: int) -> List[Tuple[int, str]]:
+    """Worker: extract text for pages [start, end). Bytes are read from shared memory."""
+
+    if shm_name is not None:
+        shm = shared_memory.SharedMemory(name=shm_name, track=False)
+        try:
+            pdf = pymupdf.open(stream=bytes(shm.buf[:size]), filetype="pdf")
+        finally:
+            shm.close()
+    else:
+        pdf = pymupdf.open(file_path)
+
+    with pdf:
+        return [(number, pdf[number].get_text()) for number in range(start, end)]
+
 
 class DocumentLoader:
-    def __init__(self, file_path: str):
+    def __init__(self, file_path: Optional[str] = None, file_bytes: Optional[bytes] = None, source: Optional[str] = None):
+        """
+        Load from a local path, or directly from in-memory bytes
+        (e.g. an upload) without writing a temp file.
+        """
+        if file_path is None and file_bytes is None:
+            raise ValueError("DocumentLoader needs a file_path or file_bytes")
+
         self.file_path = file_path
-        
-    def load(self):
-        """Load PDF document"""
+        self.file_bytes = file_bytes
+        self.source = source or file_path
+
+    def _open(self):
+        if self.file_bytes is not None:
+            return pymupdf.open(stream=self.file_bytes, filetype="pdf")
+        return pymupdf.open(self.file_path)
+
+    def lazy_load(self, parallel: Optional[bool] = None) -> Iterator[Document]:
+        """
+        Yield one Document per page, in page order.
+
+        parallel=None switches to multi-process extraction automatically
+        once the page count reaches PDF_PARALLEL_PAGE_THRESHOLD.
+        """
         try:
-            loader = PyMuPDFLoader(self.file_path)
-            return loader.load()
+            with self._open() as pdf:
+                total_pages = pdf.page_count
+                doc_metadata = {k: v for k, v in (pdf.metadata or {}).items() if v}
+
+                if parallel is None:
+                    parallel = total_pages >= PARALLEL_PAGE_THRESHOLD and PDF_EXTRACT_WORKERS > 1
+
+                if parallel:
+                    pages = self._extract_parallel(total_pages)
+                else:
+                    pages = ((page.number, page.get_text()) for page in pdf)
+
+                for number, text in pages:
+                    yield Document(
+                        page_content=text,
+                        metadata={
+                            **doc_metadata,
+                            "source": self.source,
+                            "page": number,
+                            "total_pages": total_pages,
+                        }
+                    )
         except Exception as e:
             raise Exception(f"Error loading PDF: {str(e)}")
+
+    def load(self, parallel: Optional[bool] = None) -> List[Document]:
+        """Load PDF document"""
+        return list(self.lazy_load(parallel=parallel))
+
+    def _extract_parallel(self, total_pages: int) -> Iterator[Tuple[int, str]]:
+        """
+        Fan page-range shards out across the process pool and yield pages
+        back in order. At most 2 shards per worker are in flight, so
+        memory stays bounded for very long documents.
+        """
+        pool = _get_pool()
+        shm = None
+        size = 0
+
+        if self.file_bytes is not None:
+            # Hand the bytes to workers once via shared memory instead of pickling per shard
+            size = len(self.file_bytes)
+            shm = shared_memory.SharedMemory(create=True, size=size)
+            shm.buf[:size] = self.file_bytes
+
+        try:
+            shards = [(start, min(start + PAGES_PER_SHARD, total_pages)) for start in range(0, total_pages, PAGES_PER_SHARD)]
+            in_flight = deque()
+            next_shard = 0
+
+            while next_shard < len(shards) or in_flight:
+                while next_shard < len(shards) and len(in_flight) < PDF_EXTRACT_WORKERS * 2:
+                    start, end = shards[next_shard]
+                    in_flight.append(pool.submit(
+                        _extract_page_range,
+                        None if shm else self.file_path,
+                        shm.name if shm else None,
+                        size,
+                        start,
+                        end,
+                    ))
+                    next_shard += 1
+
+                yield from in_flight.popleft().result()
+        finally:
+            for future in in_flight:
+                future.cancel()
+            if shm is not None:
+                shm.close()
+                shm.unlink()
@@ -0,0 +1,32 @@
+import json
+import base64
+from datetime import datetime
+from typing import Optional, Tuple
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+
+def encode_cursor(timestamp: datetime, row_id: int) -> str:
+    """Opaque keyset cursor pointing at one row by its (timestamp, id) sort key."""
+
+    payload = json.dumps({"t": timestamp.isoformat(), "id": row_id}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: Optional[str]) -> Optional[Tuple[datetime, int]]:
+    """Inverse of `encode_cursor`; raises ValueError on a malformed cursor."""
+
+    if not cursor:
+        return None
+
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return datetime.fromisoformat(payload["t"]), int(payload["id"])
+    except Exception:
+        raise ValueError("Invalid pagination cursor")
+
+
+def clamp_page_size(limit: int) -> int:
+    return max(1, min(limit, MAX_PAGE_SIZE))
@@ -0,0 +1,65 @@
+import hashlib
+from sqlalchemy.orm import Session
+from typing import Optional
+
+from src.models.pdf_model import PDF
+
+
+class PDFService:
+
+    @staticmethod
+    def compute_hash(file_bytes: bytes) -> str:
+        """Content hash used to detect re-uploads of the same file."""
+        return hashlib.sha256(file_bytes).hexdigest()
+
+    @staticmethod
+    def find_by_hash(
+        db: Session,
+        content_hash: str
+    ) -> Optional[PDF]:
+        """
+        Find an already-indexed (or in-progress) PDF with the same bytes,
+        from any owner. The row is locked so a concurrent delete can't
+        drop the namespace while it is being reused.
+        """
+        return db.query(PDF)\
+                 .filter(PDF.content_hash == content_hash, PDF.ingest_status != "failed")\
+                 .order_by(PDF.uploaded_at.asc())\
+                 .with_for_update()\
+                 .first()
+
+    @staticmethod
+    def namespace_ref_count(
+        db: Session,
+        vector_namespace
+    ) -> int:
+        """Number of PDF records sharing a vector namespace."""
+        return db.query(PDF)\
+                 .filter(PDF.vector_namespace == vector_namespace)\
+                 .count()
+
+    @staticmethod
+    def delete_pdf(
+        db: Session,
+        pdf: PDF
+    ) -> bool:
+        """
+        Delete a PDF record and release its reference on the vector namespace.
+        Returns True when this was the last owner, i.e. the caller should
+        delete the namespace's vectors.
+        """
+        namespace = pdf.vector_namespace
+
+        # Serialize with uploads that are about to reuse this namespace
+        db.query(PDF)\
+          .filter(PDF.vector_namespace == namespace)\
+          .with_for_update()\
+          .all()
+
+        db.delete(pdf)
+        db.flush()
+
+        remaining = PDFService.namespace_ref_count(db, namespace)
+        db.commit()
+
+        return remaining == 0
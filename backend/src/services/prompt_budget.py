@@ -0,0 +1,123 @@
+import os
+import threading
+from typing import List, Optional, Sequence, Tuple
+from langchain_core.messages import BaseMessage, SystemMessage
+from dotenv import load_dotenv
+
+from src.services.llm_clients import LLM_MODEL_ID
+
+load_dotenv()
+
+# Upper bound on prompt tokens sent to the model (system + context + history + question)
+PROMPT_TOKEN_BUDGET = int(os.getenv("PROMPT_TOKEN_BUDGET", "8000"))
+# Largest share of the budget retrieved context / tool output may take
+PROMPT_CONTEXT_SHARE = float(os.getenv("PROMPT_CONTEXT_SHARE", "0.5"))
+# Tokenizer used for counting; defaults to the chat model's own
+PROMPT_TOKENIZER = os.getenv("PROMPT_TOKENIZER", LLM_MODEL_ID)
+
+# Per-message framing the chat template adds around each message's content
+MESSAGE_OVERHEAD_TOKENS = 4
+# Rough chars-per-token used when the tokenizer can't be loaded
+FALLBACK_CHARS_PER_TOKEN = 4
+
+_tokenizer = None
+_tokenizer_loaded = False
+_tokenizer_lock = threading.Lock()
+
+
+def get_tokenizer():
+    """The model's tokenizer, loaded once per process; None if unavailable (offline, gated)."""
+
+    global _tokenizer, _tokenizer_loaded
+
+    if not _tokenizer_loaded:
+        with _tokenizer_lock:
+            if not _tokenizer_loaded:
+                try:
+                    from tokenizers import Tokenizer
+                    _tokenizer = Tokenizer.from_pretrained(PROMPT_TOKENIZER, token=os.getenv("HUGGINGFACE_API_KEY"))
+                    print(f"[PromptBudget] Loaded tokenizer for {PROMPT_TOKENIZER}")
+                except Exception as e:
+                    print(f"[PromptBudget] Tokenizer unavailable ({str(e)}), estimating tokens from length")
+                _tokenizer_loaded = True
+
+    return _tokenizer
+
+
+def count_tokens(text: str) -> int:
+    if not text:
+        return 0
+
+    tokenizer = get_tokenizer()
+    if tokenizer is None:
+        return -(-len(text) // FALLBACK_CHARS_PER_TOKEN)
+    return len(tokenizer.encode(text, add_special_tokens=False).ids)
+
+
+def message_tokens(message: BaseMessage) -> int:
+    content = message.content if isinstance(message.content, str) else str(message.content)
+    return count_tokens(content) + MESSAGE_OVERHEAD_TOKENS
+
+
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+    """Cut `text` to at most `max_tokens` tokens (on a token boundary)."""
+
+    if max_tokens <= 0:
+        return ""
+
+    tokenizer = get_tokenizer()
+    if tokenizer is None:
+        limit = max_tokens * FALLBACK_CHARS_PER_TOKEN
+        return text if len(text) <= limit else text[:limit] + " …"
+
+    encoding = tokenizer.encode(text, add_special_tokens=False)
+    if len(encoding.ids) <= max_tokens:
+        return text
+    return text[:encoding.offsets[max_tokens - 1][1]] + " …"
+
+
+def summary_message(summary: str) -> SystemMessage:
+    return SystemMessage(f"Summary of the earlier conversation:\n{summary}")
+
+
+class PromptBudget:
+    """
+    Splits PROMPT_TOKEN_BUDGET between fixed messages (system prompt,
+    question), retrieved context and conversation history.
+
+    History is windowed newest-first: the most recent turns are kept
+    verbatim while they fit, and everything older is returned so the
+    caller can fold it into a rolling summary.
+    """
+
+    def __init__(self, max_tokens: int = PROMPT_TOKEN_BUDGET, context_share: float = PROMPT_CONTEXT_SHARE):
+        self.max_tokens = max_tokens
+        self.context_tokens = int(max_tokens * context_share)
+
+    def fit_chunks(self, texts: Sequence[str], max_tokens: Optional[int] = None) -> int:
+        """How many of the leading (best-ranked) texts fit in the context budget."""
+
+        remaining = self.context_tokens if max_tokens is None else max_tokens
+        for i, text in enumerate(texts):
+            remaining -= count_tokens(text) + MESSAGE_OVERHEAD_TOKENS
+            if remaining < 0:
+                return i
+        return len(texts)
+
+    def window_history(self, history: Sequence[BaseMessage], fixed: Sequence[BaseMessage]) -> Tuple[List[BaseMessage], List[BaseMessage]]:
+        """
+        Split `history` into (older, recent): `recent` is the longest
+        newest-first run that fits beside `fixed`; `older` is the rest.
+        """
+
+        remaining = self.max_tokens - sum(message_tokens(m) for m in fixed)
+        start = len(history)
+
+        while start > 0:
+            cost = message_tokens(history[start - 1])
+            if cost > remaining:
+                break
+            remaining -= cost
+            start -= 1
+
+        return list(history[:start]), list(history[start:])
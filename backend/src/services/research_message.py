@@ -1,7 +1,10 @@
+from datetime import datetime
+from sqlalchemy import literal, tuple_
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional, Tuple
 
 from src.models.research_message import ResearchMessage
+from src.services.pagination import encode_cursor
 
 
 class ResearchMessageService:
@@ -33,6 +36,69 @@ class ResearchMessageService:
                  .order_by(ResearchMessage.timestamp.asc())\
                  .all()
 
+    @staticmethod
+    def get_page(
+        db: Session,
+        session_id: int,
+        limit: int,
+        before: Optional[Tuple[datetime, int]] = None
+    ) -> Tuple[List[ResearchMessage], Optional[str]]:
+        """
+        One keyset page of messages older than the `before` cursor
+        (newest page when None), returned oldest-first, plus the cursor
+        for the next older page (None when this is the oldest).
+        """
+        query = db.query(ResearchMessage)\
+                  .filter(ResearchMessage.session_id == session_id)
+
+        if before is not None:
+            # Bind the cursor with the column types so the row comparison isn't done on strings
+            query = query.filter(
+                tuple_(ResearchMessage.timestamp, ResearchMessage.id)
+                < tuple_(literal(before[0], ResearchMessage.timestamp.type), literal(before[1]))
+            )
+
+        rows = query.order_by(ResearchMessage.timestamp.desc(), ResearchMessage.id.desc())\
+                    .limit(limit + 1)\
+                    .all()
+
+        next_cursor = encode_cursor(rows[limit - 1].timestamp, rows[limit - 1].id) if len(rows) > limit else None
+        return list(reversed(rows[:limit])), next_cursor
+
+    @staticmethod
+    def get_recent(
+        db: Session,
+        session_id: int,
+        limit: int,
+        after_id: int = 0
+    ) -> List[ResearchMessage]:
+        """The newest `limit` messages with id > after_id, oldest-first (the agent's tail window)."""
+        rows = db.query(ResearchMessage)\
+                 .filter(ResearchMessage.session_id == session_id, ResearchMessage.id > after_id)\
+                 .order_by(ResearchMessage.id.desc())\
+                 .limit(limit)\
+                 .all()
+        return list(reversed(rows))
+
+    @staticmethod
+    def get_range(
+        db: Session,
+        session_id: int,
+        after_id: int,
+        until_id: int,
+        limit: int
+    ) -> List[ResearchMessage]:
+        """Up to `limit` messages with after_id < id <= until_id, oldest-first."""
+        return db.query(ResearchMessage)\
+                 .filter(
+                     ResearchMessage.session_id == session_id,
+                     ResearchMessage.id > after_id,
+                     ResearchMessage.id <= until_id,
+                 )\
+                 .order_by(ResearchMessage.id.asc())\
+                 .limit(limit)\
+                 .all()
+
     @staticmethod
     def delete_messages(
         db: Session,
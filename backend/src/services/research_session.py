@@ -49,6 +49,20 @@ class ResearchSessionService:
             session.title = new_title
             db.commit()
 
+    @staticmethod
+    def update_summary(
+        db: Session,
+        session_id: int,
+        summary: str,
+        summarized_until: int
+    ):
+        session = db.query(ResearchSession).filter_by(id=session_id).first()
+        # Never move the summary backwards if a newer refresh already landed
+        if session and (session.summarized_until or 0) < summarized_until:
+            session.summary = summary
+            session.summarized_until = summarized_until
+            db.commit()
+
     @staticmethod
     def delete_session(
         db: Session,
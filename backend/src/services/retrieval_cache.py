@@ -0,0 +1,205 @@
+import os
+import time
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional, Set, Tuple
+import numpy as np
+from dotenv import load_dotenv
+
+from src.services.embedding_cache import normalize_text
+
+load_dotenv()
+
+RETRIEVAL_CACHE_ENABLED = os.getenv("RETRIEVAL_CACHE_ENABLED", "true").lower() == "true"
+RETRIEVAL_CACHE_MAX_ENTRIES = int(os.getenv("RETRIEVAL_CACHE_MAX_ENTRIES", "4096"))
+RETRIEVAL_CACHE_TTL_SECONDS = float(os.getenv("RETRIEVAL_CACHE_TTL_SECONDS", "900"))
+# Cosine similarity above which a different phrasing reuses cached results; unset = exact only
+RETRIEVAL_CACHE_SEMANTIC_THRESHOLD = os.getenv("RETRIEVAL_CACHE_SEMANTIC_THRESHOLD")
+
+CacheKey = Tuple[str, str, int, str]
+
+
+class _Entry:
+    def __init__(self, matches: List[dict], expires_at: float, embedding: Optional[np.ndarray]):
+        self.matches = matches
+        self.expires_at = expires_at
+        self.embedding = embedding
+
+
+class RetrievalCache:
+    """
+    Cache of retrieval results keyed by (namespace, normalized query, top_k,
+    retrieval mode).
+
+    Entries hold the matched chunk ids, scores and metadata (chunk text),
+    expire after `ttl_seconds`, and are evicted least-recently-used past
+    `max_entries`. Any write or delete on a namespace invalidates all its
+    entries.
+
+    With `semantic_threshold` set, a query whose embedding is within that
+    cosine similarity of a cached query (same namespace, top_k and mode) reuses
+    the cached results.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = RETRIEVAL_CACHE_MAX_ENTRIES,
+        ttl_seconds: float = RETRIEVAL_CACHE_TTL_SECONDS,
+        semantic_threshold: Optional[float] = None,
+    ):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.semantic_threshold = semantic_threshold
+
+        self._entries: "OrderedDict[CacheKey, _Entry]" = OrderedDict()
+        self._by_namespace: Dict[str, Set[CacheKey]] = {}
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.semantic_hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    @staticmethod
+    def make_key(namespace: str, query: str, top_k: int, mode: str = "dense") -> CacheKey:
+        return (namespace, normalize_text(query).lower(), top_k, mode)
+
+    @staticmethod
+    def _unit(embedding: List[float]) -> np.ndarray:
+        vector = np.asarray(embedding, dtype=np.float32)
+        return vector / (np.linalg.norm(vector) or 1.0)
+
+    # ----------------------------------------------------------------------
+    #                           LOOKUP
+    # ----------------------------------------------------------------------
+
+    def get(self, namespace: str, query: str, top_k: int, mode: str = "dense") -> Optional[List[dict]]:
+        """Exact lookup by normalized query text (no embedding needed)."""
+
+        key = self.make_key(namespace, query, top_k, mode)
+        now = time.time()
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry.expires_at < now:
+                self._remove(key)
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry.matches
+
+    def get_similar(self, namespace: str, top_k: int, query_embedding: List[float], mode: str = "dense") -> Optional[List[dict]]:
+        """Semantic lookup: reuse results of the most similar cached query above the threshold."""
+
+        if self.semantic_threshold is None:
+            self._count_miss()
+            return None
+
+        q = self._unit(query_embedding)
+        now = time.time()
+        best_key, best_score = None, self.semantic_threshold
+
+        with self._lock:
+            for key in self._by_namespace.get(namespace, ()):
+                entry = self._entries[key]
+                if key[2] != top_k or key[3] != mode or entry.embedding is None or entry.expires_at < now:
+                    continue
+                score = float(entry.embedding @ q)
+                if score >= best_score:
+                    best_key, best_score = key, score
+
+            if best_key is None:
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(best_key)
+            self.semantic_hits += 1
+            return self._entries[best_key].matches
+
+    def _count_miss(self):
+        with self._lock:
+            self.misses += 1
+
+    # ----------------------------------------------------------------------
+    #                           STORE / INVALIDATE
+    # ----------------------------------------------------------------------
+
+    def put(
+        self,
+        namespace: str,
+        query: str,
+        top_k: int,
+        matches: List[dict],
+        query_embedding: Optional[List[float]] = None,
+        mode: str = "dense",
+    ):
+        key = self.make_key(namespace, query, top_k, mode)
+        embedding = self._unit(query_embedding) if query_embedding is not None and self.semantic_threshold is not None else None
+
+        with self._lock:
+            self._entries[key] = _Entry(matches, time.time() + self.ttl_seconds, embedding)
+            self._entries.move_to_end(key)
+            self._by_namespace.setdefault(namespace, set()).add(key)
+
+            while len(self._entries) > self.max_entries:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+
+    def invalidate_namespace(self, namespace: str):
+        with self._lock:
+            keys = self._by_namespace.pop(namespace, set())
+            for key in keys:
+                self._entries.pop(key, None)
+            if keys:
+                self.invalidations += 1
+
+    def _remove(self, key: CacheKey):
+        """Drop one entry; caller holds the lock."""
+        self._entries.pop(key, None)
+        keys = self._by_namespace.get(key[0])
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._by_namespace[key[0]]
+
+    # ----------------------------------------------------------------------
+    #                           STATS
+    # ----------------------------------------------------------------------
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.semantic_hits + self.misses
+            return {
+                "hits": self.hits,
+                "semantic_hits": self.semantic_hits,
+                "misses": self.misses,
+                "hit_rate": round((self.hits + self.semantic_hits) / lookups, 4) if lookups else 0.0,
+                "invalidations": self.invalidations,
+                "entries": len(self._entries),
+                "capacity": self.max_entries,
+                "semantic_threshold": self.semantic_threshold,
+            }
+
+
+_cache: Optional[RetrievalCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_retrieval_cache() -> Optional[RetrievalCache]:
+    """Return the process-wide retrieval cache, or None when disabled."""
+
+    global _cache
+
+    if not RETRIEVAL_CACHE_ENABLED:
+        return None
+
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                threshold = float(RETRIEVAL_CACHE_SEMANTIC_THRESHOLD) if RETRIEVAL_CACHE_SEMANTIC_THRESHOLD else None
+                _cache = RetrievalCache(semantic_threshold=threshold)
+
+    return _cache
@@ -0,0 +1,327 @@
+import os
+import re
+import json
+import math
+import uuid
+import shutil
+import threading
+from array import array
+from collections import Counter, OrderedDict
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+from dotenv import load_dotenv
+
+load_dotenv()
+
+SPARSE_INDEX_ENABLED = os.getenv("SPARSE_INDEX_ENABLED", "true").lower() == "true"
+SPARSE_INDEX_DIR = os.getenv("SPARSE_INDEX_DIR", "./data/sparse")
+SPARSE_INDEX_OPEN_NAMESPACES = int(os.getenv("SPARSE_INDEX_OPEN_NAMESPACES", "64"))
+# Postings held in memory while building an index before they are written out as a run
+SPARSE_BUILDER_SPILL_POSTINGS = int(os.getenv("SPARSE_BUILDER_SPILL_POSTINGS", "200000"))
+
+BM25_K1 = 1.5
+BM25_B = 0.75
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+_STOPWORDS = frozenset(
+    "a an and are as at be by for from has in is it its of on or that the this to was were which with".split()
+)
+
+
+def tokenize(text: str) -> List[str]:
+    return [t for t in _TOKEN_RE.findall(text.lower()) if t not in _STOPWORDS]
+
+
+def _write_postings(path: str, postings: Dict[str, List[Tuple[int, int]]]):
+    """Write postings as flat arrays (terms.json, offsets.npy, docs.npy, tfs.npy)."""
+
+    os.makedirs(path, exist_ok=True)
+    terms = sorted(postings)
+
+    offsets = np.zeros(len(terms) + 1, dtype=np.int64)
+    for i, term in enumerate(terms):
+        offsets[i + 1] = offsets[i] + len(postings[term])
+
+    docs = np.empty(offsets[-1], dtype=np.int32)
+    tfs = np.empty(offsets[-1], dtype=np.uint16)
+    for i, term in enumerate(terms):
+        entries = postings[term]
+        docs[offsets[i]:offsets[i + 1]] = [d for d, _ in entries]
+        tfs[offsets[i]:offsets[i + 1]] = [min(tf, 65535) for _, tf in entries]
+
+    with open(os.path.join(path, "terms.json"), "w") as f:
+        json.dump(terms, f)
+    np.save(os.path.join(path, "offsets.npy"), offsets)
+    np.save(os.path.join(path, "docs.npy"), docs)
+    np.save(os.path.join(path, "tfs.npy"), tfs)
+
+
+class BM25IndexBuilder:
+    """
+    Builds a BM25 index on disk while chunks are added during ingestion.
+
+    Chunk texts are appended to `chunks.jsonl` as they arrive, and postings
+    are held in memory only until SPARSE_BUILDER_SPILL_POSTINGS of them
+    accumulate; each batch is then written out as a sorted run. `save`
+    merges the runs into the final arrays through memory-mapped files, so
+    memory stays bounded by the spill size and the vocabulary rather
+    than the document size.
+    """
+
+    def __init__(self, path: str, spill_postings: int = SPARSE_BUILDER_SPILL_POSTINGS):
+        self.path = path
+        self.spill_postings = spill_postings
+
+        shutil.rmtree(path, ignore_errors=True)
+        os.makedirs(os.path.join(path, "runs"))
+
+        self._chunks = open(os.path.join(path, "chunks.jsonl"), "w")
+        self.doc_lengths = array("i")
+        self.postings: Dict[str, List[Tuple[int, int]]] = {}
+        self._pending = 0
+        self._runs: List[str] = []
+
+    def add(self, chunk_id: str, text: str):
+        doc = len(self.doc_lengths)
+        tokens = tokenize(text)
+
+        self._chunks.write(json.dumps({"id": chunk_id, "text": text}) + "\n")
+        self.doc_lengths.append(len(tokens))
+
+        for term, tf in Counter(tokens).items():
+            self.postings.setdefault(term, []).append((doc, tf))
+            self._pending += 1
+
+        if self._pending >= self.spill_postings:
+            self._spill()
+
+    def __len__(self):
+        return len(self.doc_lengths)
+
+    def _spill(self):
+        if not self.postings:
+            return
+
+        run = os.path.join(self.path, "runs", str(len(self._runs)))
+        _write_postings(run, self.postings)
+        self._runs.append(run)
+        self.postings = {}
+        self._pending = 0
+
+    def save(self):
+        """
+        Finish the index in place:
+        - terms.json      sorted vocabulary
+        - offsets.npy     int64 start of each term's postings (len = terms + 1)
+        - docs.npy        int32 doc numbers, grouped by term
+        - tfs.npy         uint16 term frequencies, aligned with docs.npy
+        - lengths.npy     int32 token count per doc
+        - chunks.jsonl    {"id", "text"} per doc
+        """
+
+        self._spill()
+        self._chunks.close()
+
+        runs = []
+        for run in self._runs:
+            with open(os.path.join(run, "terms.json")) as f:
+                run_terms = json.load(f)
+            offsets = np.load(os.path.join(run, "offsets.npy"))
+            runs.append((run, run_terms, offsets))
+
+        terms = sorted({term for _, run_terms, _ in runs for term in run_terms})
+        term_ids = {term: i for i, term in enumerate(terms)}
+
+        counts = np.zeros(len(terms), dtype=np.int64)
+        for _, run_terms, offsets in runs:
+            counts[[term_ids[t] for t in run_terms]] += np.diff(offsets)
+
+        final_offsets = np.zeros(len(terms) + 1, dtype=np.int64)
+        np.cumsum(counts, out=final_offsets[1:])
+        total = int(final_offsets[-1])
+
+        docs = np.lib.format.open_memmap(os.path.join(self.path, "docs.npy"), mode="w+", dtype=np.int32, shape=(total,))
+        tfs = np.lib.format.open_memmap(os.path.join(self.path, "tfs.npy"), mode="w+", dtype=np.uint16, shape=(total,))
+
+        # Runs cover increasing doc ranges, so appending run by run keeps each term's postings sorted
+        cursor = final_offsets[:-1].copy()
+        for run, run_terms, offsets in runs:
+            run_docs = np.load(os.path.join(run, "docs.npy"), mmap_mode="r")
+            run_tfs = np.load(os.path.join(run, "tfs.npy"), mmap_mode="r")
+
+            for i, term in enumerate(run_terms):
+                start, end = offsets[i], offsets[i + 1]
+                at = cursor[term_ids[term]]
+                docs[at:at + end - start] = run_docs[start:end]
+                tfs[at:at + end - start] = run_tfs[start:end]
+                cursor[term_ids[term]] += end - start
+
+        docs.flush()
+        tfs.flush()
+        del docs, tfs
+
+        with open(os.path.join(self.path, "terms.json"), "w") as f:
+            json.dump(terms, f)
+        np.save(os.path.join(self.path, "offsets.npy"), final_offsets)
+        np.save(os.path.join(self.path, "lengths.npy"), np.asarray(self.doc_lengths, dtype=np.int32))
+
+        shutil.rmtree(os.path.join(self.path, "runs"), ignore_errors=True)
+
+    def discard(self):
+        """Drop a build that won't be saved (e.g. ingestion failed)."""
+
+        self._chunks.close()
+        shutil.rmtree(self.path, ignore_errors=True)
+
+
+class BM25Index:
+    """Read-only BM25 index over one namespace; postings are memory-mapped."""
+
+    def __init__(self, path: str):
+        with open(os.path.join(path, "terms.json")) as f:
+            self.term_ids = {term: i for i, term in enumerate(json.load(f))}
+
+        self.offsets = np.load(os.path.join(path, "offsets.npy"), mmap_mode="r")
+        self.docs = np.load(os.path.join(path, "docs.npy"), mmap_mode="r")
+        self.tfs = np.load(os.path.join(path, "tfs.npy"), mmap_mode="r")
+        self.lengths = np.load(os.path.join(path, "lengths.npy")).astype(np.float32)
+
+        with open(os.path.join(path, "chunks.jsonl")) as f:
+            self.chunks = [json.loads(line) for line in f if line.strip()]
+
+        self.n_docs = len(self.lengths)
+        self.avg_length = float(self.lengths.mean()) if self.n_docs else 0.0
+
+    def search(self, query: str, top_k: int) -> List[dict]:
+        """Return [{"id", "score", "text"}] for the best BM25 matches."""
+
+        if not self.n_docs:
+            return []
+
+        scores = np.zeros(self.n_docs, dtype=np.float32)
+        norm = BM25_K1 * (1 - BM25_B + BM25_B * self.lengths / (self.avg_length or 1.0))
+
+        for term in set(tokenize(query)):
+            term_id = self.term_ids.get(term)
+            if term_id is None:
+                continue
+
+            start, end = self.offsets[term_id], self.offsets[term_id + 1]
+            docs = np.asarray(self.docs[start:end])
+            tfs = np.asarray(self.tfs[start:end], dtype=np.float32)
+
+            df = end - start
+            idf = math.log(1 + (self.n_docs - df + 0.5) / (df + 0.5))
+            scores[docs] += idf * tfs * (BM25_K1 + 1) / (tfs + norm[docs])
+
+        matched = np.flatnonzero(scores)
+        if not len(matched):
+            return []
+
+        k = min(top_k, len(matched))
+        top = matched[np.argpartition(-scores[matched], k - 1)[:k]]
+        top = top[np.argsort(-scores[top])]
+
+        return [
+            {"id": self.chunks[i]["id"], "score": float(scores[i]), "text": self.chunks[i]["text"]}
+            for i in top
+        ]
+
+
+class SparseIndexStore:
+    """Per-namespace BM25 indexes on disk, opened lazily and kept in a small LRU."""
+
+    def __init__(self, root: str = SPARSE_INDEX_DIR, max_open: int = SPARSE_INDEX_OPEN_NAMESPACES):
+        self.root = root
+        self.max_open = max_open
+        self._open: "OrderedDict[str, BM25Index]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _dir(self, namespace: str) -> str:
+        if not namespace or os.sep in namespace or namespace.startswith("."):
+            raise ValueError(f"Invalid namespace '{namespace}'")
+        return os.path.join(self.root, namespace)
+
+    def builder(self, namespace: str) -> BM25IndexBuilder:
+        """A builder seeded with the namespace's existing chunks, so re-ingests append."""
+
+        path = self._dir(namespace)
+        builder = BM25IndexBuilder(f"{path}.{uuid.uuid4().hex}.tmp")
+        chunks_path = os.path.join(path, "chunks.jsonl")
+
+        if os.path.exists(chunks_path):
+            with open(chunks_path) as f:
+                for line in f:
+                    if line.strip():
+                        chunk = json.loads(line)
+                        builder.add(chunk["id"], chunk["text"])
+        return builder
+
+    def save(self, namespace: str, builder: BM25IndexBuilder):
+        path = self._dir(namespace)
+        builder.save()
+        tmp_path = builder.path
+
+        with self._lock:
+            self._open.pop(namespace, None)
+            shutil.rmtree(path, ignore_errors=True)
+            os.replace(tmp_path, path)
+
+    def exists(self, namespace: str) -> bool:
+        """Whether the namespace has a BM25 index, without opening it."""
+        with self._lock:
+            if namespace in self._open:
+                return True
+        return os.path.exists(os.path.join(self._dir(namespace), "terms.json"))
+
+    def get(self, namespace: str) -> Optional[BM25Index]:
+        with self._lock:
+            if namespace in self._open:
+                self._open.move_to_end(namespace)
+                return self._open[namespace]
+
+            path = self._dir(namespace)
+            if not os.path.exists(os.path.join(path, "terms.json")):
+                return None
+
+            index = BM25Index(path)
+            self._open[namespace] = index
+            while len(self._open) > self.max_open:
+                self._open.popitem(last=False)
+            return index
+
+    def delete(self, namespace: str):
+        with self._lock:
+            self._open.pop(namespace, None)
+            shutil.rmtree(self._dir(namespace), ignore_errors=True)
+
+
+_store: Optional[SparseIndexStore] = None
+_store_lock = threading.Lock()
+
+
+def get_sparse_store() -> Optional[SparseIndexStore]:
+    """Return the process-wide sparse index store, or None when disabled."""
+
+    global _store
+
+    if not SPARSE_INDEX_ENABLED:
+        return None
+
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = SparseIndexStore()
+
+    return _store
+
+
+def reciprocal_rank_fusion(rankings: List[List[dict]], top_k: int, k: int = 60) -> List[Tuple[str, float]]:
+    """Fuse ranked result lists by Σ 1 / (k + rank); returns [(id, fused_score)]."""
+
+    fused: Dict[str, float] = {}
+    for ranking in rankings:
+        for rank, match in enumerate(ranking):
+            fused[match["id"]] = fused.get(match["id"], 0.0) + 1.0 / (k + rank + 1)
+
+    return sorted(fused.items(), key=lambda item: item[1], reverse=True)[:top_k]
@@ -1,4 +1,4 @@
-from typing import List
+from typing import Iterable, Iterator, List
 from langchain_core.documents import Document
 from langchain_text_splitters import RecursiveCharacterTextSplitter
 
@@ -11,10 +11,14 @@ class DocumentSplitter:
             length_function=len,
         )
     
-    def split_documents(self, documents):
+    def split_documents(self, documents) -> List[Document]:
         """Split documents into chunks"""
         try:
             return self.text_splitter.split_documents(documents)
         except Exception as e:
             raise Exception(f"Error splitting documents: {str(e)}")
 
+    def iter_split(self, documents: Iterable[Document]) -> Iterator[Document]:
+        """Split documents one at a time, yielding chunks as they are produced"""
+        for document in documents:
+            yield from self.split_documents([document])
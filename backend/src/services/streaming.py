@@ -0,0 +1,186 @@
+import os
+import json
+import time
+import asyncio
+import inspect
+from typing import Any, AsyncIterable, AsyncIterator, Awaitable, Callable, List, Optional, Union
+from fastapi.responses import StreamingResponse
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Comment line sent when no token arrived for this long, so proxies keep the connection open
+STREAM_HEARTBEAT_SECONDS = float(os.getenv("STREAM_HEARTBEAT_SECONDS", "15"))
+# Coalesce tokens for up to this long per write; 0 forwards every token immediately
+STREAM_FLUSH_INTERVAL_MS = float(os.getenv("STREAM_FLUSH_INTERVAL_MS", "0"))
+# ...or until this many characters are buffered
+STREAM_FLUSH_MAX_CHARS = int(os.getenv("STREAM_FLUSH_MAX_CHARS", "512"))
+
+OnComplete = Callable[[str], Union[None, Awaitable[None]]]
+
+
+def sse_event(data: Any, event: Optional[str] = None) -> str:
+    """Frame one SSE event; `data` is JSON-encoded so newlines in tokens stay inside one event."""
+
+    frame = f"event: {event}\n" if event else ""
+    return frame + f"data: {json.dumps(data)}\n\n"
+
+
+def sse_comment(text: str = "heartbeat") -> str:
+    return f": {text}\n\n"
+
+
+def chunk_text(chunk: Any) -> str:
+    """Text of a streamed LangChain message chunk (or a plain string)."""
+
+    if isinstance(chunk, str):
+        return chunk
+    content = getattr(chunk, "content", "")
+    return content if isinstance(content, str) else ""
+
+
+class StreamEvent:
+    """A typed event (e.g. tool progress) interleaved with text chunks in a stream."""
+
+    def __init__(self, event: str, data: Any):
+        self.event = event
+        self.data = data
+
+
+class TokenCollector:
+    """Collects streamed text in a list buffer; joined once at the end."""
+
+    def __init__(self):
+        self.parts: List[str] = []
+        self.tokens = 0
+        self.chars = 0
+
+    def add(self, text: str):
+        self.parts.append(text)
+        self.tokens += 1
+        self.chars += len(text)
+
+    @property
+    def text(self) -> str:
+        return "".join(self.parts)
+
+
+async def stream_sse(
+    chunks: AsyncIterable[Any],
+    on_complete: Optional[OnComplete] = None,
+    collector: Optional[TokenCollector] = None,
+    heartbeat_seconds: float = STREAM_HEARTBEAT_SECONDS,
+    flush_interval_ms: float = STREAM_FLUSH_INTERVAL_MS,
+    flush_max_chars: int = STREAM_FLUSH_MAX_CHARS,
+) -> AsyncIterator[str]:
+    """
+    Forward model chunks as SSE events:
+
+        data: {"text": "..."}                         one or more coalesced tokens
+        event: <name> data: {...}                     a StreamEvent yielded by the source
+        : heartbeat                                   after heartbeat_seconds of silence
+        event: done   data: {"tokens", "chars", "elapsed_ms"}
+        event: error  data: {"detail"}
+
+    Tokens stay on the default (unnamed) event so plain text clients
+    keep working; pending text is flushed before any typed event.
+
+    `on_complete(full_text)` (sync or async) runs before the done event,
+    e.g. to persist the answer. Nothing sleeps between tokens.
+    """
+
+    collector = collector or TokenCollector()
+    iterator = chunks.__aiter__()
+    flush_interval = flush_interval_ms / 1000
+    started = time.perf_counter()
+
+    pending: List[str] = []
+    pending_chars = 0
+    flush_deadline = 0.0
+    next_chunk: Optional[asyncio.Future] = None
+
+    def flush() -> str:
+        nonlocal pending_chars
+        frame = sse_event({"text": "".join(pending)})
+        pending.clear()
+        pending_chars = 0
+        return frame
+
+    try:
+        while True:
+            if next_chunk is None:
+                next_chunk = asyncio.ensure_future(iterator.__anext__())
+
+            loop_time = asyncio.get_running_loop().time()
+            timeout = max(0.0, flush_deadline - loop_time) if pending else heartbeat_seconds
+            done, _ = await asyncio.wait({next_chunk}, timeout=timeout)
+
+            if not done:
+                yield flush() if pending else sse_comment()
+                continue
+
+            try:
+                chunk = next_chunk.result()
+            except StopAsyncIteration:
+                break
+            finally:
+                next_chunk = None
+
+            if isinstance(chunk, StreamEvent):
+                if pending:
+                    yield flush()
+                yield sse_event(chunk.data, event=chunk.event)
+                continue
+
+            text = chunk_text(chunk)
+            if not text:
+                continue
+
+            collector.add(text)
+
+            if flush_interval <= 0:
+                yield sse_event({"text": text})
+                continue
+
+            if not pending:
+                flush_deadline = asyncio.get_running_loop().time() + flush_interval
+            pending.append(text)
+            pending_chars += len(text)
+
+            if pending_chars >= flush_max_chars:
+                yield flush()
+
+        if pending:
+            yield flush()
+
+        if on_complete is not None:
+            result = on_complete(collector.text)
+            if inspect.isawaitable(result):
+                await result
+
+        yield sse_event(
+            {
+                "tokens": collector.tokens,
+                "chars": collector.chars,
+                "elapsed_ms": round((time.perf_counter() - started) * 1000),
+            },
+            event="done",
+        )
+
+    except Exception as e:
+        print(f"[Streaming] Stream failed: {str(e)}")
+        yield sse_event({"detail": str(e)}, event="error")
+
+    finally:
+        if next_chunk is not None:
+            next_chunk.cancel()
+
+
+def sse_response(chunks: AsyncIterable[Any], on_complete: Optional[OnComplete] = None, **options) -> StreamingResponse:
+    """StreamingResponse over `stream_sse`, with headers that stop proxies buffering the stream."""
+
+    return StreamingResponse(
+        stream_sse(chunks, on_complete=on_complete, **options),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -1,16 +1,105 @@
 from dotenv import load_dotenv
-from langchain_huggingface import HuggingFaceEndpoint, ChatHuggingFace
 from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
-from langchain_core.messages import AIMessage, HumanMessage, SystemMessage
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage, SystemMessage
 
-from src.services.arxiv_tools import get_research_tools
+from src.schemas.arxiv_schema import PaperMetadata
+from src.services.arxiv_tools import get_research_tools, paper_listener
+from src.services.llm_clients import AGENT_LLM_CONFIG, get_llm_client
+from src.services.prompt_budget import PromptBudget, summary_message
+from src.services.context_compaction import compact_context
+from src.services.streaming import StreamEvent
+from src.services.executors import run_blocking
 
 import os
 import json
+import time
+import asyncio
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Tuple
 
 load_dotenv()
 
-HUGGINGFACE_API_KEY = os.getenv("HUGGINGFACE_API_KEY")
+# Seconds one tool call may take (queueing included) before its result is dropped
+TOOL_CALL_TIMEOUT_SECONDS = float(os.getenv("TOOL_CALL_TIMEOUT_SECONDS", "30"))
+# Calls of one tool running at once across the process; e.g. "arxiv_search=3"
+TOOL_MAX_CONCURRENCY = int(os.getenv("TOOL_MAX_CONCURRENCY", "4"))
+TOOL_CONCURRENCY_LIMITS = os.getenv("TOOL_CONCURRENCY_LIMITS", "")
+# Threads running tool calls (separate from the blocking pool so slow tools can't starve DB work)
+TOOL_POOL_SIZE = int(os.getenv("TOOL_POOL_SIZE", "16"))
+# Abstract length sent with each streamed paper
+TOOL_RESULT_SUMMARY_CHARS = int(os.getenv("TOOL_RESULT_SUMMARY_CHARS", "300"))
+
+SYSTEM_PROMPT = (
+    "You are a research assistant. Use the provided context "
+    "when available. If the context contains research papers, "
+    "summarize them and include clickable download links."
+)
+
+
+# ----------------------------------------------------------------------
+# TOOL EXECUTION POOL
+# ----------------------------------------------------------------------
+
+_tool_pool: Optional[ThreadPoolExecutor] = None
+_tool_limits: Dict[str, threading.BoundedSemaphore] = {}
+_tool_lock = threading.Lock()
+
+
+def _configured_limits() -> Dict[str, int]:
+    limits = {}
+    for item in filter(None, (part.strip() for part in TOOL_CONCURRENCY_LIMITS.split(","))):
+        name, _, limit = item.rpartition("=")
+        limits[name.strip()] = int(limit)
+    return limits
+
+
+_limits = _configured_limits()
+
+
+def get_tool_pool() -> ThreadPoolExecutor:
+    global _tool_pool
+
+    if _tool_pool is None:
+        with _tool_lock:
+            if _tool_pool is None:
+                _tool_pool = ThreadPoolExecutor(max_workers=TOOL_POOL_SIZE, thread_name_prefix="tool")
+    return _tool_pool
+
+
+def get_tool_limit(name: str) -> threading.BoundedSemaphore:
+    """Process-wide cap on concurrent calls of one tool (protects rate-limited upstreams)."""
+
+    with _tool_lock:
+        if name not in _tool_limits:
+            _tool_limits[name] = threading.BoundedSemaphore(max(1, _limits.get(name, TOOL_MAX_CONCURRENCY)))
+        return _tool_limits[name]
+
+
+def paper_summary(paper: PaperMetadata) -> dict:
+    """Compact form of a paper for streamed tool_result events."""
+
+    abstract = paper.abstract
+    if len(abstract) > TOOL_RESULT_SUMMARY_CHARS:
+        abstract = abstract[:TOOL_RESULT_SUMMARY_CHARS].rsplit(" ", 1)[0] + " …"
+
+    return {
+        "arxiv_id": paper.arxiv_id,
+        "title": paper.title,
+        "authors": paper.authors,
+        "published_date": paper.published_date,
+        "arxiv_url": paper.arxiv_url,
+        "pdf_url": paper.pdf_url,
+        "summary": abstract,
+    }
+
+
+def shutdown_tool_pool():
+    global _tool_pool
+
+    if _tool_pool is not None:
+        _tool_pool.shutdown(wait=False, cancel_futures=True)
+        _tool_pool = None
 
 
 class ToolAgent:
@@ -18,28 +107,22 @@ class ToolAgent:
     def __init__(self):
         """Initialize LLM, tools, history and template"""
 
-        # ---- LLM ----
-        hf_llm = HuggingFaceEndpoint(
-            repo_id="deepseek-ai/DeepSeek-V3.2-Exp",
-            task="text-generation",
-            huggingfacehub_api_token=HUGGINGFACE_API_KEY
-        )
-        self.chat_model = ChatHuggingFace(llm=hf_llm)
+        # ---- LLM (shared client; only the history below is per request) ----
+        self.chat_model = get_llm_client(AGENT_LLM_CONFIG)
 
         # ---- Tools ----
         self.tools = get_research_tools()
-        self.agent = self.chat_model.bind_tools(tools=self.tools)
+        self.tools_by_name = {tool.name: tool for tool in self.tools}
+        self.agent = self.chat_model.bind_tools(self.tools)
 
         # ---- Memory ----
         self.chat_history = []
+        # History that didn't fit the last built prompt (for the session summary)
+        self.older: List[BaseMessage] = []
 
         # ---- Prompt Template ----
         self.chat_template = ChatPromptTemplate([
-            SystemMessage(
-                "You are a research assistant. Use the provided context "
-                "when available. If the context contains research papers, "
-                "summarize them and include clickable download links."
-            ),
+            SystemMessage(SYSTEM_PROMPT),
             MessagesPlaceholder(variable_name="chat_history")
         ])
 
@@ -47,73 +130,189 @@ class ToolAgent:
     # TOOL HANDLING
     # ----------------------------------------------------------------------
 
-    def _execute_tool_call(self, tool_call):
-        """Execute a single tool call and return its result in clean format."""
-
-        tool_name = tool_call["function"]["name"]
-
+    @staticmethod
+    def _tool_args(tool_call) -> dict:
         try:
-            args = json.loads(tool_call["function"]["arguments"])
+            return json.loads(tool_call["function"]["arguments"])
         except json.JSONDecodeError:
-            args = {}
+            return {}
 
-        # Find tool
-        for tool in self.tools:
-            if tool.name == tool_name:
-                result = tool.run(tool_input=args)
-                # Convert each item to a dict
-                result = [r.model_dump() for r in result]
+    def _execute_tool_call(self, tool_call, on_paper: Optional[Callable[[PaperMetadata], None]] = None):
+        """
+        Execute a single tool call and return its result in clean format.
+        `on_paper` receives each paper as the tool parses it.
+        """
 
-                # Add downloadable PDF link
-                for r in result:
-                    if "pdf_url" in r:
-                        r["download_link"] = r["pdf_url"]
+        tool_name = tool_call["function"]["name"]
+        args = self._tool_args(tool_call)
 
-                return result
+        tool = self.tools_by_name.get(tool_name)
+        if tool is None:
+            return {"error": f"Tool '{tool_name}' not found"}
 
-        return {"error": f"Tool '{tool_name}' not found"}
+        listener = paper_listener.set(on_paper)
+        try:
+            with get_tool_limit(tool_name):
+                result = tool.run(tool_input=args)
+        finally:
+            paper_listener.reset(listener)
+
+        # Convert each item to a dict
+        result = [r.model_dump() for r in result]
+
+        # Add downloadable PDF link
+        for r in result:
+            if "pdf_url" in r:
+                r["download_link"] = r["pdf_url"]
+
+        return result
+
+    async def _astream_tool_calls(
+        self,
+        tool_calls: List[dict],
+        results: List[Any],
+        timeout: float = TOOL_CALL_TIMEOUT_SECONDS
+    ) -> AsyncIterator[StreamEvent]:
+        """
+        Run all tool calls concurrently on the tool pool, reporting progress
+        as it happens: tool_started per call, tool_result per paper as it is
+        parsed, and tool_finished per call. A call that fails or exceeds
+        `timeout` yields an error entry instead of failing the turn.
+        `results` is filled in call order.
+        """
+
+        loop = asyncio.get_running_loop()
+        queue: asyncio.Queue = asyncio.Queue()
+        pool = get_tool_pool()
+        start = time.perf_counter()
+
+        results[:] = [None] * len(tool_calls)
+        futures: List[Future] = []
+
+        for i, call in enumerate(tool_calls):
+            yield StreamEvent("tool_started", {
+                "call_id": i,
+                "name": call["function"]["name"],
+                "args": self._tool_args(call),
+            })
+
+            def on_paper(paper: PaperMetadata, i=i):
+                loop.call_soon_threadsafe(queue.put_nowait, ("paper", i, paper))
+
+            future = pool.submit(self._execute_tool_call, call, on_paper)
+            future.add_done_callback(lambda f, i=i: loop.call_soon_threadsafe(queue.put_nowait, ("finished", i, f)))
+            futures.append(future)
+
+        deadline = loop.time() + timeout
+        remaining = set(range(len(tool_calls)))
+
+        while remaining:
+            try:
+                kind, i, payload = await asyncio.wait_for(queue.get(), max(0.0, deadline - loop.time()))
+            except asyncio.TimeoutError:
+                break
+
+            tool_name = tool_calls[i]["function"]["name"]
+
+            if kind == "paper":
+                if i in remaining:
+                    yield StreamEvent("tool_result", {"call_id": i, "name": tool_name, "paper": paper_summary(payload)})
+                continue
+
+            remaining.discard(i)
+            try:
+                results[i] = payload.result()
+            except Exception as e:
+                print(f"[ToolAgent] Tool '{tool_name}' failed: {str(e)}")
+                results[i] = {"error": f"Tool '{tool_name}' failed: {str(e)}"}
+
+            yield StreamEvent("tool_finished", {
+                "call_id": i,
+                "name": tool_name,
+                "count": len(results[i]) if isinstance(results[i], list) else 0,
+                "error": results[i].get("error") if isinstance(results[i], dict) else None,
+            })
+
+        for i in sorted(remaining):
+            tool_name = tool_calls[i]["function"]["name"]
+            futures[i].cancel()
+            print(f"[ToolAgent] Tool '{tool_name}' timed out after {timeout:g}s")
+            results[i] = {"error": f"Tool '{tool_name}' timed out after {timeout:g}s"}
+            yield StreamEvent("tool_finished", {"call_id": i, "name": tool_name, "count": 0, "error": results[i]["error"]})
+
+        print(f"[ToolAgent] {len(tool_calls)} tool calls finished in {time.perf_counter() - start:.2f}s")
 
     # ----------------------------------------------------------------------
-    # CONTEXT GENERATION (WITH TOOL CALL SUPPORT)
+    # STREAMING TURN
     # ----------------------------------------------------------------------
 
-    def get_research_context(self, query: str):
-        """Runs the model with tool-calling enabled and returns context."""
+    async def astream(
+        self,
+        query: str,
+        history: Optional[List[BaseMessage]] = None,
+        summary: Optional[str] = None,
+        on_context: Optional[Callable[[str], Awaitable[None]]] = None
+    ) -> AsyncIterator[Any]:
+        """
+        One agent turn as a stream for `sse_response`: StreamEvents for the
+        tool step (see `_astream_tool_calls`) as soon as the model decides
+        on tool calls, then the answer's text chunks.
+
+        `on_context(compact)` runs with the compacted tool output once the
+        tool step is done, before the answer streams (e.g. to persist it);
+        it is not called when the model answered without tools. Afterwards
+        `self.older` holds the history that no longer fit the prompt.
+        """
+
+        decision = await self.agent.ainvoke(query)
+        tool_calls = getattr(decision, "additional_kwargs", {}).get("tool_calls")
 
-        llm_result = self.agent.invoke(query)
+        if tool_calls:
+            results: List[Any] = []
+            async for event in self._astream_tool_calls(tool_calls, results):
+                yield event
+            context = {"tool_results": results}
+        else:
+            context = {"response": decision.content}
 
-        # Check if tool-calling happened
-        tool_calls = getattr(llm_result, "additional_kwargs", {}).get("tool_calls")
+        # Ranking and token counting over the tool output is CPU work; keep it off the event loop
+        compact = await run_blocking(compact_context, query, context)
 
-        if tool_calls:
-            final_tool_results = []
-            for call in tool_calls:
-                result = self._execute_tool_call(call)
-                final_tool_results.append(result)
+        if tool_calls and on_context is not None:
+            await on_context(compact)
 
-            return {"tool_results": final_tool_results}
+        prompt, self.older = await run_blocking(self.build_prompt, query, compact, history or [], summary)
 
-        # No tool calls → direct answer
-        return {"response": llm_result.content}
+        async for chunk in self.chat_model.astream(prompt):
+            yield chunk
 
     # ----------------------------------------------------------------------
-    # MAIN INVOCATION
+    # TOKEN-BUDGETED PROMPT
     # ----------------------------------------------------------------------
 
-    def invoke(self, query: str):
-        """Main function used by your backend route."""
-        context = self.get_research_context(query)
+    def build_prompt(self, query: str, context, history: List[BaseMessage], summary: Optional[str] = None) -> Tuple[object, List[BaseMessage]]:
+        """
+        Final prompt within PROMPT_TOKEN_BUDGET: the context (raw, or
+        already compacted text) is compacted to its share of the budget,
+        the most recent history is kept verbatim and anything older is
+        replaced by the session `summary`.
+
+        Returns (prompt, older) where `older` is the leading part of
+        `history` that no longer fits and should be folded into the summary.
+        """
+
+        budget = PromptBudget()
+
+        context_text = compact_context(query, context, budget.context_tokens)
+        question = HumanMessage(f"Context:\n{context_text}\n\nQuestion: {query}")
 
-        # Prepare message for history + final LLM
-        user_message = f"Context: {json.dumps(context, indent=2)}\n\nUser Query: {query}"
-        self.chat_history.append(HumanMessage(user_message))
+        preamble = [summary_message(summary)] if summary else []
+        older, recent = budget.window_history(history, fixed=[SystemMessage(SYSTEM_PROMPT), *preamble, question])
 
-        # Now ask chat model to form final answer
-        final_answer = self.chat_template.invoke(
-            {"chat_history": self.chat_history}
-        )
+        self.chat_history = [*preamble, *recent, question]
+        prompt = self.chat_template.invoke({"chat_history": self.chat_history})
 
-        return final_answer
+        return prompt, older
 
     # ----------------------------------------------------------------------
     # ADD AI MESSAGE TO HISTORY
@@ -0,0 +1,495 @@
+import os
+import json
+import shutil
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional
+import numpy as np
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# "pinecone" | "local" | "chroma"
+VECTOR_BACKEND = os.getenv("VECTOR_BACKEND", "pinecone")
+
+PINECONE_INDEX_NAME = os.getenv("PINECONE_INDEX_NAME", "research-assistant")
+LOCAL_VECTOR_DIR = os.getenv("LOCAL_VECTOR_DIR", "./data/vectordb")
+LOCAL_VECTOR_OPEN_NAMESPACES = int(os.getenv("LOCAL_VECTOR_OPEN_NAMESPACES", "64"))
+# "none" (float32) | "float16" | "int8"
+LOCAL_VECTOR_QUANTIZATION = os.getenv("LOCAL_VECTOR_QUANTIZATION", "none")
+LOCAL_VECTOR_RESCORE_FACTOR = int(os.getenv("LOCAL_VECTOR_RESCORE_FACTOR", "4"))
+# Keep a float32 copy of quantized rows, read only to rescore the shortlist
+LOCAL_VECTOR_EXACT_RESCORE = os.getenv("LOCAL_VECTOR_EXACT_RESCORE", "true").lower() == "true"
+CHROMA_DIR = os.getenv("CHROMA_DIR", "./data/chroma")
+
+
+class VectorBackend:
+    """
+    Storage + nearest-neighbour search for namespaced vectors.
+
+    Vectors are dicts of {"id", "values", "metadata"}; query results are
+    dicts of {"id", "score", "metadata"} ordered by descending score.
+    Every backend is bound to one embedding `dimension`.
+    """
+
+    name = "base"
+
+    def __init__(self, dimension: int):
+        self.dimension = dimension
+
+    def check_dimension(self, length: int):
+        if length != self.dimension:
+            raise ValueError(
+                f"Vector has {length} dimensions but the {self.name} backend expects {self.dimension}"
+            )
+
+    def upsert(self, namespace: str, vectors: List[dict]):
+        raise NotImplementedError
+
+    def query(self, namespace: str, vector: List[float], top_k: int) -> List[dict]:
+        raise NotImplementedError
+
+    async def aquery(self, namespace: str, vector: List[float], top_k: int) -> List[dict]:
+        """Async `query`; backends without a native async client run it on the blocking pool."""
+        from src.services.executors import run_blocking
+        return await run_blocking(self.query, namespace, vector, top_k)
+
+    def delete_namespace(self, namespace: str):
+        raise NotImplementedError
+
+    async def aclose(self):
+        """Release async clients at shutdown."""
+
+
+# ----------------------------------------------------------------------
+#                           PINECONE
+# ----------------------------------------------------------------------
+
+class PineconeBackend(VectorBackend):
+    """Pinecone serverless index; one namespace per PDF."""
+
+    name = "pinecone"
+
+    def __init__(self, dimension: int, index_name: str = PINECONE_INDEX_NAME):
+        super().__init__(dimension)
+
+        from pinecone import Pinecone, ServerlessSpec
+
+        api_key = os.getenv("PINECONE_API_KEY")
+
+        if not api_key:
+            raise ValueError("PINECONE_API_KEY not found in environment variables")
+
+        self.index_name = index_name
+        self.pc = Pinecone(api_key=api_key)
+
+        # Create index if not exists, sized for the embedding model
+        if not self.pc.has_index(index_name):
+            print(f"[VectorStore] Creating Pinecone index: {index_name} ({dimension} dims)")
+            self.pc.create_index(
+                name=index_name,
+                dimension=dimension,
+                metric="cosine",
+                spec=ServerlessSpec(cloud="aws", region="us-east-1")
+            )
+        else:
+            index_dimension = self.pc.describe_index(index_name).dimension
+            if index_dimension != dimension:
+                raise ValueError(
+                    f"Pinecone index '{index_name}' has dimension {index_dimension}, but the embedding "
+                    f"model produces {dimension}-dim vectors. Use a new PINECONE_INDEX_NAME or re-create the index."
+                )
+
+        self.index = self.pc.Index(index_name)
+        self.index_host = self.pc.describe_index(index_name).host
+        # aiohttp-backed index for async queries, opened on first use inside the event loop
+        self._async_index = None
+        print(f"[VectorStore] Connected to Pinecone index '{index_name}'")
+
+    def upsert(self, namespace: str, vectors: List[dict]):
+        self.index.upsert(vectors=vectors, namespace=namespace)
+
+    @staticmethod
+    def _matches(response) -> List[dict]:
+        return [
+            {"id": m["id"], "score": m["score"], "metadata": m["metadata"]}
+            for m in response.get("matches", [])
+        ]
+
+    def query(self, namespace: str, vector: List[float], top_k: int) -> List[dict]:
+        response = self.index.query(
+            vector=vector,
+            top_k=top_k,
+            include_metadata=True,
+            namespace=namespace
+        )
+        return self._matches(response)
+
+    async def aquery(self, namespace: str, vector: List[float], top_k: int) -> List[dict]:
+        if self._async_index is None:
+            self._async_index = self.pc.IndexAsyncio(host=self.index_host)
+
+        response = await self._async_index.query(
+            vector=vector,
+            top_k=top_k,
+            include_metadata=True,
+            namespace=namespace
+        )
+        return self._matches(response)
+
+    def delete_namespace(self, namespace: str):
+        self.index.delete(delete_all=True, namespace=namespace)
+
+    async def aclose(self):
+        if self._async_index is not None:
+            await self._async_index.close()
+            self._async_index = None
+
+
+# ----------------------------------------------------------------------
+#                           LOCAL (NumPy + mmap)
+# ----------------------------------------------------------------------
+
+# Storage dtype and file suffix per quantization mode
+_STORAGE = {
+    "none": (np.float32, "f32"),
+    "float16": (np.float16, "f16"),
+    "int8": (np.int8, "i8"),
+}
+
+# Rows scored per block, bounding the temporary float32 copy of quantized data
+_SCORE_BLOCK_ROWS = 16384
+
+
+class _LocalNamespace:
+    """
+    An opened namespace: memory-mapped vector matrix (+ int8 row scales),
+    the float32 rescoring copy of quantized rows when kept, and row records.
+    """
+
+    def __init__(
+        self,
+        quantization: str,
+        matrix: np.ndarray,
+        scales: Optional[np.ndarray],
+        records: List[dict],
+        exact: Optional[np.ndarray] = None,
+    ):
+        self.quantization = quantization
+        self.matrix = matrix
+        self.scales = scales
+        self.records = records
+        self.exact = exact
+
+
+class LocalBackend(VectorBackend):
+    """
+    In-process brute-force cosine search.
+
+    Each namespace is a directory holding:
+    - vectors.<f32|f16|i8> row-major matrix of L2-normalized vectors (memory-mapped)
+    - scales.f32           per-row scale factors (int8 mode only)
+    - rescore.f32          float32 copy of quantized rows (when exact_rescore)
+    - records.jsonl        one {"id", "metadata"} line per row
+    - meta.json            {"dimension": d, "quantization": mode, "exact_rescore": bool}
+
+    With float16/int8 quantization (LOCAL_VECTOR_QUANTIZATION) a first pass
+    scores every row in storage precision, then the top
+    `top_k * LOCAL_VECTOR_RESCORE_FACTOR` candidates are rescored with the
+    float32 query. With LOCAL_VECTOR_EXACT_RESCORE the shortlist is read
+    from the float32 copy, so final scores are exact; only those few rows
+    are touched, so the page cache holds just the 2x / ~4x smaller
+    quantized matrix (disk use grows instead). Without it the shortlist is
+    rescored from the quantized rows, which removes only the query's
+    quantization error.
+
+    Rows are append-only; chunk ids are fresh UUIDs so upserts never overwrite.
+    """
+
+    name = "local"
+
+    def __init__(
+        self,
+        dimension: int,
+        root: str = LOCAL_VECTOR_DIR,
+        max_open: int = LOCAL_VECTOR_OPEN_NAMESPACES,
+        quantization: str = LOCAL_VECTOR_QUANTIZATION,
+        rescore_factor: int = LOCAL_VECTOR_RESCORE_FACTOR,
+        exact_rescore: bool = LOCAL_VECTOR_EXACT_RESCORE,
+    ):
+        super().__init__(dimension)
+
+        if quantization not in _STORAGE:
+            raise ValueError(f"Unknown LOCAL_VECTOR_QUANTIZATION '{quantization}' (expected one of {list(_STORAGE)})")
+
+        self.root = root
+        self.max_open = max_open
+        self.quantization = quantization
+        self.rescore_factor = max(1, rescore_factor)
+        self.exact_rescore = exact_rescore
+        self._open: "OrderedDict[str, _LocalNamespace]" = OrderedDict()
+        self._lock = threading.RLock()
+        os.makedirs(root, exist_ok=True)
+
+    def _dir(self, namespace: str) -> str:
+        # Namespaces are UUIDs; reject anything that could escape the root
+        if not namespace or os.sep in namespace or namespace.startswith("."):
+            raise ValueError(f"Invalid namespace '{namespace}'")
+        return os.path.join(self.root, namespace)
+
+    def _read_meta(self, path: str) -> Optional[dict]:
+        meta_path = os.path.join(path, "meta.json")
+        if not os.path.exists(meta_path):
+            return None
+        with open(meta_path) as f:
+            meta = json.load(f)
+        meta.setdefault("quantization", "none")
+        meta.setdefault("exact_rescore", False)
+
+        if meta["dimension"] != self.dimension:
+            raise ValueError(
+                f"Namespace at {path} holds {meta['dimension']}-dim vectors, "
+                f"but the embedding model produces {self.dimension}"
+            )
+        return meta
+
+    def _load(self, namespace: str) -> Optional[_LocalNamespace]:
+        """Open (or reuse) a namespace's mmap and records; caller holds the lock."""
+
+        if namespace in self._open:
+            self._open.move_to_end(namespace)
+            return self._open[namespace]
+
+        path = self._dir(namespace)
+        meta = self._read_meta(path)
+        if meta is None:
+            return None
+
+        quantization = meta["quantization"]
+        dtype, suffix = _STORAGE[quantization]
+
+        with open(os.path.join(path, "records.jsonl")) as f:
+            records = [json.loads(line) for line in f if line.strip()]
+
+        rows = len(records)
+        scales = None
+        exact = None
+
+        if rows:
+            matrix = np.memmap(os.path.join(path, f"vectors.{suffix}"), dtype=dtype, mode="r", shape=(rows, self.dimension))
+            if quantization == "int8":
+                scales = np.memmap(os.path.join(path, "scales.f32"), dtype=np.float32, mode="r", shape=(rows,))
+            if quantization != "none" and meta["exact_rescore"]:
+                exact = np.memmap(os.path.join(path, "rescore.f32"), dtype=np.float32, mode="r", shape=(rows, self.dimension))
+        else:
+            matrix = np.zeros((0, self.dimension), dtype=dtype)
+
+        opened = _LocalNamespace(quantization, matrix, scales, records, exact)
+        self._open[namespace] = opened
+        while len(self._open) > self.max_open:
+            self._open.popitem(last=False)
+        return opened
+
+    @staticmethod
+    def _quantize_int8(matrix: np.ndarray):
+        """Symmetric per-row int8 quantization: x ≈ q * scale."""
+        scales = np.abs(matrix).max(axis=1) / 127.0
+        scales[scales == 0] = 1.0
+        q = np.clip(np.rint(matrix / scales[:, None]), -127, 127).astype(np.int8)
+        return q, scales.astype(np.float32)
+
+    def upsert(self, namespace: str, vectors: List[dict]):
+        if not vectors:
+            return
+
+        matrix = np.asarray([v["values"] for v in vectors], dtype=np.float32)
+        self.check_dimension(matrix.shape[1])
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        matrix /= np.where(norms == 0, 1, norms)
+
+        path = self._dir(namespace)
+
+        with self._lock:
+            os.makedirs(path, exist_ok=True)
+
+            # An existing namespace keeps the format it was created with
+            meta = self._read_meta(path)
+            if meta is None:
+                meta = {
+                    "dimension": self.dimension,
+                    "quantization": self.quantization,
+                    "exact_rescore": self.quantization != "none" and self.exact_rescore,
+                }
+                with open(os.path.join(path, "meta.json"), "w") as f:
+                    json.dump(meta, f)
+
+            quantization = meta["quantization"]
+            dtype, suffix = _STORAGE[quantization]
+
+            if quantization == "int8":
+                stored, scales = self._quantize_int8(matrix)
+                with open(os.path.join(path, "scales.f32"), "ab") as f:
+                    f.write(scales.tobytes())
+            else:
+                stored = matrix.astype(dtype)
+
+            with open(os.path.join(path, f"vectors.{suffix}"), "ab") as f:
+                f.write(stored.tobytes())
+            if meta["exact_rescore"]:
+                with open(os.path.join(path, "rescore.f32"), "ab") as f:
+                    f.write(matrix.tobytes())
+            with open(os.path.join(path, "records.jsonl"), "a") as f:
+                for v in vectors:
+                    f.write(json.dumps({"id": v["id"], "metadata": v.get("metadata", {})}) + "\n")
+
+            # Re-map on next query to pick up the appended rows
+            self._open.pop(namespace, None)
+
+    @staticmethod
+    def _top(scores: np.ndarray, k: int) -> np.ndarray:
+        k = min(k, len(scores))
+        top = np.argpartition(-scores, k - 1)[:k]
+        return top[np.argsort(-scores[top])]
+
+    def _approximate_scores(self, opened: _LocalNamespace, q: np.ndarray) -> np.ndarray:
+        """First-pass scores in storage precision, block by block."""
+
+        if opened.quantization == "int8":
+            q_int8, q_scale = self._quantize_int8(q[None, :])
+            q_approx = q_int8[0].astype(np.float32) * q_scale[0]
+        else:
+            q_approx = q.astype(opened.matrix.dtype).astype(np.float32)
+
+        scores = np.empty(len(opened.records), dtype=np.float32)
+        for start in range(0, len(scores), _SCORE_BLOCK_ROWS):
+            block = np.asarray(opened.matrix[start:start + _SCORE_BLOCK_ROWS], dtype=np.float32)
+            scores[start:start + len(block)] = block @ q_approx
+
+        if opened.scales is not None:
+            scores *= opened.scales
+        return scores
+
+    def query(self, namespace: str, vector: List[float], top_k: int) -> List[dict]:
+        self.check_dimension(len(vector))
+
+        with self._lock:
+            opened = self._load(namespace)
+
+        if opened is None or not opened.records:
+            return []
+
+        q = np.asarray(vector, dtype=np.float32)
+        q /= np.linalg.norm(q) or 1.0
+
+        if opened.quantization == "none":
+            scores = opened.matrix @ q
+            top = self._top(scores, top_k)
+            hits = [(i, scores[i]) for i in top]
+        else:
+            # Approximate pass over every row, then rescore the shortlist with the float32 query:
+            # exact against the float32 copy when kept, else against the dequantized rows
+            candidates = np.sort(self._top(self._approximate_scores(opened, q), top_k * self.rescore_factor))
+            if opened.exact is not None:
+                rows = np.asarray(opened.exact[candidates])
+            else:
+                rows = np.asarray(opened.matrix[candidates], dtype=np.float32)
+                if opened.scales is not None:
+                    rows *= np.asarray(opened.scales[candidates])[:, None]
+
+            exact = rows @ q
+            hits = [(candidates[j], exact[j]) for j in self._top(exact, top_k)]
+
+        return [
+            {"id": opened.records[i]["id"], "score": float(score), "metadata": opened.records[i]["metadata"]}
+            for i, score in hits
+        ]
+
+    def delete_namespace(self, namespace: str):
+        with self._lock:
+            self._open.pop(namespace, None)
+            shutil.rmtree(self._dir(namespace), ignore_errors=True)
+
+
+# ----------------------------------------------------------------------
+#                           CHROMA
+# ----------------------------------------------------------------------
+
+class ChromaBackend(VectorBackend):
+    """Persistent Chroma store; one cosine collection per namespace."""
+
+    name = "chroma"
+
+    def __init__(self, dimension: int, path: str = CHROMA_DIR):
+        super().__init__(dimension)
+
+        import chromadb
+
+        self.client = chromadb.PersistentClient(path=path)
+
+    def _collection(self, namespace: str):
+        return self.client.get_or_create_collection(name=namespace, metadata={"hnsw:space": "cosine"})
+
+    def upsert(self, namespace: str, vectors: List[dict]):
+        if not vectors:
+            return
+        self._collection(namespace).upsert(
+            ids=[v["id"] for v in vectors],
+            embeddings=[v["values"] for v in vectors],
+            metadatas=[v.get("metadata", {}) for v in vectors],
+        )
+
+    def query(self, namespace: str, vector: List[float], top_k: int) -> List[dict]:
+        result = self._collection(namespace).query(
+            query_embeddings=[vector],
+            n_results=top_k,
+            include=["metadatas", "distances"],
+        )
+        return [
+            {"id": id_, "score": 1.0 - distance, "metadata": metadata}
+            for id_, distance, metadata in zip(result["ids"][0], result["distances"][0], result["metadatas"][0])
+        ]
+
+    def delete_namespace(self, namespace: str):
+        try:
+            self.client.delete_collection(name=namespace)
+        except Exception:
+            pass  # already gone
+
+
+_backend_classes: Dict[str, type] = {
+    "pinecone": PineconeBackend,
+    "local": LocalBackend,
+    "chroma": ChromaBackend,
+}
+
+_backend: Optional[VectorBackend] = None
+_backend_lock = threading.Lock()
+
+
+def get_vector_backend() -> VectorBackend:
+    """
+    Return the process-wide vector backend selected by VECTOR_BACKEND,
+    validated against the embedding provider's dimension.
+    """
+
+    global _backend
+
+    if _backend is None:
+        with _backend_lock:
+            if _backend is None:
+                if VECTOR_BACKEND not in _backend_classes:
+                    raise ValueError(f"Unknown VECTOR_BACKEND '{VECTOR_BACKEND}' (expected one of {list(_backend_classes)})")
+
+                from src.services.embeddings import get_embedding_provider
+                dimension = get_embedding_provider().dimension
+
+                _backend = _backend_classes[VECTOR_BACKEND](dimension)
+
+    return _backend
+
+
+async def close_vector_backend():
+    """Close the shared backend's async clients, if it was ever created."""
+
+    if _backend is not None:
+        await _backend.aclose()
@@ -1,107 +1,291 @@
 import os
 import uuid
-from typing import List
-from pinecone import Pinecone, ServerlessSpec
+import asyncio
+from itertools import islice
+from typing import Callable, Iterable, List, Optional, Sequence, Tuple
 from langchain_core.documents import Document
 from dotenv import load_dotenv
 
+from src.services.executors import run_blocking
+from src.services.vector_backends import VectorBackend, get_vector_backend
+from src.services.retrieval_cache import get_retrieval_cache
+from src.services.sparse_index import BM25Index, get_sparse_store, reciprocal_rank_fusion
+
 load_dotenv()
 
+# Pinecone recommends upserts of at most ~100 vectors (2MB) per request
+UPSERT_BATCH_SIZE = int(os.getenv("PINECONE_UPSERT_BATCH_SIZE", "100"))
+
+# "dense" (vectors only), "sparse" (BM25 only) or "hybrid" (both, fused by reciprocal rank)
+RETRIEVAL_MODES = ("dense", "sparse", "hybrid")
+RETRIEVAL_MODE = os.getenv("RETRIEVAL_MODE", "hybrid")
+# Each retriever contributes top_k * factor candidates to the fusion
+HYBRID_CANDIDATE_FACTOR = int(os.getenv("HYBRID_CANDIDATE_FACTOR", "4"))
+
+
+def init_vector_backend() -> VectorBackend:
+    """
+    Create the process-wide vector backend (Pinecone, local or Chroma,
+    per VECTOR_BACKEND). For Pinecone this is where the client is built
+    and the index-existence and dimension checks run, once per process.
+    """
+    return get_vector_backend()
+
 
 class VectorStore:
     """
-    Pinecone vector storage for each PDF.
+    Vector storage for each PDF.
     
-    pdf_id = namespace inside the Pinecone index.
+    pdf_id = namespace inside the configured vector backend.
+
+    Instances are lightweight namespace-scoped views over the shared
+    backend, so constructing one per request costs no network calls.
     """
 
     def __init__(self, pdf_id: str):
         self.pdf_id = pdf_id
-        self.api_key = os.getenv("PINECONE_API_KEY")
-        self.index_name = os.getenv("PINECONE_INDEX_NAME", "research-assistant")
-
-        if not self.api_key:
-            raise ValueError("PINECONE_API_KEY not found in environment variables")
-
-        self.pc = Pinecone(api_key=self.api_key)
-
-        # Create index if not exists
-        if self.index_name not in self.pc.list_indexes().names():
-            print(f"[VectorStore] Creating Pinecone index: {self.index_name}")
-            self.pc.create_index(
-                name=self.index_name,
-                dimension=1024,            # matches embedding model dimension
-                metric="cosine",
-                spec=ServerlessSpec(cloud="aws", region="us-east-1")
-            )
+        self.backend = init_vector_backend()
 
-        self.index = self.pc.Index(self.index_name)
-        print(f"[VectorStore] Initialized index '{self.index_name}' for PDF namespace '{self.pdf_id}'")
+    def _invalidate_cached_results(self):
+        """Drop cached retrievals for this namespace after its vectors change."""
+        cache = get_retrieval_cache()
+        if cache:
+            cache.invalidate_namespace(self.pdf_id)
 
     # ----------------------------------------------------------------------
     #                           ADD EMBEDDINGS
     # ----------------------------------------------------------------------
 
-    def add_embeddings(self, chunks: List[Document]):
+    def add_embeddings(
+        self,
+        chunks: Iterable[Document],
+        on_progress: Optional[Callable[[int], None]] = None,
+        embed: Optional[Callable[[List[str]], List[List[float]]]] = None,
+    ):
         """
-        Store embeddings in Pinecone for the given PDF.
+        Store embeddings in the vector backend for the given PDF.
+
+        `chunks` may be a list or a lazy iterator: it is consumed in
+        UPSERT_BATCH_SIZE slices, each embedded in batches (reusing cached
+        vectors for text seen before) and upserted before the next slice
+        is read, so memory stays bounded regardless of document size.
+        `on_progress` is called with the number of chunks stored so far.
+        `embed` replaces `embed_texts`, e.g. with a shared batcher's `embed`
+        so several documents' chunks are embedded together.
+
+        The same chunks, under the same ids, feed the namespace's BM25
+        index. It is built on disk as chunks arrive (see BM25IndexBuilder),
+        so it stays within the same memory bound, and it replaces the
+        previous index once all vectors are stored.
         """
 
-        print(f"[VectorStore] Adding {len(chunks)} chunks to namespace: {self.pdf_id}")
+        print(f"[VectorStore] Adding chunks to namespace: {self.pdf_id}")
+
+        from src.services.embeddings import embed_texts
+
+        embed = embed or embed_texts
+        sparse_store = get_sparse_store()
+        sparse_builder = sparse_store.builder(self.pdf_id) if sparse_store else None
+
+        chunk_iter = iter(chunks)
+        done = 0
 
-        from src.services.embeddings import embed_text
+        try:
+            while True:
+                window = list(islice(chunk_iter, UPSERT_BATCH_SIZE))
+                if not window:
+                    break
 
-        vectors = []
+                # 🔥 Generate embeddings for this slice in batched requests
+                embeddings = embed([chunk.page_content for chunk in window])
+                self.backend.check_dimension(len(embeddings[0]))
 
-        for chunk in chunks:
-            chunk_id = str(uuid.uuid4())
+                vectors = []
 
-            # 🔥 Generate embedding for each PDF chunk
-            embedding = embed_text(chunk.page_content)
+                for chunk, embedding in zip(window, embeddings):
+                    vector_id = str(uuid.uuid4())
+                    if sparse_builder is not None:
+                        sparse_builder.add(vector_id, chunk.page_content)
 
-            vectors.append({
-                "id": chunk_id,
-                "values": embedding,
-                "metadata": {
-                    "text": chunk.page_content,
-                    "source": self.pdf_id
-                }
-            })
+                    vectors.append({
+                        "id": vector_id,
+                        "values": embedding,
+                        "metadata": {
+                            "text": chunk.page_content,
+                            "source": self.pdf_id
+                        }
+                    })
 
-        self.index.upsert(vectors=vectors, namespace=self.pdf_id)
+                self.backend.upsert(self.pdf_id, vectors)
+                self._invalidate_cached_results()
 
-        print(f"[VectorStore] Successfully stored embeddings in Pinecone")
+                done += len(window)
+                if on_progress:
+                    on_progress(done)
+        except Exception:
+            if sparse_builder is not None:
+                sparse_builder.discard()
+            raise
+
+        if sparse_builder is not None:
+            if done:
+                sparse_store.save(self.pdf_id, sparse_builder)
+                self._invalidate_cached_results()
+            else:
+                sparse_builder.discard()
+
+        print(f"[VectorStore] Stored {done} chunks in {self.backend.name}")
 
     # ----------------------------------------------------------------------
     #                           SEARCH
     # ----------------------------------------------------------------------
 
-    def search(self, query: str, top_k: int = 5):
+    def search(self, query: str, top_k: int = 5, mode: Optional[str] = None, query_embedding: Optional[List[float]] = None):
         """
-        Search Pinecone for the closest chunks related to the query.
-        Embedding is generated inside the LangChain/LLM pipeline.
+        Search the namespace for the chunks most related to the query.
+
+        `mode` defaults to RETRIEVAL_MODE. "hybrid" fuses dense and BM25
+        rankings so exact terms (equation, dataset or author names) are
+        found even when their embeddings are not close; namespaces indexed
+        before BM25 existed fall back to "dense".
+
+        Results are served from the retrieval cache when the same (or, in
+        semantic mode, a near-identical) question was asked about this
+        namespace recently; the query embedding comes from the embedding
+        cache when the same text was embedded before, or from the caller.
+
+        Each Document carries its retrieval score in metadata["score"].
         """
 
         from src.services.embeddings import embed_text  # lazy import
 
-        print(f"[VectorStore] Searching embeddings for PDF: {self.pdf_id}")
+        mode, sparse_index = self._resolve_mode(mode)
+        print(f"[VectorStore] Searching PDF: {self.pdf_id} ({mode})")
 
-        query_embedding = embed_text(query)
+        cache = get_retrieval_cache()
+        matches = cache.get(self.pdf_id, query, top_k, mode) if cache else None
 
-        response = self.index.query(
-            vector=query_embedding,
-            top_k=top_k,
-            include_metadata=True,
-            namespace=self.pdf_id
-        )
+        if matches is None:
+            if mode == "sparse":
+                query_embedding = None
+            else:
+                if query_embedding is None:
+                    query_embedding = embed_text(query)
+                self.backend.check_dimension(len(query_embedding))
+
+                matches = cache.get_similar(self.pdf_id, top_k, query_embedding, mode) if cache else None
+
+            if matches is None:
+                matches = self._retrieve(query, query_embedding, top_k, mode, sparse_index)
+                if cache:
+                    cache.put(self.pdf_id, query, top_k, matches, query_embedding, mode)
+
+        print(f"[VectorStore] Retrieved {len(matches)} results")
+        return self._to_documents(matches)
+
+    async def asearch(self, query: str, top_k: int = 5, mode: Optional[str] = None, query_embedding: Optional[List[float]] = None):
+        """
+        Async `search` for request handlers. The query is embedded and the
+        backend queried without blocking the event loop; BM25 scoring and
+        first-time index loads run on the blocking pool, concurrently with
+        the dense query in hybrid mode.
+        """
+
+        from src.services.embeddings import aembed_text  # lazy import
+
+        mode, sparse_index = await run_blocking(self._resolve_mode, mode)
+        print(f"[VectorStore] Searching PDF: {self.pdf_id} ({mode})")
+
+        cache = get_retrieval_cache()
+        matches = cache.get(self.pdf_id, query, top_k, mode) if cache else None
+
+        if matches is None:
+            if mode == "sparse":
+                query_embedding = None
+            else:
+                if query_embedding is None:
+                    query_embedding = await aembed_text(query)
+                self.backend.check_dimension(len(query_embedding))
+
+                matches = cache.get_similar(self.pdf_id, top_k, query_embedding, mode) if cache else None
+
+            if matches is None:
+                matches = await self._aretrieve(query, query_embedding, top_k, mode, sparse_index)
+                if cache:
+                    cache.put(self.pdf_id, query, top_k, matches, query_embedding, mode)
 
-        matches = response.get("matches", [])
         print(f"[VectorStore] Retrieved {len(matches)} results")
+        return self._to_documents(matches)
+
+    def _resolve_mode(self, mode: Optional[str]) -> Tuple[str, Optional[BM25Index]]:
+        """Validate `mode` and open the BM25 index it needs; fall back to dense without one."""
+
+        mode = mode or RETRIEVAL_MODE
+        if mode not in RETRIEVAL_MODES:
+            raise ValueError(f"Unknown retrieval mode '{mode}' (expected one of {RETRIEVAL_MODES})")
+
+        if mode == "dense":
+            return mode, None
+
+        sparse_store = get_sparse_store()
+        sparse_index = sparse_store.get(self.pdf_id) if sparse_store else None
+        return (mode, sparse_index) if sparse_index is not None else ("dense", None)
+
+    def _retrieve(self, query: str, query_embedding, top_k: int, mode: str, sparse_index: Optional[BM25Index]):
+        """Run the backend and/or BM25 retrieval for `mode`; matches are {id, score, metadata}."""
+
+        if mode == "dense":
+            return self.backend.query(self.pdf_id, query_embedding, top_k)
+
+        candidates = top_k * HYBRID_CANDIDATE_FACTOR
+        sparse = self._sparse_matches(sparse_index, query, candidates)
+
+        if mode == "sparse":
+            return sparse[:top_k]
+
+        dense = self.backend.query(self.pdf_id, query_embedding, candidates)
+        return self._fuse(dense, sparse, top_k)
+
+    async def _aretrieve(self, query: str, query_embedding, top_k: int, mode: str, sparse_index: Optional[BM25Index]):
+        if mode == "dense":
+            return await self.backend.aquery(self.pdf_id, query_embedding, top_k)
+
+        candidates = top_k * HYBRID_CANDIDATE_FACTOR
+        sparse_task = run_blocking(self._sparse_matches, sparse_index, query, candidates)
+
+        if mode == "sparse":
+            return (await sparse_task)[:top_k]
+
+        dense, sparse = await asyncio.gather(
+            self.backend.aquery(self.pdf_id, query_embedding, candidates),
+            sparse_task,
+        )
+        return self._fuse(dense, sparse, top_k)
+
+    def _sparse_matches(self, sparse_index: BM25Index, query: str, limit: int) -> List[dict]:
+        return [
+            {"id": m["id"], "score": m["score"], "metadata": {"text": m["text"], "source": self.pdf_id}}
+            for m in sparse_index.search(query, limit)
+        ]
+
+    @staticmethod
+    def _fuse(dense: List[dict], sparse: List[dict], top_k: int) -> List[dict]:
+        by_id = {m["id"]: m for m in sparse}
+        by_id.update({m["id"]: m for m in dense})
+
+        return [
+            {**by_id[match_id], "score": score}
+            for match_id, score in reciprocal_rank_fusion([dense, sparse], top_k)
+        ]
+
+    @staticmethod
+    def _to_documents(matches: List[dict]) -> List[Document]:
+        """Convert matches to LangChain-style chunk objects."""
 
-        # Convert to LangChain-style chunk objects
         documents = []
         for m in matches:
-            metadata = m["metadata"]
+            metadata = dict(m["metadata"])
+            metadata["score"] = m["score"]
             doc = Document(
                 page_content=metadata.get("text", ""),
                 metadata=metadata
@@ -121,6 +305,65 @@ class VectorStore:
 
         print(f"[VectorStore] Deleting all vectors for namespace: {self.pdf_id}")
 
-        self.index.delete(delete_all=True, namespace=self.pdf_id)
+        self.backend.delete_namespace(self.pdf_id)
+
+        sparse_store = get_sparse_store()
+        if sparse_store:
+            sparse_store.delete(self.pdf_id)
+
+        self._invalidate_cached_results()
 
         print(f"[VectorStore] Deleted vector namespace for PDF: {self.pdf_id}")
+
+
+def _all_have_sparse_index(namespaces: Sequence[str]) -> bool:
+    sparse_store = get_sparse_store()
+    return sparse_store is not None and all(sparse_store.exists(namespace) for namespace in namespaces)
+
+
+async def search_namespaces(query: str, namespaces: Sequence[str], top_k: int = 5, mode: Optional[str] = None) -> List[Document]:
+    """
+    Search several namespaces concurrently and merge the top_k chunks
+    globally by score.
+
+    The query is embedded once and shared by every namespace, and the
+    per-namespace searches run concurrently on the event loop, so latency
+    stays close to that of a single search as the set grows. A namespace
+    that fails is logged and skipped. In hybrid mode scores are
+    rank-based, so the merge interleaves each namespace's best chunks.
+
+    Every namespace is searched in the same mode, since cosine, BM25 and
+    fused scores are not comparable: if any namespace lacks a BM25 index
+    (e.g. it was indexed before sparse indexes existed), all of them fall
+    back to dense.
+    """
+
+    from src.services.embeddings import aembed_text  # lazy import
+
+    mode = mode or RETRIEVAL_MODE
+    if mode not in RETRIEVAL_MODES:
+        raise ValueError(f"Unknown retrieval mode '{mode}' (expected one of {RETRIEVAL_MODES})")
+
+    if mode != "dense" and not await run_blocking(_all_have_sparse_index, namespaces):
+        print("[VectorStore] Not every namespace has a BM25 index; searching all in dense mode")
+        mode = "dense"
+
+    query_embedding = None if mode == "sparse" else await aembed_text(query)
+
+    results = await asyncio.gather(
+        *(
+            VectorStore(namespace).asearch(query, top_k, mode, query_embedding)
+            for namespace in namespaces
+        ),
+        return_exceptions=True,
+    )
+
+    documents = []
+    for namespace, result in zip(namespaces, results):
+        if isinstance(result, Exception):
+            print(f"[VectorStore] Search failed for namespace {namespace}: {result}")
+            continue
+        documents.extend(result)
+
+    documents.sort(key=lambda doc: doc.metadata.get("score", 0.0), reverse=True)
+    return documents[:top_k]
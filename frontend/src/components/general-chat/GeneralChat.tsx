@@ -4,8 +4,9 @@ import { getUser } from "@/utils/auth";
 import { useResearchChat } from "@/hooks/research/useResearchChat";
 import { useResearchMessages } from "@/hooks/research/useResearchMessages";
 import { useCreateResearchSession } from "@/hooks/research/useCreateResearchSession";
-import type { ChatMessage } from "@/types";
+import type { ChatMessage, ChatPaper } from "@/types";
 import { extractPapersFromContent } from "@/utils/paper-extract";
+import { SSETextDecoder } from "@/utils/sse";
 import { ChatWindow } from "../ChatWindow";
 import GeneralChatInput from "./GeneralChatInput";
 import GreetingScreen from "../GreetScreen";
@@ -101,16 +102,61 @@ export default function GeneralChat() {
             return;
           }
 
-          const decoder = new TextDecoder();
           let isFirstChunk = true;
           let fullContent = "";
 
+          // Papers arrive from the agent's tool step before any answer text;
+          // until then the message shows what the agent is doing
+          const streamedPapers: ChatPaper[] = [];
+          const showProgress = (status: string | null) =>
+            setMessages?.((prev: ChatMessage[]) =>
+              prev.map((msg) =>
+                msg.id === aiMessageId
+                  ? {
+                      ...msg,
+                      content:
+                        isFirstChunk && status ? `_${status}_` : msg.content,
+                      metadata: { papers: [...streamedPapers] },
+                    }
+                  : msg
+              )
+            );
+
+          const decoder = new SSETextDecoder({
+            onEvent: (event) => {
+              if (event.event === "tool_started") {
+                const source =
+                  event.name === "arxiv_search" ? "arXiv" : event.name;
+                const query = event.args.query
+                  ? ` for "${event.args.query}"`
+                  : "";
+                showProgress(`Searching ${source}${query}…`);
+              } else if (event.event === "tool_result") {
+                const paper = event.paper;
+                streamedPapers.push({
+                  title: paper.title,
+                  authors: paper.authors,
+                  year: paper.published_date.slice(0, 4),
+                  url: paper.arxiv_url,
+                  pdf_url: paper.pdf_url,
+                  abstract: paper.summary,
+                });
+                showProgress(`Found ${streamedPapers.length} papers…`);
+              } else if (event.event === "tool_finished" && event.error) {
+                console.warn("⚠️ Tool failed:", event.error);
+              }
+            },
+          });
+
           while (true) {
             const { done, value } = await reader.read();
             if (done) {
               // setIsAIResponding?.(false);
 
-              const extractedPapers = extractPapersFromContent(fullContent);
+              const extractedPapers =
+                streamedPapers.length > 0
+                  ? streamedPapers
+                  : extractPapersFromContent(fullContent);
 
               console.log("📄 Extracted papers:", extractedPapers);
 
@@ -130,8 +176,11 @@ export default function GeneralChat() {
             }
 
             const chunk = decoder.decode(value);
+            if (!chunk) continue;
             fullContent += chunk;
 
+            // The first answer text replaces the tool progress line
+            const replace = isFirstChunk;
             if (isFirstChunk) {
               // setIsAIResponding?.(false);
               isFirstChunk = false;
@@ -140,7 +189,7 @@ export default function GeneralChat() {
             setMessages?.((prev: ChatMessage[]) =>
               prev.map((msg) =>
                 msg.id === aiMessageId
-                  ? { ...msg, content: msg.content + chunk }
+                  ? { ...msg, content: replace ? chunk : msg.content + chunk }
                   : msg
               )
             );
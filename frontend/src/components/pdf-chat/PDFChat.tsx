@@ -5,6 +5,7 @@ import { ChatWindow } from "../ChatWindow";
 import PDFChatInput from "./PDFChatInput";
 import { usePdfChat } from "@/hooks/pdf/usePdfChat";
 import { usePdfHistory } from "@/hooks/pdf/usePdfHistory";
+import { SSETextDecoder } from "@/utils/sse";
 import GreetingScreen from "../GreetScreen";
 
 export default function PDFChat() {
@@ -77,7 +78,7 @@ export default function PDFChat() {
               return;
             }
 
-            const decoder = new TextDecoder();
+            const decoder = new SSETextDecoder();
             let isFirstChunk = true;
 
             while (true) {
@@ -152,7 +153,7 @@ export default function PDFChat() {
             return;
           }
 
-          const decoder = new TextDecoder();
+          const decoder = new SSETextDecoder();
           let isFirstChunk = true;
 
           while (true) {
@@ -1,15 +1,25 @@
 import api from "@/api/axios";
-import { useQuery } from "@tanstack/react-query";
+import { useMemo } from "react";
+import { useInfiniteQuery } from "@tanstack/react-query";
 
 export function usePdfHistory(pdf_id: string | null | undefined) {
-  const { data: messages } = useQuery({
+  const { data, fetchNextPage, hasNextPage } = useInfiniteQuery({
     queryKey: ["pdf-history", pdf_id],
-    queryFn: async () => {
-      const res = await api.get(`/chat/${pdf_id}/history`);
+    queryFn: async ({ pageParam }) => {
+      const res = await api.get(`/chat/${pdf_id}/history`, {
+        params: pageParam ? { before: pageParam } : undefined,
+      });
       return res.data;
     },
+    initialPageParam: null as string | null,
+    getNextPageParam: (lastPage) => lastPage.next_cursor ?? undefined,
     enabled: !!pdf_id,
   });
 
-  return { messages };
+  const messages = useMemo(
+    () => data?.pages.slice().reverse().flatMap((page) => page.messages),
+    [data]
+  );
+
+  return { messages, loadOlder: fetchNextPage, hasOlder: hasNextPage };
 }
@@ -1,6 +1,23 @@
 import api from "@/api/axios";
 import { useMutation } from "@tanstack/react-query";
 
+const POLL_INTERVAL_MS = 1000;
+
+// Indexing runs as a background job; wait until the PDF can be chatted with.
+async function waitForIngestion(jobId: string) {
+  for (;;) {
+    const res = await api.get(`/chat/upload/${jobId}`);
+    const job = res.data;
+
+    if (job.status === "done") return job;
+    if (job.status === "failed") {
+      throw new Error(job.error || "PDF indexing failed");
+    }
+
+    await new Promise((resolve) => setTimeout(resolve, POLL_INTERVAL_MS));
+  }
+}
+
 export function usePdfUpload() {
   const {
     mutate: uploadFile,
@@ -15,6 +32,10 @@ export function usePdfUpload() {
         headers: { "Content-Type": "multipart/form-data" },
       });
 
+      if (res.data.job_id) {
+        await waitForIngestion(res.data.job_id);
+      }
+
       return res.data;
     },
   });
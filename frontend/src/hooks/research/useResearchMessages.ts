@@ -1,14 +1,32 @@
 import api from "@/api/axios";
-import { useQuery } from "@tanstack/react-query";
+import { useMemo } from "react";
+import { useInfiniteQuery } from "@tanstack/react-query";
 
 export function useResearchMessages(sessionId: number | null) {
-  return useQuery({
+  const query = useInfiniteQuery({
     queryKey: ["research-messages", sessionId],
-    queryFn: async () => {
-      if (!sessionId) return [];
-      const res = await api.get(`/research/sessions/${sessionId}/messages`);
-      return res.data.messages;
+    queryFn: async ({ pageParam }) => {
+      const res = await api.get(`/research/sessions/${sessionId}/messages`, {
+        params: pageParam ? { before: pageParam } : undefined,
+      });
+      return res.data;
     },
+    initialPageParam: null as string | null,
+    // Pages go newest -> oldest; each carries the cursor for the next older one
+    getNextPageParam: (lastPage) => lastPage.next_cursor ?? undefined,
     enabled: !!sessionId,
   });
+
+  // Oldest page first, each page already in chronological order
+  const data = useMemo(
+    () => query.data?.pages.slice().reverse().flatMap((page) => page.messages),
+    [query.data]
+  );
+
+  return {
+    ...query,
+    data,
+    loadOlder: query.fetchNextPage,
+    hasOlder: query.hasNextPage,
+  };
 }
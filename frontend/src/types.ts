@@ -18,20 +18,22 @@ export interface Paper {
   chunks: number;
 }
 
+export interface ChatPaper {
+  title: string;
+  authors?: string[];
+  year?: string;
+  url?: string;
+  pdf_url?: string;
+  abstract?: string;
+}
+
 export interface ChatMessage {
   id: string;
   role: "user" | "assistant";
   content: string;
   timestamp: Date;
   metadata?: {
-    papers?: Array<{
-      title: string;
-      authors?: string[];
-      year?: string;
-      url?: string;
-      pdf_url?: string;
-      abstract?: string;
-    }>;
+    papers?: ChatPaper[];
   };
 }
 
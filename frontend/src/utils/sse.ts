@@ -0,0 +1,70 @@
+export type StreamDone = {
+  tokens: number;
+  chars: number;
+  elapsed_ms: number;
+};
+
+export type StreamedPaper = {
+  arxiv_id: string;
+  title: string;
+  authors: string[];
+  published_date: string;
+  arxiv_url: string;
+  pdf_url: string;
+  summary: string;
+};
+
+// Typed events the research agent sends before its answer tokens
+export type AgentEvent =
+  | { event: "tool_started"; call_id: number; name: string; args: Record<string, unknown> }
+  | { event: "tool_result"; call_id: number; name: string; paper: StreamedPaper }
+  | { event: "tool_finished"; call_id: number; name: string; count: number; error: string | null };
+
+// Incremental parser for the backend's SSE chat streams.
+// Feed it each chunk from `reader.read()`; it returns the answer text
+// carried by the complete events received so far. Heartbeat comments
+// are skipped, the final `done` / `error` events are kept as fields, and
+// any other named event (agent tool progress) is passed to `onEvent`.
+export class SSETextDecoder {
+  private decoder = new TextDecoder();
+  private buffer = "";
+  private onEvent?: (event: AgentEvent) => void;
+  done: StreamDone | null = null;
+  error: string | null = null;
+
+  constructor(options: { onEvent?: (event: AgentEvent) => void } = {}) {
+    this.onEvent = options.onEvent;
+  }
+
+  decode(value?: Uint8Array): string {
+    this.buffer += this.decoder.decode(value, { stream: true });
+
+    let text = "";
+    let boundary = this.buffer.indexOf("\n\n");
+
+    while (boundary !== -1) {
+      const raw = this.buffer.slice(0, boundary);
+      this.buffer = this.buffer.slice(boundary + 2);
+      boundary = this.buffer.indexOf("\n\n");
+
+      let event = "message";
+      const data: string[] = [];
+
+      for (const line of raw.split("\n")) {
+        if (line.startsWith(":")) continue; // heartbeat
+        if (line.startsWith("event:")) event = line.slice(6).trim();
+        else if (line.startsWith("data:")) data.push(line.slice(5).replace(/^ /, ""));
+      }
+
+      if (data.length === 0) continue;
+      const payload = JSON.parse(data.join("\n"));
+
+      if (event === "message") text += payload.text ?? "";
+      else if (event === "done") this.done = payload;
+      else if (event === "error") this.error = payload.detail;
+      else this.onEvent?.({ event, ...payload } as AgentEvent);
+    }
+
+    return text;
+  }
+}